@@ -0,0 +1,146 @@
+"""
+Job Queue - Backend chạy background job khi không có Redis (deploy một node, test).
+
+- Cùng giao diện enqueue_job(function, *args, _job_id, _queue_name, _defer_until) với ArqRedis
+  nên các helper enqueue dùng chung cho cả hai backend
+- Job chạy bằng asyncio task trong process API, ctx do on_startup của worker tạo (lazy)
+- _job_id trùng với job đang chờ / đang chạy -> bỏ qua (trả về None) như ARQ
+- Mỗi queue một semaphore giới hạn số job đồng thời (max_jobs của WorkerSettings tương ứng)
+
+WHY: Không có UPSTASH_REDIS_URL thì enqueue lỗi và booking nằm PENDING mãi; site nhỏ
+chạy một process vẫn có optimization mà không cần round trip qua mạng.
+"""
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Protocol
+from uuid import uuid4
+
+from arq.constants import default_queue_name
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue(Protocol):
+    """Phần giao diện ArqRedis mà các helper enqueue dùng."""
+
+    async def enqueue_job(
+        self,
+        function: str,
+        *args: Any,
+        _job_id: str | None = None,
+        _queue_name: str | None = None,
+        _defer_until: datetime | None = None,
+        _defer_by: float | timedelta | None = None,
+        **kwargs: Any,
+    ) -> Any | None: ...
+
+
+@dataclass(slots=True)
+class InProcessJob:
+    """Tương ứng arq.jobs.Job - router chỉ đọc job_id."""
+    job_id: str
+
+
+class InProcessQueue:
+    """
+    Chạy job của worker ngay trong event loop hiện tại.
+
+    `functions`: danh sách như WorkerSettings.functions (coroutine hoặc arq.worker.Function);
+    `max_jobs`: số job đồng thời theo tên queue (queue lạ dùng `default_max_jobs`),
+    _queue_name=None là queue mặc định của ARQ.
+    """
+
+    def __init__(
+        self,
+        functions: list,
+        on_startup: Callable[[dict], Awaitable[None]] | None = None,
+        on_shutdown: Callable[[dict], Awaitable[None]] | None = None,
+        max_jobs: dict[str, int] | None = None,
+        default_max_jobs: int = 10,
+    ):
+        self.functions = {
+            getattr(f, "name", getattr(f, "__name__", None)): getattr(f, "coroutine", f) for f in functions
+        }
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+        self.max_jobs = max_jobs or {}
+        self.default_max_jobs = default_max_jobs
+        self._ctx: dict | None = None
+        self._startup_lock = asyncio.Lock()
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.completed = 0
+        self.failed = 0
+
+    async def enqueue_job(
+        self,
+        function: str,
+        *args: Any,
+        _job_id: str | None = None,
+        _queue_name: str | None = None,
+        _defer_until: datetime | None = None,
+        _defer_by: float | timedelta | None = None,
+        **kwargs: Any,
+    ) -> InProcessJob | None:
+        if function not in self.functions:
+            raise ValueError(f"Unknown job function: {function}")
+        job_id = _job_id or uuid4().hex
+        if job_id in self._tasks:
+            return None
+
+        delay = _defer_by.total_seconds() if isinstance(_defer_by, timedelta) else (_defer_by or 0)
+        if _defer_until is not None:
+            delay = (_defer_until - datetime.now(timezone.utc)).total_seconds()
+
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, function, _queue_name, delay, args, kwargs))
+        return InProcessJob(job_id)
+
+    async def _run(self, job_id: str, function: str, queue_name: str | None, delay: float, args, kwargs):
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self._semaphore(queue_name):
+                ctx = {**await self._context(), "job_id": job_id, "job_try": 1, "redis": None}
+                await self.functions[function](ctx, *args, **kwargs)
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # WHY: Giống ARQ - job lỗi chỉ được log, không làm hỏng process API
+            self.failed += 1
+            logger.exception(f"❌ In-process job {function} ({job_id}) failed")
+        finally:
+            self._tasks.pop(job_id, None)
+
+    def _semaphore(self, queue_name: str | None) -> asyncio.Semaphore:
+        queue_name = queue_name or default_queue_name
+        if queue_name not in self._semaphores:
+            self._semaphores[queue_name] = asyncio.Semaphore(self.max_jobs.get(queue_name, self.default_max_jobs))
+        return self._semaphores[queue_name]
+
+    async def _context(self) -> dict:
+        # WHY: Khởi tạo lazy - process pool / DB session factory chỉ tạo khi có job đầu tiên
+        async with self._startup_lock:
+            if self._ctx is None:
+                ctx = {}
+                if self.on_startup:
+                    await self.on_startup(ctx)
+                self._ctx = ctx
+        return self._ctx
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def close(self):
+        """Hủy job đang chờ / đang chạy rồi chạy on_shutdown (nếu đã startup)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._ctx is not None and self.on_shutdown:
+            await self.on_shutdown(self._ctx)
+        self._ctx = None
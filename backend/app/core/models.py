@@ -28,4 +28,7 @@ from app.modules.staff.models import UserProfile, StaffProfile  # noqa: F401
 from app.modules.scheduling.models import StaffSchedule  # noqa: F401
 
 # 7. Bookings phụ thuộc Customer, Service, Staff, Resource
-from app.modules.bookings.models import Booking, BookingItem  # noqa: F401
+from app.modules.bookings.models import Booking, BookingItem, BookingItemResource  # noqa: F401
+
+# 8. System telemetry (không có relationships)
+from app.modules.system.models import SolverRun  # noqa: F401
@@ -3,10 +3,17 @@ Redis/Upstash Connection - Quản lý kết nối Redis cho ARQ background jobs.
 
 Cú pháp dựa trên ARQ docs: https://arq-docs.helpmanual.io/
 """
-from arq.connections import RedisSettings
+import asyncio
+import logging
+import time
+from dataclasses import replace
+
+from arq.connections import ArqRedis, RedisSettings, create_pool
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 def get_redis_settings() -> RedisSettings:
     """
@@ -67,3 +74,169 @@ def get_or_create_redis_settings() -> RedisSettings:
     if REDIS_SETTINGS is None:
         REDIS_SETTINGS = get_redis_settings()
     return REDIS_SETTINGS
+
+
+# Chu kỳ PING kiểm tra pool dùng chung của API (giây)
+HEALTH_CHECK_INTERVAL_SECONDS = 30
+# Sau khi kết nối thất bại, không thử lại trong khoảng này để request không bị chậm theo
+RECONNECT_BACKOFF_SECONDS = 5
+
+
+class RedisPool:
+    """
+    Một ArqRedis dùng chung cho cả process API (mở trong lifespan của FastAPI).
+
+    - get(): pool hiện tại, tự kết nối lại nếu chưa có / đã bị đóng do health check lỗi
+    - health_check(): PING, lỗi -> đóng pool để lần get() sau kết nối lại
+    - stats(): số kết nối, lần kết nối lại, lỗi gần nhất
+
+    WHY: Tạo pool + TLS handshake tới Upstash cho mỗi lần enqueue làm chậm mọi
+    POST /bookings; redis-py tự giữ và tái sử dụng kết nối bên trong pool.
+    """
+
+    def __init__(self):
+        self._pool: ArqRedis | None = None
+        self._lock = asyncio.Lock()
+        self._retry_after = 0.0
+        self.connects = 0
+        self.reconnects = 0
+        self.failures = 0
+        self.last_error: str | None = None
+        self.last_health_check: float | None = None
+        self.healthy = False
+
+    async def get(self) -> ArqRedis:
+        """Pool dùng chung; raise nếu Redis chưa cấu hình hoặc không kết nối được."""
+        if self._pool is not None:
+            return self._pool
+        async with self._lock:
+            if self._pool is None:
+                if time.monotonic() < self._retry_after:
+                    raise ConnectionError(f"Redis unavailable: {self.last_error}")
+                await self._connect()
+        return self._pool
+
+    async def _connect(self):
+        try:
+            # WHY: Không retry (kèm sleep) trong request - backoff ở trên lo phần thử lại
+            redis_settings = replace(get_redis_settings(), conn_retries=0)
+            self._pool = await create_pool(redis_settings)
+        except Exception as e:
+            self.failures += 1
+            self.healthy = False
+            self.last_error = str(e)
+            self._retry_after = time.monotonic() + RECONNECT_BACKOFF_SECONDS
+            raise
+        if self.connects:
+            self.reconnects += 1
+        self.connects += 1
+        self.healthy = True
+        logger.info("✅ Redis pool connected")
+
+    async def health_check(self) -> bool:
+        """PING Redis; lỗi -> đóng pool để lần get() sau kết nối lại."""
+        self.last_health_check = time.time()
+        try:
+            redis = await self.get()
+            await redis.ping()
+            self.healthy = True
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)
+            await self.close()
+            logger.warning(f"⚠️ Redis health check failed: {e}")
+        return self.healthy
+
+    async def run_health_checks(self, interval: float = HEALTH_CHECK_INTERVAL_SECONDS):
+        """Vòng health check chạy nền trong lifespan (hủy khi shutdown)."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.health_check()
+
+    async def close(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            try:
+                await pool.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing Redis pool: {e}")
+
+    def stats(self) -> dict:
+        """Trạng thái pool (kết nối của redis-py đọc từ ConnectionPool)."""
+        connections = {}
+        if self._pool is not None:
+            connection_pool = self._pool.connection_pool
+            connections = {
+                "max_connections": connection_pool.max_connections,
+                "created_connections": getattr(connection_pool, "_created_connections", None),
+                "available_connections": len(getattr(connection_pool, "_available_connections", [])),
+                "in_use_connections": len(getattr(connection_pool, "_in_use_connections", [])),
+            }
+        return {
+            "connected": self._pool is not None,
+            "healthy": self.healthy,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_health_check": self.last_health_check,
+            **connections,
+        }
+
+
+redis_pool = RedisPool()
+
+
+async def get_redis() -> ArqRedis | None:
+    """
+    Dependency: pool Redis dùng chung của API.
+
+    WHY: Trả None thay vì lỗi khi Redis không khả dụng - endpoint vẫn chạy,
+    chỉ phần enqueue job bị bỏ qua (như trước đây). Không cấu hình Redis là chế độ
+    chạy bình thường (job in-process) - không log cảnh báo, không tính là lỗi kết nối.
+    """
+    if not settings.UPSTASH_REDIS_URL:
+        return None
+    try:
+        return await redis_pool.get()
+    except Exception as e:
+        logger.warning(f"⚠️ Redis unavailable: {e}")
+        return None
+
+
+# Bộ đếm version khi không có Redis - job chạy in-process nên đọc chung được với API
+_local_versions: dict[str, int] = {}
+
+
+async def bump_version(key: str):
+    """
+    Tăng bộ đếm version trên Redis để worker biết dữ liệu cache đã cũ (gọi sau khi commit).
+
+    WHY: Best effort - lỗi Redis chỉ được log, API vẫn trả kết quả.
+    Cache phía worker luôn có TTL nên tự hết hạn.
+    """
+    if not settings.UPSTASH_REDIS_URL:
+        _local_versions[key] = _local_versions.get(key, 0) + 1
+        return
+    try:
+        redis = await redis_pool.get()
+        await redis.incr(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Cannot bump {key}: {e}")
+
+
+async def read_version(redis, key: str) -> bytes | None:
+    """
+    Đọc bộ đếm version (do bump_version tăng); None khi không có Redis hoặc đọc lỗi.
+
+    WHY: Không đọc được version -> cache phía worker dựa vào TTL, không làm hỏng job.
+    Không có Redis (job in-process) -> đọc bộ đếm trong process.
+    """
+    if redis is None:
+        version = _local_versions.get(key)
+        return str(version).encode() if version else None
+    try:
+        return await redis.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Cannot read {key}: {e}")
+        return None
@@ -1,10 +1,12 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import api_router
 from app.core.config import settings
+from app.core.redis import redis_pool
 
 # WHY: Import model registry để SQLAlchemy mapper resolve được tất cả relationship string references
 import app.core.models  # noqa: F401
@@ -12,9 +14,23 @@ import app.core.models  # noqa: F401
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Khởi chạy các công việc khi startup (ví dụ: connect DB)
+    # WHY: Một pool Redis cho mọi lần enqueue job thay vì mở/đóng kết nối mỗi request.
+    # Redis lỗi lúc startup không chặn API - pool tự kết nối lại ở lần dùng sau
+    health_task = None
+    if settings.UPSTASH_REDIS_URL:
+        await redis_pool.health_check()
+        health_task = asyncio.create_task(redis_pool.run_health_checks())
     yield
     # Cleanup khi shutdown
+    if health_task:
+        health_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await health_task
+    await redis_pool.close()
+    if not settings.UPSTASH_REDIS_URL:
+        # WHY: Import muộn - chỉ deploy không có Redis mới chạy job trong process API
+        from app.worker import close_in_process_queue
+        await close_in_process_queue()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -147,3 +147,20 @@ class BookingItem(SQLModel, table=True):
     service: "Service" = Relationship()
     assigned_staff: Optional["StaffProfile"] = Relationship()
     assigned_resource: Optional["Resource"] = Relationship()
+
+
+class BookingItemResource(SQLModel, table=True):
+    """
+    Resource được optimizer assign cho item kèm khoảng sử dụng thực tế.
+
+    WHY: Một item có thể cần nhiều resource (quantity > 1, nhiều group) và mỗi resource
+    chỉ bị chiếm trong sub-interval [start + start_delay, + usage_duration) -
+    assigned_resource_id của BookingItem chỉ giữ resource đầu tiên để hiển thị.
+    """
+    __tablename__ = "booking_item_resources"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    booking_item_id: UUID = Field(foreign_key="booking_items.id", index=True, ondelete="CASCADE")
+    resource_id: UUID = Field(foreign_key="resources.id", index=True)
+    usage_start: datetime = Field(sa_type=DateTime(timezone=True))
+    usage_end: datetime = Field(sa_type=DateTime(timezone=True))
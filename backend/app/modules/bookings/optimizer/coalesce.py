@@ -0,0 +1,61 @@
+"""
+Job Coalescing - Gộp các yêu cầu optimize trùng nhau vào một ARQ job.
+
+Theo ngày:
+- Tắt mặc định; bật bằng OPTIMIZER_COALESCE_WINDOW_SECONDS > 0
+- Thời gian chia thành các cửa sổ cố định dài OPTIMIZER_COALESCE_WINDOW_SECONDS
+- Mọi booking mới của cùng ngày trong một cửa sổ dùng chung một ARQ job id
+  (ARQ bỏ qua enqueue trùng id) - job chạy ở cuối cửa sổ
+- Booking đến sau khi job đã chạy rơi vào cửa sổ kế tiếp -> không bị bỏ sót
+
+Theo booking: job id = booking + version (updated_at, optimized_at) + timeout/profile
+- create_booking, trigger thủ công và retry trước khi job chạy xong chỉ tạo một job
+- Sau mỗi lần giải optimized_at đổi -> trigger tiếp theo được enqueue như bình thường
+
+WHY: Lúc khuyến mãi hàng chục booking cùng ngày đến trong vài giây; một lần giải
+chung thay cho hàng chục job optimize_booking tranh nhau process pool.
+"""
+import hashlib
+import json
+import math
+from datetime import date, datetime, timezone
+from uuid import UUID
+
+from app.modules.bookings.models import Booking
+from app.modules.bookings.schemas import SolverProfile
+
+COALESCED_JOB_PREFIX = "optimize_batch"
+BOOKING_JOB_PREFIX = "optimize_booking"
+
+
+def coalesce_window_end(now: datetime, window_seconds: float) -> datetime:
+    """Thời điểm kết thúc cửa sổ chứa `now` (cũng là lúc job gộp chạy)."""
+    timestamp = now.timestamp()
+    end = math.floor(timestamp / window_seconds + 1) * window_seconds
+    return datetime.fromtimestamp(end, tz=timezone.utc)
+
+
+def coalesced_job_id(target_date: date, run_at: datetime) -> str:
+    """Job id xác định theo ngày + cửa sổ: enqueue lần hai trong cùng cửa sổ bị ARQ bỏ qua."""
+    return f"{COALESCED_JOB_PREFIX}:{target_date.isoformat()}:{int(run_at.timestamp() * 1000)}"
+
+
+def optimization_version(booking: Booking) -> str:
+    """Version của booking: đổi khi booking được sửa hoặc vừa được optimize."""
+    optimized_at = booking.optimized_at.isoformat() if booking.optimized_at else "-"
+    return f"{booking.updated_at.isoformat()}|{optimized_at}"
+
+
+def booking_job_id(
+    booking_id: UUID, version: str, timeout_seconds: int, profile: SolverProfile | None = None
+) -> str:
+    """
+    Job id xác định của optimize_booking: cùng booking + version + tham số giải -> cùng id.
+
+    WHY: profile None (create_booking) và SolverProfile() (trigger_optimization) là cùng
+    tham số giải - chuẩn hóa trước khi hash để hai đường enqueue trùng id.
+    """
+    profile = profile or SolverProfile()
+    params = json.dumps([version, timeout_seconds, profile.model_dump(mode="json")], sort_keys=True)
+    digest = hashlib.sha256(params.encode()).hexdigest()[:16]
+    return f"{BOOKING_JOB_PREFIX}:{booking_id}:{digest}"
@@ -0,0 +1,154 @@
+"""
+Decomposition - Tách bài toán thành các thành phần độc lập để giải song song.
+
+Hai item thuộc cùng thành phần khi:
+- Cùng booking (ràng buộc sequence), hoặc
+- Có chung ít nhất một staff đủ kỹ năng (theo required_skill_ids), hoặc
+- Có chung ít nhất một resource thuộc group yêu cầu (theo required_resource_group_ids)
+
+VD: Facial (giường facial + KTV facial) và Massage (giường massage + KTV massage)
+không dùng chung staff/resource nào -> 2 model nhỏ thay vì 1 model lớn.
+"""
+from dataclasses import replace
+from uuid import UUID
+
+from app.modules.bookings.optimizer.solver import EligibilityIndex, OptimizationInput, booking_key
+from app.modules.bookings.schemas import OptimizationResult, OptimizerEngine, SolverStats
+
+# WHY: Thứ tự "xấu" dần - kết quả gộp lấy status xấu nhất của các thành phần
+_STATUS_SEVERITY = ["OPTIMAL", "FEASIBLE", "TIMEOUT", "UNKNOWN", "MODEL_INVALID", "INFEASIBLE"]
+
+
+class _DisjointSet:
+    """Union-find trên chỉ số item."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def decompose(input_data: OptimizationInput) -> list[OptimizationInput]:
+    """Tách input thành các input con không chia sẻ staff/resource/booking."""
+    services = input_data.services
+    if len(services) <= 1:
+        return [input_data]
+
+    eligibility = EligibilityIndex(input_data.available_staff, input_data.available_resources, services)
+    components = _DisjointSet(len(services))
+
+    # WHY: Item đầu tiên gặp của mỗi booking/staff/resource làm "đại diện" để union
+    first_seen: dict[tuple[str, UUID | None], int] = {}
+    staff_of_item: list[list[UUID]] = []
+    resources_of_item: list[list[UUID]] = []
+
+    for idx, service in enumerate(services):
+        staff_ids = eligibility.staff_for(service)
+        resource_ids = eligibility.resources_for(service)
+        staff_of_item.append(staff_ids)
+        resources_of_item.append(resource_ids)
+
+        keys = [("booking", booking_key(input_data, service))]
+        keys.extend(("staff", sid) for sid in staff_ids)
+        keys.extend(("resource", rid) for rid in resource_ids)
+        for key in keys:
+            if key in first_seen:
+                components.union(first_seen[key], idx)
+            else:
+                first_seen[key] = idx
+
+    groups: dict[int, list[int]] = {}
+    for idx in range(len(services)):
+        groups.setdefault(components.find(idx), []).append(idx)
+
+    if len(groups) == 1:
+        return [input_data]
+
+    sub_inputs = []
+    for indexes in groups.values():
+        staff_ids = {sid for idx in indexes for sid in staff_of_item[idx]}
+        resource_ids = {rid for idx in indexes for rid in resources_of_item[idx]}
+        booking_ids = {booking_key(input_data, services[idx]) for idx in indexes}
+
+        sub_inputs.append(replace(
+            input_data,
+            services=[services[idx] for idx in indexes],
+            # WHY: Giữ thứ tự gốc để model con build deterministic
+            available_staff=[s for s in input_data.available_staff if s.staff_id in staff_ids],
+            available_resources=[
+                r for r in input_data.available_resources if r.resource_id in resource_ids
+            ],
+            bookings=[b for b in input_data.bookings if b.booking_id in booking_ids],
+        ))
+    return sub_inputs
+
+
+def merge_results(results: list[OptimizationResult]) -> OptimizationResult:
+    """
+    Gộp kết quả các thành phần thành một OptimizationResult.
+
+    - Thành công khi mọi thành phần thành công; status = status xấu nhất
+    - solve_time_ms = thành phần chậm nhất (các thành phần chạy song song)
+    """
+    if len(results) == 1:
+        return results[0]
+
+    worst = max(
+        results,
+        key=lambda r: _STATUS_SEVERITY.index(r.status) if r.status in _STATUS_SEVERITY else len(_STATUS_SEVERITY),
+    )
+    success = all(r.success for r in results)
+    engines = {r.engine for r in results}
+
+    return OptimizationResult(
+        success=success,
+        status=worst.status,
+        message=(
+            f"Đã tìm được phương án phân bổ ({len(results)} thành phần độc lập)."
+            if success else worst.message
+        ),
+        solve_time_ms=max((r.solve_time_ms or 0) for r in results),
+        engine=OptimizerEngine.CP_SAT if OptimizerEngine.CP_SAT in engines else OptimizerEngine.GREEDY,
+        stats=merge_stats([r.stats for r in results if r.stats]),
+        assigned_items=[item for r in results for item in r.assigned_items] if success else [],
+    )
+
+
+def merge_stats(stats: list[SolverStats]) -> SolverStats | None:
+    """
+    Gộp thống kê các thành phần: cộng dồn search/kích thước model, presolve lấy max.
+
+    WHY: Mỗi thành phần có objective riêng - objective/bound gộp là tổng, gap tính
+    lại trên tổng khi mọi thành phần đều có bound.
+    """
+    if not stats:
+        return None
+    if len(stats) == 1:
+        return stats[0]
+
+    presolve = [s.presolve_time_ms for s in stats if s.presolve_time_ms is not None]
+    objective = bound = gap = None
+    if all(s.objective_value is not None and s.best_objective_bound is not None for s in stats):
+        objective = sum(s.objective_value for s in stats)
+        bound = sum(s.best_objective_bound for s in stats)
+        gap = abs(objective - bound) / max(1.0, abs(objective))
+
+    return SolverStats(
+        num_conflicts=sum(s.num_conflicts for s in stats),
+        num_branches=sum(s.num_branches for s in stats),
+        presolve_time_ms=max(presolve) if presolve else None,
+        objective_value=objective,
+        best_objective_bound=bound,
+        relative_gap=gap,
+        num_variables=sum(s.num_variables for s in stats),
+        num_constraints=sum(s.num_constraints for s in stats),
+    )
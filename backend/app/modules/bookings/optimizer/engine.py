@@ -0,0 +1,80 @@
+"""
+Optimizer Engine - Chọn engine giải phù hợp với kích thước bài toán.
+
+- Tách input thành các thành phần độc lập (decomposition) và giải song song
+- Mỗi thành phần nhỏ (<= GREEDY_MAX_ITEMS item, mode BOOKING, chưa có lịch đang lưu):
+  thử GreedyScheduler trước
+- Heuristic thất bại hoặc thành phần lớn: fallback sang CP-SAT (BookingOptimizer)
+"""
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from app.modules.bookings.optimizer.decomposition import decompose, merge_results
+from app.modules.bookings.optimizer.heuristic import GreedyScheduler
+from app.modules.bookings.optimizer.solver import BookingOptimizer, OptimizationInput
+from app.modules.bookings.schemas import OptimizationMode, OptimizationResult, SolverProfile
+
+# WHY: Phần lớn booking chỉ có 1-2 dịch vụ, earliest-fit đủ tốt và nhanh hơn CP-SAT nhiều lần
+GREEDY_MAX_ITEMS = 2
+
+# Số thành phần giải đồng thời trong một process
+MAX_COMPONENT_THREADS = 4
+
+
+def _has_current_assignment(input_data: OptimizationInput) -> bool:
+    """
+    Có item đang giữ lịch đã lưu (đã xếp / đã xác nhận).
+
+    WHY: Greedy earliest-fit bỏ qua lịch hiện tại và penalty perturbation - item đã xác
+    nhận sẽ bị dời sang chỗ sớm nhất; CP-SAT giữ nguyên nếu lịch cũ vẫn khả thi.
+    """
+    return any(s.current_start is not None or s.current_staff_id is not None for s in input_data.services)
+
+
+def _solve_component(
+    input_data: OptimizationInput,
+    timeout_seconds: int,
+    greedy_max_items: int,
+    profile: SolverProfile | None = None,
+    on_solution: Callable[[OptimizationResult], None] | None = None,
+) -> OptimizationResult:
+    """Giải một thành phần: greedy nếu đủ nhỏ, ngược lại CP-SAT (tham số theo kích thước thành phần)."""
+    if (
+        input_data.mode == OptimizationMode.BOOKING
+        and len(input_data.services) <= greedy_max_items
+        and not _has_current_assignment(input_data)
+    ):
+        result = GreedyScheduler(input_data).solve()
+        if result is not None:
+            return result
+
+    return BookingOptimizer(input_data, timeout_seconds, profile=profile).solve(on_solution)
+
+
+def solve_optimization(
+    input_data: OptimizationInput,
+    timeout_seconds: int = 30,
+    greedy_max_items: int = GREEDY_MAX_ITEMS,
+    profile: SolverProfile | None = None,
+    on_solution: Callable[[OptimizationResult], None] | None = None,
+) -> OptimizationResult:
+    """
+    Entry point cho ProcessPoolExecutor: chọn engine, dựng và giải trong process con.
+
+    WHY: CpModel/CpSolver không picklable, chỉ OptimizationInput (dataclass thuần)
+    đi qua ranh giới process, model được dựng lại ở process giải.
+    Các thành phần độc lập chạy bằng thread vì CP-SAT nhả GIL khi Solve.
+
+    `on_solution` (nghiệm trung gian) chỉ dùng khi input là một thành phần - nghiệm
+    riêng của một thành phần không phải phương án cho toàn bộ input.
+    """
+    components = decompose(input_data)
+    if len(components) == 1:
+        return _solve_component(input_data, timeout_seconds, greedy_max_items, profile, on_solution)
+
+    with ThreadPoolExecutor(max_workers=min(len(components), MAX_COMPONENT_THREADS)) as pool:
+        results = list(pool.map(
+            lambda component: _solve_component(component, timeout_seconds, greedy_max_items, profile),
+            components,
+        ))
+    return merge_results(results)
@@ -0,0 +1,103 @@
+"""
+Feasibility Pre-checks - Phát hiện input chắc chắn vô nghiệm trong vài mili-giây, trước khi gọi CP-SAT.
+
+Các điều kiện cần (vi phạm -> INFEASIBLE ngay, kèm lý do):
+1. Mỗi dịch vụ có ít nhất 1 staff đủ kỹ năng
+2. Khung giờ của booking đủ dài cho tổng thời lượng combo (theo phút và theo slot của model)
+3. Skill-minutes: tổng phút cần kỹ năng k <= tổng phút khả dụng của các staff có kỹ năng k
+4. Resource group: đủ số resource cho quantity, tổng phút sử dụng <= tổng phút khả dụng của group
+
+WHY: Input vô nghiệm có thể khiến CP-SAT chạy hết timeout rồi trả TIMEOUT.
+Các kiểm tra chỉ là điều kiện cần - qua được vẫn có thể vô nghiệm.
+"""
+from uuid import UUID
+
+from app.modules.bookings.optimizer.solver import (
+    EligibilityIndex,
+    OptimizationInput,
+    ServiceData,
+    blocked_ranges,
+    booking_key,
+    booking_windows,
+    datetime_to_minutes,
+)
+
+
+def _available_minutes(slots, base, horizon: int) -> int:
+    """Số phút khả dụng trong [0, horizon]."""
+    return horizon - sum(end - start for start, end in blocked_ranges(slots, base, horizon))
+
+
+def find_infeasibility(input_data: OptimizationInput, eligibility: EligibilityIndex) -> str | None:
+    """Lý do input chắc chắn vô nghiệm, hoặc None nếu qua mọi kiểm tra."""
+    base = input_data.time_window[0]
+    horizon = datetime_to_minutes(input_data.time_window[1], base)
+
+    # 1. Skill matching
+    for service in input_data.services:
+        if not eligibility.staff_for(service):
+            return f"Không có nhân viên nào có đủ kỹ năng cho dịch vụ {service.service_id}"
+
+    # 2. Khung giờ vs thời lượng combo
+    windows, _ = booking_windows(input_data, base, horizon)
+    services_by_booking: dict[UUID | None, list[ServiceData]] = {}
+    for service in input_data.services:
+        services_by_booking.setdefault(booking_key(input_data, service), []).append(service)
+
+    slot = max(1, input_data.slot_minutes)
+    for key, services in services_by_booking.items():
+        window_start, window_end = windows.get(key, (0, horizon))
+        total = sum(s.duration + s.buffer_time for s in services)
+        if total > window_end - window_start:
+            return (
+                f"Khung giờ của booking {key} ({max(0, window_end - window_start)} phút) "
+                f"ngắn hơn tổng thời lượng combo ({total} phút)"
+            )
+        # WHY: Model làm tròn khung giờ vào trong và thời lượng lên theo slot - khung giờ
+        # không khớp slot có thể đủ theo phút nhưng không đủ theo slot (domain rỗng)
+        slot_window = window_end // slot - (-(-window_start // slot))
+        slot_total = sum(-(-(s.duration + s.buffer_time) // slot) for s in services)
+        if slot_total > slot_window:
+            return (
+                f"Khung giờ của booking {key} chỉ còn {max(0, slot_window) * slot} phút khi làm tròn "
+                f"theo slot {slot} phút, ngắn hơn tổng thời lượng combo ({slot_total * slot} phút)"
+            )
+
+    # 3. Skill-minutes
+    staff_minutes = {
+        s.staff_id: _available_minutes(s.available_slots, base, horizon) for s in input_data.available_staff
+    }
+    skill_demand: dict[UUID, int] = {}
+    for service in input_data.services:
+        for skill_id in service.required_skill_ids:
+            skill_demand[skill_id] = skill_demand.get(skill_id, 0) + service.duration + service.buffer_time
+
+    for skill_id, demand in skill_demand.items():
+        capacity = sum(staff_minutes[sid] for sid in eligibility.staff_with_skill(skill_id))
+        if demand > capacity:
+            return f"Kỹ năng {skill_id} cần {demand} phút nhưng nhân viên chỉ còn {capacity} phút khả dụng"
+
+    # 4. Resource group capacity
+    resource_minutes = {
+        r.resource_id: _available_minutes(r.available_slots, base, horizon) for r in input_data.available_resources
+    }
+    group_demand: dict[UUID, int] = {}
+    for service in input_data.services:
+        for requirement in service.resource_requirements:
+            resources = eligibility.resources_in_group(requirement.group_id)
+            if requirement.quantity > len(resources):
+                return (
+                    f"Dịch vụ {service.service_id} cần {requirement.quantity} tài nguyên "
+                    f"nhóm {requirement.group_id} nhưng chỉ có {len(resources)}"
+                )
+            _, length = service.resource_usage(requirement)
+            group_demand[requirement.group_id] = (
+                group_demand.get(requirement.group_id, 0) + requirement.quantity * length
+            )
+
+    for group_id, demand in group_demand.items():
+        capacity = sum(resource_minutes[rid] for rid in eligibility.resources_in_group(group_id))
+        if demand > capacity:
+            return f"Nhóm tài nguyên {group_id} cần {demand} phút nhưng chỉ còn {capacity} phút khả dụng"
+
+    return None
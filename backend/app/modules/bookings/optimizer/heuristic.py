@@ -0,0 +1,171 @@
+"""
+Greedy Scheduler - Heuristic earliest-fit cho booking nhỏ (1-2 dịch vụ).
+
+Thuật toán list-scheduling:
+- Duyệt các item theo sequence_order của từng booking
+- Với mỗi item, thử mọi cặp (staff eligible, resource eligible) và chọn cặp
+  bắt đầu sớm nhất; hòa thì ưu tiên staff khách yêu cầu
+- Resource chỉ bị chiếm trong sub-interval (start_delay, usage_duration)
+- Không tối ưu toàn cục: nếu không xếp được, hoặc dịch vụ cần nhiều resource
+  (nhiều group / quantity > 1), thì trả về None để fallback sang CP-SAT
+"""
+import time
+from uuid import UUID
+
+from app.modules.bookings.optimizer.solver import (
+    EligibilityIndex,
+    OptimizationInput,
+    ServiceData,
+    blocked_ranges,
+    booking_key,
+    booking_windows,
+    datetime_to_minutes,
+    minutes_to_datetime,
+)
+from app.modules.bookings.schemas import OptimizationResult, OptimizerEngine
+
+Busy = list[tuple[int, int]]
+Usage = tuple[Busy, int, int]  # (khoảng bận, offset so với start của item, thời lượng chiếm)
+
+
+def _is_free(busy: Busy, start: int, end: int) -> bool:
+    """Khoảng [start, end) không giao với khoảng bận nào."""
+    return all(end <= busy_start or start >= busy_end for busy_start, busy_end in busy)
+
+
+def _align(minutes: int, slot: int) -> int:
+    """Làm tròn lên biên slot gần nhất."""
+    return -(-minutes // slot) * slot
+
+
+def _earliest_fit(usages: list[Usage], earliest: int, latest_start: int, slot: int = 1) -> int | None:
+    """
+    Thời điểm t sớm nhất >= earliest (đúng biên slot) mà mỗi usage đều trống
+    trong [t + offset, t + offset + length).
+
+    WHY: Chỉ cần thử earliest và các điểm kết thúc khoảng bận (trừ offset) - nghiệm
+    sớm nhất luôn nằm ở một trong các điểm đó (sau khi làm tròn lên biên slot).
+    """
+    earliest = _align(earliest, slot)
+    candidates = {earliest}
+    for busy, offset, _ in usages:
+        candidates.update(_align(end - offset, slot) for _, end in busy if end - offset > earliest)
+
+    for start in sorted(candidates):
+        if start > latest_start:
+            return None
+        if all(_is_free(busy, start + offset, start + offset + length) for busy, offset, length in usages):
+            return start
+    return None
+
+
+class GreedyScheduler:
+    """Heuristic earliest-fit: xếp lịch trong vài mili-giây cho booking nhỏ."""
+
+    def __init__(self, input_data: OptimizationInput):
+        self.input = input_data
+        self.base_time = input_data.time_window[0]
+        self.horizon = datetime_to_minutes(input_data.time_window[1], self.base_time)
+        self.slot = max(1, input_data.slot_minutes)
+        self.eligibility = EligibilityIndex(
+            input_data.available_staff, input_data.available_resources, input_data.services
+        )
+        self._windows, self._preferred_staff = booking_windows(input_data, self.base_time, self.horizon)
+
+        # WHY: Khoảng bận khởi tạo = phần ngoài slot khả dụng, cập nhật dần khi xếp item
+        self.staff_busy: dict[UUID, Busy] = {
+            s.staff_id: blocked_ranges(s.available_slots, self.base_time, self.horizon)
+            for s in input_data.available_staff
+        }
+        self.resource_busy: dict[UUID, Busy] = {
+            r.resource_id: blocked_ranges(r.available_slots, self.base_time, self.horizon)
+            for r in input_data.available_resources
+        }
+
+    def _place(self, service: ServiceData, earliest: int, latest_end: int) -> tuple[UUID, UUID | None, int] | None:
+        """Chọn (staff, resource, start) sớm nhất cho một item."""
+        duration = service.duration + service.buffer_time
+        requirement = service.resource_requirements[0] if service.resource_requirements else None
+        offset, length = service.resource_usage(requirement) if requirement else (0, 0)
+        preferred = self._preferred_staff.get(booking_key(self.input, service))
+
+        staff_ids = self.eligibility.staff_for(service)
+        # WHY: Đặt staff ưu tiên lên đầu để thắng khi hòa thời điểm bắt đầu
+        if preferred in staff_ids:
+            staff_ids.remove(preferred)
+            staff_ids.insert(0, preferred)
+
+        resource_ids: list[UUID | None] = (
+            self.eligibility.resources_in_group(requirement.group_id) if requirement else [None]
+        )
+
+        best: tuple[UUID, UUID | None, int] | None = None
+        for staff_id in staff_ids:
+            for resource_id in resource_ids:
+                usages: list[Usage] = [(self.staff_busy[staff_id], 0, duration)]
+                if resource_id is not None and length > 0:
+                    usages.append((self.resource_busy[resource_id], offset, length))
+
+                start = _earliest_fit(usages, earliest, latest_end - duration, self.slot)
+                if start is not None and (best is None or start < best[2]):
+                    best = (staff_id, resource_id, start)
+                    if start == _align(earliest, self.slot):
+                        return best
+        return best
+
+    def solve(self) -> OptimizationResult | None:
+        """Xếp lịch toàn bộ item. Trả về None nếu heuristic không xếp được."""
+        started = time.perf_counter()
+        if any(
+            len(s.resource_requirements) > 1 or any(r.quantity > 1 for r in s.resource_requirements)
+            for s in self.input.services
+        ):
+            return None
+
+        services_by_booking: dict[UUID | None, list[ServiceData]] = {}
+        for service in self.input.services:
+            services_by_booking.setdefault(booking_key(self.input, service), []).append(service)
+
+        assignments = []
+        for key, services in services_by_booking.items():
+            window_start, window_end = self._windows.get(key, (0, self.horizon))
+            cursor = window_start
+
+            for service in sorted(services, key=lambda s: s.sequence_order):
+                placement = self._place(service, cursor, window_end)
+                if placement is None:
+                    return None
+
+                staff_id, resource_id, start = placement
+                end = start + service.duration + service.buffer_time
+                self.staff_busy[staff_id].append((start, end))
+                resource_usages = []
+                if resource_id is not None:
+                    offset, length = service.resource_usage(service.resource_requirements[0])
+                    self.resource_busy[resource_id].append((start + offset, start + offset + length))
+                    resource_usages.append({
+                        "resource_id": str(resource_id),
+                        "start": minutes_to_datetime(start + offset, self.base_time),
+                        "end": minutes_to_datetime(start + offset + length, self.base_time),
+                    })
+                cursor = end
+
+                assignments.append({
+                    "item_id": str(service.item_id),
+                    "booking_id": str(key) if key else None,
+                    "staff_id": str(staff_id),
+                    "resource_id": str(resource_id) if resource_id else None,
+                    "resource_ids": [str(resource_id)] if resource_id else [],
+                    "resource_usages": resource_usages,
+                    "scheduled_start": minutes_to_datetime(start, self.base_time),
+                    "scheduled_end": minutes_to_datetime(end, self.base_time),
+                })
+
+        return OptimizationResult(
+            success=True,
+            status="FEASIBLE",
+            message="Đã tìm được phương án phân bổ (heuristic).",
+            solve_time_ms=(time.perf_counter() - started) * 1000,
+            assigned_items=assignments,
+            engine=OptimizerEngine.GREEDY,
+        )
@@ -0,0 +1,410 @@
+"""
+Input Builder - Dựng OptimizationInput từ database cho BookingOptimizer.
+
+Nguồn dữ liệu:
+- Booking/BookingItem: các task cần phân bổ và khung giờ mong muốn
+- ServiceRequiredSkill/ServiceResourceRequirement: yêu cầu skill/resource group của dịch vụ
+- StaffSchedule + Shift + StaffSkillLink: staff khả dụng trong ngày và kỹ năng
+- Resource + ResourceMaintenanceSchedule: tài nguyên khả dụng (trừ lịch bảo trì)
+- BookingItem đã được xếp của booking khác: chiếm staff/resource (mode BOOKING)
+- OperatingHour + ExceptionDate: giờ mở cửa, cắt horizon và slot khả dụng
+"""
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlmodel import and_, select
+
+from app.core.config import settings
+from app.modules.bookings.models import Booking, BookingItem, BookingItemResource, BookingStatus
+from app.modules.bookings.optimizer.skill_cache import SkillCatalog
+from app.modules.bookings.optimizer.solver import (
+    BookingWindow,
+    OptimizationInput,
+    ResourceAvailability,
+    ResourceRequirement,
+    ServiceData,
+    StaffAvailability,
+    subtract_intervals,
+)
+from app.modules.bookings.schemas import OptimizationMode, OptimizationWeights
+from app.modules.resources.models import Resource, ResourceStatus
+from app.modules.scheduling.models import ScheduleStatus, StaffSchedule
+from app.modules.services.link_models import ServiceRequiredSkill
+from app.modules.services.models import ServiceResourceRequirement
+from app.modules.settings.service import settings_service
+from app.modules.staff.link_models import StaffSkillLink
+
+# WHY: Chỉ booking chưa phục vụ mới được phép sắp xếp lại
+OPTIMIZABLE_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+
+# Booking đã có lịch cố định, chiếm staff/resource khi giải riêng một booking khác
+OCCUPYING_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.IN_PROGRESS)
+
+Interval = tuple[datetime, datetime]
+
+
+def _intersect_intervals(slots: list[Interval], allowed: list[Interval]) -> list[Interval]:
+    """Giao danh sách slot với các khoảng cho phép (cả hai đã sort, không chồng nhau)."""
+    result = []
+    for slot_start, slot_end in slots:
+        for allowed_start, allowed_end in allowed:
+            start, end = max(slot_start, allowed_start), min(slot_end, allowed_end)
+            if start < end:
+                result.append((start, end))
+    return result
+
+
+async def _apply_operating_hours(
+    session: AsyncSession, input_data: OptimizationInput, target_date: date
+) -> OptimizationInput:
+    """
+    Cắt horizon về giờ mở cửa và giới hạn slot staff/resource trong giờ mở cửa.
+
+    WHY: Horizon hẹp hơn -> domain biến start nhỏ hơn -> CP-SAT propagate nhanh hơn.
+    Ngày đóng cửa giữ nguyên horizon, slot rỗng -> solver trả INFEASIBLE.
+    """
+    window_start, window_end = input_data.time_window
+    open_intervals = await settings_service.get_open_intervals(session, target_date, window_start.tzinfo)
+    open_in_window = _intersect_intervals([(window_start, window_end)], open_intervals)
+    window = (open_in_window[0][0], open_in_window[-1][1]) if open_in_window else (window_start, window_end)
+
+    return replace(
+        input_data,
+        time_window=window,
+        available_staff=[
+            replace(s, available_slots=_intersect_intervals(s.available_slots, open_in_window))
+            for s in input_data.available_staff
+        ],
+        available_resources=[
+            replace(r, available_slots=_intersect_intervals(r.available_slots, open_in_window))
+            for r in input_data.available_resources
+        ],
+    )
+
+
+def day_bounds(target_date: date) -> tuple[datetime, datetime]:
+    """Khoảng [00:00, 24:00) của một ngày (UTC, đồng bộ với cách lưu timestamp)."""
+    start = datetime.combine(target_date, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+async def load_day_bookings(session: AsyncSession, target_date: date) -> list[Booking]:
+    """Lấy mọi booking PENDING/CONFIRMED của một ngày, kèm items và service."""
+    day_start, day_end = day_bounds(target_date)
+    result = await session.execute(
+        select(Booking)
+        .options(selectinload(Booking.items).selectinload(BookingItem.service))
+        .where(
+            and_(
+                Booking.preferred_date >= day_start,
+                Booking.preferred_date < day_end,
+                Booking.status.in_(OPTIMIZABLE_STATUSES),
+            )
+        )
+        .order_by(Booking.preferred_time_start)
+    )
+    return list(result.scalars().all())
+
+
+async def _load_service_requirements(
+    session: AsyncSession, service_ids: set[UUID], skills: SkillCatalog | None = None
+) -> tuple[dict[UUID, set[UUID]], dict[UUID, list[ResourceRequirement]]]:
+    """Map service_id -> skill_ids và service_id -> resource requirements."""
+    skills_by_service: dict[UUID, set[UUID]] = {sid: set() for sid in service_ids}
+    requirements_by_service: dict[UUID, list[ResourceRequirement]] = {sid: [] for sid in service_ids}
+    if not service_ids:
+        return skills_by_service, requirements_by_service
+
+    if skills:
+        skills_by_service = {sid: skills.skills_of_service(sid) for sid in service_ids}
+    else:
+        skill_rows = await session.execute(
+            select(ServiceRequiredSkill).where(ServiceRequiredSkill.service_id.in_(service_ids))
+        )
+        for link in skill_rows.scalars().all():
+            skills_by_service[link.service_id].add(link.skill_id)
+
+    requirement_rows = await session.execute(
+        select(ServiceResourceRequirement).where(ServiceResourceRequirement.service_id.in_(service_ids))
+    )
+    for requirement in requirement_rows.scalars().all():
+        requirements_by_service[requirement.service_id].append(ResourceRequirement(
+            group_id=requirement.group_id,
+            quantity=requirement.quantity,
+            start_delay=requirement.start_delay,
+            usage_duration=requirement.usage_duration,
+        ))
+
+    # WHY: Sort để model build deterministic
+    for requirements in requirements_by_service.values():
+        requirements.sort(key=lambda r: str(r.group_id))
+    return skills_by_service, requirements_by_service
+
+
+async def _load_staff_availability(
+    session: AsyncSession,
+    work_date: date,
+    tzinfo,
+    busy: dict[UUID, list[Interval]] | None = None,
+    skills: SkillCatalog | None = None,
+) -> list[StaffAvailability]:
+    """Staff có ca làm việc (chưa bị hủy) trong ngày, kèm kỹ năng, trừ khoảng đã bị chiếm."""
+    result = await session.execute(
+        select(StaffSchedule)
+        .options(selectinload(StaffSchedule.shift))
+        .where(
+            and_(
+                StaffSchedule.work_date == work_date,
+                StaffSchedule.status != ScheduleStatus.CANCELLED,
+            )
+        )
+    )
+    slots_by_staff: dict[UUID, list[Interval]] = {}
+    for schedule in result.scalars().all():
+        if not schedule.shift:
+            continue
+        start = datetime.combine(work_date, schedule.shift.start_time, tzinfo=tzinfo)
+        end = datetime.combine(work_date, schedule.shift.end_time, tzinfo=tzinfo)
+        # WHY: Ca qua đêm - end_time thuộc ngày hôm sau
+        if end <= start:
+            end += timedelta(days=1)
+        slots_by_staff.setdefault(schedule.staff_id, []).append((start, end))
+
+    if not slots_by_staff:
+        return []
+
+    if skills:
+        skills_by_staff = {sid: skills.skills_of_staff(sid) for sid in slots_by_staff}
+    else:
+        skill_rows = await session.execute(
+            select(StaffSkillLink).where(StaffSkillLink.staff_id.in_(slots_by_staff.keys()))
+        )
+        skills_by_staff: dict[UUID, set[UUID]] = {sid: set() for sid in slots_by_staff}
+        for link in skill_rows.scalars().all():
+            skills_by_staff[link.staff_id].add(link.skill_id)
+
+    busy = busy or {}
+    return [
+        StaffAvailability(
+            staff_id=staff_id,
+            skill_ids=skills_by_staff[staff_id],
+            available_slots=subtract_intervals(slots, busy.get(staff_id, [])),
+        )
+        for staff_id, slots in slots_by_staff.items()
+    ]
+
+
+async def load_item_resource_usages(
+    session: AsyncSession, items: list[BookingItem]
+) -> dict[UUID, list[tuple[UUID, datetime, datetime]]]:
+    """
+    Resource đã lưu của từng item kèm khoảng sử dụng: {item_id: [(resource_id, start, end)]}.
+
+    WHY: Item lưu trước khi có bảng booking_item_resources chỉ có assigned_resource_id ->
+    coi resource đó bận suốt item như trước.
+    """
+    usages: dict[UUID, list[tuple[UUID, datetime, datetime]]] = {item.id: [] for item in items}
+    if items:
+        result = await session.execute(
+            select(BookingItemResource).where(BookingItemResource.booking_item_id.in_(list(usages)))
+        )
+        for row in result.scalars().all():
+            usages[row.booking_item_id].append((row.resource_id, row.usage_start, row.usage_end))
+
+    for item in items:
+        if not usages[item.id] and item.assigned_resource_id and item.scheduled_start and item.scheduled_end:
+            usages[item.id].append((item.assigned_resource_id, item.scheduled_start, item.scheduled_end))
+    return usages
+
+
+async def _load_busy_intervals(
+    session: AsyncSession,
+    target_date: date,
+    statuses: tuple[BookingStatus, ...],
+    exclude_booking_id: UUID | None = None,
+) -> tuple[dict[UUID, list[Interval]], dict[UUID, list[Interval]]]:
+    """Khoảng thời gian staff/resource đã bị các booking (theo status) trong ngày chiếm."""
+    day_start, day_end = day_bounds(target_date)
+    query = (
+        select(BookingItem)
+        .join(Booking, Booking.id == BookingItem.booking_id)
+        .where(
+            and_(
+                Booking.status.in_(statuses),
+                BookingItem.scheduled_start >= day_start,
+                BookingItem.scheduled_start < day_end,
+                BookingItem.scheduled_end.is_not(None),
+            )
+        )
+    )
+    if exclude_booking_id:
+        query = query.where(Booking.id != exclude_booking_id)
+
+    result = await session.execute(query)
+    items = list(result.scalars().all())
+    staff_busy: dict[UUID, list[Interval]] = {}
+    resource_busy: dict[UUID, list[Interval]] = {}
+    for item in items:
+        if item.assigned_staff_id:
+            staff_busy.setdefault(item.assigned_staff_id, []).append((item.scheduled_start, item.scheduled_end))
+    # WHY: Block đúng khoảng từng resource được dùng (quantity > 1, nhiều group, sub-interval)
+    for usages in (await load_item_resource_usages(session, items)).values():
+        for resource_id, start, end in usages:
+            resource_busy.setdefault(resource_id, []).append((start, end))
+    return staff_busy, resource_busy
+
+
+async def _load_resource_availability(
+    session: AsyncSession,
+    window: Interval,
+    group_ids: set[UUID],
+    busy: dict[UUID, list[Interval]] | None = None,
+) -> list[ResourceAvailability]:
+    """Resource ACTIVE thuộc các group cần dùng, trừ lịch bảo trì và khoảng đã bị chiếm."""
+    if not group_ids:
+        return []
+
+    result = await session.execute(
+        select(Resource)
+        .options(selectinload(Resource.maintenance_schedules))
+        .where(
+            and_(
+                Resource.group_id.in_(group_ids),
+                Resource.status == ResourceStatus.ACTIVE,
+                Resource.deleted_at.is_(None),
+            )
+        )
+    )
+
+    busy = busy or {}
+    resources = []
+    for resource in result.scalars().all():
+        blocked = [(m.start_time, m.end_time) for m in resource.maintenance_schedules]
+        blocked.extend(busy.get(resource.id, []))
+        slots = subtract_intervals([window], blocked)
+
+        resources.append(ResourceAvailability(
+            resource_id=resource.id,
+            group_id=resource.group_id,
+            available_slots=slots,
+        ))
+    return resources
+
+
+async def _build_services(
+    session: AsyncSession, bookings: list[Booking], skills: SkillCatalog | None = None
+) -> tuple[list[ServiceData], set[UUID]]:
+    """Chuyển BookingItem thành ServiceData, kèm tập resource group cần dùng."""
+    service_ids = {item.service_id for b in bookings for item in b.items}
+    skills_by_service, requirements_by_service = await _load_service_requirements(session, service_ids, skills)
+    resource_usages = await load_item_resource_usages(session, [item for b in bookings for item in b.items])
+
+    services = [
+        ServiceData(
+            item_id=item.id,
+            service_id=item.service_id,
+            duration=item.service.duration,
+            buffer_time=item.service.buffer_time,
+            required_skill_ids=skills_by_service[item.service_id],
+            required_resource_group_ids={r.group_id for r in requirements_by_service[item.service_id]},
+            sequence_order=item.sequence_order,
+            booking_id=booking.id,
+            current_staff_id=item.assigned_staff_id,
+            current_resource_id=item.assigned_resource_id,
+            current_start=item.scheduled_start,
+            current_resource_usages=resource_usages[item.id],
+            is_confirmed=booking.status == BookingStatus.CONFIRMED,
+            resource_requirements=list(requirements_by_service[item.service_id]),
+        )
+        for booking in bookings
+        for item in booking.items
+    ]
+    return services, {r.group_id for rs in requirements_by_service.values() for r in rs}
+
+
+async def build_day_input(
+    session: AsyncSession,
+    target_date: date,
+    weights: OptimizationWeights | None = None,
+    skills: SkillCatalog | None = None,
+) -> OptimizationInput | None:
+    """
+    Dựng input mode DAY cho toàn bộ booking PENDING/CONFIRMED trong ngày.
+    Trả về None nếu ngày không có booking nào cần tối ưu.
+    `skills`: catalog đã cache (worker) - None thì query kỹ năng từ database.
+    """
+    bookings = [b for b in await load_day_bookings(session, target_date) if b.items]
+    if not bookings:
+        return None
+
+    # WHY: Horizon = hợp các khung giờ mong muốn, tránh domain thừa cả 24h
+    window = (
+        min(b.preferred_time_start for b in bookings),
+        max(b.preferred_time_end for b in bookings),
+    )
+
+    services, group_ids = await _build_services(session, bookings, skills)
+    # WHY: Booking CONFIRMED nằm trong model, chỉ booking đang phục vụ là cố định
+    staff_busy, resource_busy = await _load_busy_intervals(
+        session, target_date, (BookingStatus.IN_PROGRESS,)
+    )
+
+    input_data = OptimizationInput(
+        booking_id=None,
+        services=services,
+        available_staff=await _load_staff_availability(
+            session, target_date, window[0].tzinfo, staff_busy, skills
+        ),
+        available_resources=await _load_resource_availability(session, window, group_ids, resource_busy),
+        time_window=window,
+        weights=weights or OptimizationWeights(),
+        mode=OptimizationMode.DAY,
+        bookings=[
+            BookingWindow(
+                booking_id=b.id,
+                time_window=(b.preferred_time_start, b.preferred_time_end),
+                preferred_staff_id=b.preferred_staff_id,
+            )
+            for b in bookings
+        ],
+        slot_minutes=settings.OPTIMIZER_SLOT_MINUTES,
+    )
+    return await _apply_operating_hours(session, input_data, target_date)
+
+
+async def build_booking_input(
+    session: AsyncSession,
+    booking: Booking,
+    weights: OptimizationWeights | None = None,
+    skills: SkillCatalog | None = None,
+) -> OptimizationInput:
+    """
+    Dựng input mode BOOKING cho một booking (items phải được load kèm service).
+
+    WHY: Staff/resource đã được booking khác (CONFIRMED/IN_PROGRESS) chiếm
+    được trừ khỏi slot khả dụng để không xếp trùng lịch.
+    """
+    window = (booking.preferred_time_start, booking.preferred_time_end)
+    work_date = booking.preferred_date.date()
+
+    services, group_ids = await _build_services(session, [booking], skills)
+    staff_busy, resource_busy = await _load_busy_intervals(
+        session, work_date, OCCUPYING_STATUSES, exclude_booking_id=booking.id
+    )
+
+    input_data = OptimizationInput(
+        booking_id=booking.id,
+        services=services,
+        available_staff=await _load_staff_availability(
+            session, work_date, window[0].tzinfo, staff_busy, skills
+        ),
+        available_resources=await _load_resource_availability(session, window, group_ids, resource_busy),
+        time_window=window,
+        preferred_staff_id=booking.preferred_staff_id,
+        weights=weights or OptimizationWeights(),
+        slot_minutes=settings.OPTIMIZER_SLOT_MINUTES,
+    )
+    return await _apply_operating_hours(session, input_data, work_date)
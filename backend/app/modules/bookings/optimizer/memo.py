@@ -0,0 +1,225 @@
+"""
+Solve Cache - Ghi nhớ kết quả giải theo fingerprint chuẩn hóa của OptimizationInput.
+
+- Key = sha256(input chuẩn hóa + timeout + profile) : availability version
+- Chuẩn hóa: set được sort, danh sách entity (service/staff/resource/booking) được sort
+  nên cùng một bài toán cho cùng key dù thứ tự load từ database khác nhau
+- AVAILABILITY_VERSION_KEY: API tăng mỗi khi lịch làm việc / resource thay đổi
+  (bump_availability_version) -> mọi key cũ tự mất hiệu lực
+- Lưu trữ: LRU dict trong process worker, Redis (tùy chọn) để dùng chung giữa các worker
+- Solved input: fingerprint (bỏ qua lịch đang lưu) của lần giải thành công gần nhất theo
+  booking -> optimize_booking bỏ qua job trùng khi input không đổi
+
+WHY: Cùng combo, cùng khung giờ, cùng trạng thái khả dụng lặp lại liên tục (khách bấm
+lại, job bị enqueue lại). Giải lại cho cùng kết quả nhưng tốn đến timeout giây CPU.
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.core.redis import bump_version, read_version
+from app.modules.bookings.optimizer.solver import OptimizationInput
+from app.modules.bookings.schemas import OptimizationResult, OptimizerEngine, SolverProfile
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_VERSION_KEY = "optimizer:availability_version"
+RESULT_KEY_PREFIX = "optimizer:result:"
+SOLVED_INPUT_KEY_PREFIX = "optimizer:solved_input:"
+
+# WHY: UNKNOWN/MODEL_INVALID không được lưu - giải lại có thể cho kết quả khác
+CACHEABLE_STATUSES = frozenset({"OPTIMAL", "FEASIBLE", "INFEASIBLE"})
+# Status của booking đã được xếp lịch thành công
+SOLVED_STATUSES = frozenset({"OPTIMAL", "FEASIBLE"})
+
+# Danh sách entity không phụ thuộc thứ tự
+_UNORDERED_FIELDS = ("services", "available_staff", "available_resources", "bookings")
+_DATETIME_ASSIGNMENT_FIELDS = ("scheduled_start", "scheduled_end")
+# Trạng thái lịch đang lưu của item - do chính lần giải trước ghi ra
+_ASSIGNMENT_STATE_FIELDS = (
+    "current_staff_id", "current_resource_id", "current_start", "is_confirmed", "current_resource_usages",
+)
+
+
+def _canonical(value):
+    """Chuyển input thành cấu trúc JSON có thứ tự xác định."""
+    if is_dataclass(value):
+        return {f.name: _canonical(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (UUID, datetime)):
+        return str(value)
+    if isinstance(value, dict):
+        return sorted([str(k), _canonical(v)] for k, v in value.items())
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonical(v) for v in value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def problem_fingerprint(
+    input_data: OptimizationInput,
+    timeout_seconds: int,
+    profile: SolverProfile | None = None,
+    ignore_assignments: bool = False,
+) -> str:
+    """
+    Hash ổn định của bài toán: hai input tương đương (khác thứ tự) cho cùng fingerprint.
+
+    `ignore_assignments`: bỏ qua lịch đang lưu của item - input trước và sau khi giải
+    (đã CONFIRMED, đã có staff/giờ) cho cùng fingerprint.
+    """
+    canonical = _canonical(input_data)
+    if ignore_assignments:
+        for service in canonical["services"]:
+            for name in _ASSIGNMENT_STATE_FIELDS:
+                service.pop(name, None)
+    for name in _UNORDERED_FIELDS:
+        canonical[name] = sorted(canonical[name], key=lambda entry: json.dumps(entry, sort_keys=True))
+    canonical["timeout_seconds"] = timeout_seconds
+    # WHY: capture_snapshot không ảnh hưởng kết quả
+    canonical["profile"] = profile.model_dump(mode="json", exclude={"capture_snapshot"}) if profile else None
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SolveCache:
+    """
+    LRU cache kết quả giải (dạng JSON) trong process worker, Redis làm tầng dùng chung.
+
+    WHY: Lưu JSON thay vì object - mỗi lần đọc là một bản sao, người gọi sửa kết quả
+    không làm hỏng cache.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600, use_redis: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def key_for(
+        self,
+        input_data: OptimizationInput,
+        timeout_seconds: int,
+        profile: SolverProfile | None = None,
+        redis=None,
+    ) -> str:
+        """Key của bài toán ở availability version hiện tại."""
+        version = await read_version(redis, AVAILABILITY_VERSION_KEY)
+        return f"{problem_fingerprint(input_data, timeout_seconds, profile)}:{(version or b'0').decode()}"
+
+    async def get(self, key: str, redis=None) -> OptimizationResult | None:
+        """Kết quả đã lưu (engine=CACHE, solve_time_ms = thời gian tra cứu) hoặc None."""
+        started = time.perf_counter()
+        payload = self._get_local(key)
+        if payload is None and self._redis(redis):
+            try:
+                payload = await redis.get(RESULT_KEY_PREFIX + key)
+            except Exception as e:
+                logger.warning(f"⚠️ Cannot read cached result: {e}")
+            if payload is not None:
+                payload = payload.decode() if isinstance(payload, bytes) else payload
+                self._put_local(key, payload)
+
+        if payload is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        result = OptimizationResult.model_validate_json(payload)
+        # WHY: assigned_items là dict tự do - JSON trả về chuỗi, cột DateTime cần datetime
+        for item in result.assigned_items:
+            for name in _DATETIME_ASSIGNMENT_FIELDS:
+                if isinstance(item.get(name), str):
+                    item[name] = datetime.fromisoformat(item[name])
+            for usage in item.get("resource_usages", []):
+                for name in ("start", "end"):
+                    if isinstance(usage.get(name), str):
+                        usage[name] = datetime.fromisoformat(usage[name])
+        result.engine = OptimizerEngine.CACHE
+        result.solve_time_ms = (time.perf_counter() - started) * 1000
+        # WHY: Stats mô tả lần giải gốc - bỏ đi để telemetry không đếm hai lần
+        result.stats = None
+        return result
+
+    async def put(self, key: str, result: OptimizationResult, redis=None):
+        """Lưu kết quả cuối cùng của một lần giải (bỏ qua status không xác định)."""
+        if result.status not in CACHEABLE_STATUSES:
+            return
+        payload = result.model_dump_json()
+        self._put_local(key, payload)
+        if self._redis(redis):
+            try:
+                await redis.set(RESULT_KEY_PREFIX + key, payload, ex=int(self.ttl_seconds))
+            except Exception as e:
+                logger.warning(f"⚠️ Cannot store cached result: {e}")
+
+    def _redis(self, redis) -> bool:
+        return self.use_redis and redis is not None
+
+    def _get_local(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, payload = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def _put_local(self, key: str, payload: str):
+        self._entries[key] = (time.monotonic(), payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+async def bump_availability_version():
+    """Báo cho worker biết lịch làm việc / resource đã thay đổi (gọi sau khi commit)."""
+    await bump_version(AVAILABILITY_VERSION_KEY)
+
+
+# Fingerprint đã giải khi không có Redis: {booking_id: (hết hạn lúc (monotonic), fingerprint)}
+# WHY: Job in-process chạy chung process với API nên đọc chung được, như _local_versions
+_local_solved: dict[UUID, tuple[float, str]] = {}
+
+
+async def read_solved_fingerprint(redis, booking_id: UUID) -> str | None:
+    """Fingerprint input của lần giải thành công gần nhất của booking (None nếu chưa có / lỗi)."""
+    if redis is None:
+        entry = _local_solved.get(booking_id)
+        return entry[1] if entry and entry[0] > time.monotonic() else None
+    try:
+        value = await redis.get(f"{SOLVED_INPUT_KEY_PREFIX}{booking_id}")
+    except Exception as e:
+        logger.warning(f"⚠️ Cannot read solved input of {booking_id}: {e}")
+        return None
+    return value.decode() if isinstance(value, bytes) else value
+
+
+async def store_solved_fingerprint(redis, booking_id: UUID, fingerprint: str, ttl_seconds: int):
+    """Ghi nhớ fingerprint input vừa giải thành công (best effort)."""
+    if redis is None:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in _local_solved.items() if expires_at <= now]:
+            del _local_solved[key]
+        _local_solved[booking_id] = (now + ttl_seconds, fingerprint)
+        return
+    try:
+        await redis.set(f"{SOLVED_INPUT_KEY_PREFIX}{booking_id}", fingerprint, ex=ttl_seconds)
+    except Exception as e:
+        logger.warning(f"⚠️ Cannot store solved input of {booking_id}: {e}")
@@ -0,0 +1,26 @@
+"""
+Job Queues - Định tuyến job optimize theo nguồn booking.
+
+- Queue interactive (OPTIMIZER_INTERACTIVE_QUEUE, mặc định tắt): booking WALK_IN / RECEPTIONIST,
+  khách đang đứng ở quầy - chạy bởi worker riêng (InteractiveWorkerSettings, process pool riêng)
+- Queue mặc định của ARQ: booking ONLINE / PHONE, job theo ngày / tuần / sửa lịch
+
+WHY: ARQ lấy job theo thứ tự trên một queue; tách queue để hàng chờ ONLINE lúc cao
+điểm không đẩy độ trễ của khách tại quầy lên theo.
+"""
+from arq.constants import default_queue_name
+
+from app.core.config import settings
+from app.modules.bookings.models import BookingSource
+
+INTERACTIVE_SOURCES = frozenset({BookingSource.WALK_IN, BookingSource.RECEPTIONIST})
+
+
+def is_interactive(source: BookingSource) -> bool:
+    """Booking có khách đang chờ tại quầy (và queue interactive đang bật)."""
+    return bool(settings.OPTIMIZER_INTERACTIVE_QUEUE) and source in INTERACTIVE_SOURCES
+
+
+def queue_for(source: BookingSource) -> str:
+    """Tên ARQ queue cho job optimize của booking có nguồn `source`."""
+    return settings.OPTIMIZER_INTERACTIVE_QUEUE if is_interactive(source) else default_queue_name
@@ -0,0 +1,168 @@
+"""
+Disruption Repair - Sửa lịch trong ngày sau khi có hủy booking / staff nghỉ, không giải lại cả ngày.
+
+1. Neighbourhood: booking có item bị ảnh hưởng
+   - Item "hỏng": staff/resource đang giữ không còn khả dụng (ca bị hủy, resource bảo trì)
+   - Item chưa được xếp lịch
+   - Item dùng staff/resource vừa được giải phóng và bắt đầu sau khoảng trống (có thể dời lên sớm hơn)
+2. Mọi item khác giữ nguyên lịch đã lưu, chiếm staff/resource như hằng số
+3. Giải model nhỏ của neighbourhood - vô nghiệm thì worker giải lại cả ngày
+
+WHY: Hủy booking / staff nghỉ chỉ chạm vài item; model neighbourhood có vài chục biến
+nên giải trong vài ms, và các booking khác không bị xáo trộn.
+"""
+from dataclasses import replace
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.modules.bookings.optimizer.solver import OptimizationInput, ServiceData, subtract_intervals
+
+# Giới hạn thời gian giải neighbourhood (giây)
+REPAIR_TIMEOUT_SECONDS = 5
+
+# Số item tối đa được nới quanh khoảng vừa giải phóng (item hỏng / chưa xếp luôn được nới)
+MAX_FREED_NEIGHBOURHOOD_ITEMS = 20
+
+# (staff_id hoặc resource_id, start, end) vừa được giải phóng
+FreedInterval = tuple[UUID, datetime, datetime]
+
+
+def _current_interval(service: ServiceData) -> tuple[datetime, datetime]:
+    end = service.current_start + timedelta(minutes=service.duration + service.buffer_time)
+    return service.current_start, end
+
+
+def _saved_resource_usages(service: ServiceData) -> list[tuple[UUID, datetime, datetime]]:
+    """Resource đã lưu kèm khoảng sử dụng - lịch chỉ có current_resource_id thì bận suốt item."""
+    if service.current_resource_usages:
+        return service.current_resource_usages
+    if service.current_resource_id and service.current_start is not None:
+        return [(service.current_resource_id, *_current_interval(service))]
+    return []
+
+
+def _covered(slots: list[tuple[datetime, datetime]], start: datetime, end: datetime) -> bool:
+    return any(slot_start <= start and end <= slot_end for slot_start, slot_end in slots)
+
+
+def current_assignments(input_data: OptimizationInput) -> dict[UUID, dict]:
+    """Lịch đang lưu của các item đã được xếp (định dạng OptimizationResult.assigned_items)."""
+    assignments = {}
+    for service in input_data.services:
+        if service.current_start is None or service.current_staff_id is None:
+            continue
+        start, end = _current_interval(service)
+        usages = _saved_resource_usages(service)
+        assignments[service.item_id] = {
+            "item_id": str(service.item_id),
+            "booking_id": str(service.booking_id) if service.booking_id else None,
+            "staff_id": str(service.current_staff_id),
+            "resource_id": str(service.current_resource_id) if service.current_resource_id else None,
+            "resource_ids": list(dict.fromkeys(str(rid) for rid, _, _ in usages)),
+            "resource_usages": [
+                {"resource_id": str(rid), "start": usage_start, "end": usage_end}
+                for rid, usage_start, usage_end in usages
+            ],
+            "scheduled_start": start,
+            "scheduled_end": end,
+        }
+    return assignments
+
+
+def broken_items(input_data: OptimizationInput) -> set[UUID]:
+    """Item chưa được xếp, hoặc có staff/resource đang giữ không còn khả dụng trong khoảng của item."""
+    staff_slots = {s.staff_id: s.available_slots for s in input_data.available_staff}
+    resource_slots = {r.resource_id: r.available_slots for r in input_data.available_resources}
+
+    broken = set()
+    for service in input_data.services:
+        if service.current_start is None or service.current_staff_id is None:
+            broken.add(service.item_id)
+            continue
+        start, end = _current_interval(service)
+        if not _covered(staff_slots.get(service.current_staff_id, []), start, end):
+            broken.add(service.item_id)
+        elif any(
+            not _covered(resource_slots.get(rid, []), usage_start, usage_end)
+            for rid, usage_start, usage_end in _saved_resource_usages(service)
+        ):
+            broken.add(service.item_id)
+    return broken
+
+
+def repair_neighbourhood(
+    input_data: OptimizationInput,
+    freed: list[FreedInterval] | None = None,
+    max_freed_items: int = MAX_FREED_NEIGHBOURHOOD_ITEMS,
+) -> set[UUID]:
+    """
+    Booking cần xếp lại: booking có item hỏng / chưa xếp, cộng các booking gần nhất dùng
+    staff/resource của `freed` và bắt đầu sau khoảng được giải phóng.
+
+    WHY: Nới nguyên booking (không nới lẻ item) để giữ ràng buộc sequence của combo.
+    """
+    broken = broken_items(input_data)
+    booking_ids = {s.booking_id for s in input_data.services if s.item_id in broken}
+
+    candidates: list[tuple[timedelta, UUID]] = []
+    for owner_id, freed_start, _ in freed or []:
+        for service in input_data.services:
+            if service.item_id in broken:
+                continue
+            owners = {service.current_staff_id, *(rid for rid, _, _ in _saved_resource_usages(service))}
+            if owner_id not in owners:
+                continue
+            if service.current_start >= freed_start:
+                candidates.append((service.current_start - freed_start, service.booking_id))
+
+    # WHY: Item sát khoảng trống nhất hưởng lợi nhiều nhất khi dời lên
+    for _, booking_id in sorted(candidates, key=lambda c: c[0])[:max_freed_items]:
+        booking_ids.add(booking_id)
+    return booking_ids
+
+
+def neighbourhood_input(
+    day: OptimizationInput, booking_ids: set[UUID], assignments: dict[UUID, dict]
+) -> OptimizationInput:
+    """
+    Model chỉ gồm các booking được nới; item còn lại của ngày chiếm staff/resource
+    theo `assignments` như lịch cố định.
+
+    WHY: Resource của item cố định bị chặn đúng khoảng sử dụng (resource_usages); assignment
+    không kèm sub-interval thì chặn resource suốt item.
+    """
+    staff_busy: dict[UUID, list[tuple[datetime, datetime]]] = {}
+    resource_busy: dict[UUID, list[tuple[datetime, datetime]]] = {}
+    for service in day.services:
+        assignment = assignments.get(service.item_id)
+        if service.booking_id in booking_ids or assignment is None:
+            continue
+        interval = (assignment["scheduled_start"], assignment["scheduled_end"])
+        if assignment["staff_id"]:
+            staff_busy.setdefault(UUID(assignment["staff_id"]), []).append(interval)
+        usages = assignment.get("resource_usages")
+        if usages is None:
+            usages = [
+                {"resource_id": rid, "start": interval[0], "end": interval[1]} for rid in assignment["resource_ids"]
+            ]
+        for usage in usages:
+            resource_busy.setdefault(UUID(str(usage["resource_id"])), []).append((usage["start"], usage["end"]))
+
+    return replace(
+        day,
+        services=[s for s in day.services if s.booking_id in booking_ids],
+        available_staff=[
+            replace(s, available_slots=subtract_intervals(s.available_slots, staff_busy.get(s.staff_id, [])))
+            for s in day.available_staff
+        ],
+        available_resources=[
+            replace(r, available_slots=subtract_intervals(r.available_slots, resource_busy.get(r.resource_id, [])))
+            for r in day.available_resources
+        ],
+        bookings=[b for b in day.bookings if b.booking_id in booking_ids],
+    )
+
+
+def repair_input(input_data: OptimizationInput, booking_ids: set[UUID]) -> OptimizationInput:
+    """Input mode DAY của neighbourhood, phần còn lại cố định theo lịch đang lưu."""
+    return neighbourhood_input(input_data, booking_ids, current_assignments(input_data))
@@ -0,0 +1,288 @@
+"""
+Rolling Horizon + LNS - Tối ưu cả tuần mà không dựng một model khổng lồ.
+
+1. Rolling horizon: đi qua tuần theo các cửa sổ `window_days` ngày chồng lấn nhau
+   (bước `step_days`). Mỗi cửa sổ giải một model mode DAY gộp các ngày trong cửa sổ,
+   nhưng chỉ chốt `step_days` ngày đầu - ngày sau được giải lại ở cửa sổ kế tiếp
+   (lookahead). Tải đã chốt của staff đi vào model qua staff_load_offsets (α).
+2. LNS (Large Neighborhood Search): lặp lại - chọn một neighborhood (ngày làm việc
+   của một staff, hoặc một resource group trong một ngày), giải lại riêng các booking
+   trong đó với phần còn lại cố định, nhận nghiệm mới nếu điểm cả tuần không tệ hơn.
+
+WHY: Booking không đổi ngày (khách đã chọn ngày) - các ngày chỉ liên kết với nhau qua
+tải của staff, nên model từng cửa sổ/neighborhood nhỏ vẫn cải thiện được cân bằng tải
+cả tuần trong khi model gộp 7 ngày thường không giải nổi trong thời gian cho phép.
+"""
+import random
+import time
+from dataclasses import dataclass, replace
+from uuid import UUID
+
+from app.modules.bookings.optimizer.decomposition import merge_stats
+from app.modules.bookings.optimizer.engine import solve_optimization
+from app.modules.bookings.optimizer.repair import neighbourhood_input
+from app.modules.bookings.optimizer.solver import (
+    BookingOptimizer,
+    OptimizationInput,
+    ResourceAvailability,
+    ServiceData,
+    StaffAvailability,
+    datetime_to_minutes,
+)
+from app.modules.bookings.schemas import (
+    OptimizationMode,
+    OptimizationResult,
+    OptimizerEngine,
+    SolverProfile,
+    SolverStats,
+)
+
+
+@dataclass(slots=True)
+class RollingHorizonConfig:
+    """Tham số của rolling horizon + LNS."""
+    window_days: int = 2  # Số ngày mỗi cửa sổ
+    step_days: int = 1  # Số ngày chốt sau mỗi cửa sổ
+    window_timeout_seconds: int = 10  # Tối đa mỗi cửa sổ (chia đều nửa time budget nếu ít hơn)
+    lns_iterations: int = 30
+    lns_timeout_seconds: int = 2  # Mỗi neighborhood
+    max_neighborhood_items: int = 40  # Neighborhood lớn hơn bị lấy mẫu ngẫu nhiên theo booking
+    time_budget_seconds: float = 120  # Tổng thời gian (cả rolling và LNS)
+    seed: int = 0
+
+
+def merge_day_inputs(days: list[OptimizationInput]) -> OptimizationInput:
+    """Gộp input mode DAY của nhiều ngày thành một model (staff/resource gộp slot theo id)."""
+    staff: dict[UUID, StaffAvailability] = {}
+    resources: dict[UUID, ResourceAvailability] = {}
+    for day in days:
+        for s in day.available_staff:
+            merged = staff.setdefault(s.staff_id, StaffAvailability(s.staff_id, set(), []))
+            merged.skill_ids |= s.skill_ids
+            merged.available_slots.extend(s.available_slots)
+        for r in day.available_resources:
+            merged = resources.setdefault(r.resource_id, ResourceAvailability(r.resource_id, r.group_id, []))
+            merged.available_slots.extend(r.available_slots)
+
+    return replace(
+        days[0],
+        services=[s for day in days for s in day.services],
+        available_staff=list(staff.values()),
+        available_resources=list(resources.values()),
+        time_window=(min(d.time_window[0] for d in days), max(d.time_window[1] for d in days)),
+        mode=OptimizationMode.DAY,
+        bookings=[b for day in days for b in day.bookings],
+    )
+
+
+class WeekOptimizer:
+    """
+    Tối ưu nhiều ngày liên tiếp (input mode DAY của từng ngày, theo thứ tự ngày).
+
+    Điểm cả tuần (thấp hơn = tốt hơn, cùng thang slot với objective của BookingOptimizer):
+    α·tải lớn nhất của staff trong tuần + Σ ngày (β·số item không đúng staff ưu tiên
+    + γ·giờ kết thúc muộn nhất + δ·horizon·số item đã confirm bị xáo trộn).
+    """
+
+    def __init__(
+        self,
+        days: list[OptimizationInput],
+        config: RollingHorizonConfig | None = None,
+        profile: SolverProfile | None = None,
+    ):
+        self.days = days
+        self.config = config or RollingHorizonConfig()
+        self.profile = profile
+        self.rng = random.Random(self.config.seed)
+
+        self.day_of_item: dict[UUID, int] = {
+            s.item_id: idx for idx, day in enumerate(days) for s in day.services
+        }
+        self.services: dict[UUID, ServiceData] = {s.item_id: s for day in days for s in day.services}
+        self.preferred_staff: dict[UUID, UUID | None] = {
+            b.booking_id: b.preferred_staff_id for day in days for b in day.bookings
+        }
+
+        # Nghiệm hiện tại: item_id -> assignment (định dạng OptimizationResult.assigned_items)
+        self.assignments: dict[UUID, dict] = {}
+        self._stats: list[SolverStats] = []
+
+    # === Điểm cả tuần ===
+
+    def staff_loads(self, assignments: dict[UUID, dict]) -> dict[UUID, int]:
+        """Tổng phút được giao của từng staff."""
+        loads: dict[UUID, int] = {}
+        for item_id, assignment in assignments.items():
+            if assignment["staff_id"]:
+                service = self.services[item_id]
+                staff_id = UUID(assignment["staff_id"])
+                loads[staff_id] = loads.get(staff_id, 0) + service.duration + service.buffer_time
+        return loads
+
+    def score(self, assignments: dict[UUID, dict]) -> float:
+        """Điểm của một nghiệm cả tuần (xem docstring class)."""
+        weights = self.days[0].weights
+        slot = self.days[0].slot_minutes
+        total = weights.fairness * max(self.staff_loads(assignments).values(), default=0) / slot
+
+        for day in self.days:
+            base = day.time_window[0]
+            horizon = datetime_to_minutes(day.time_window[1], base) / slot
+            last_end = 0
+            for service in day.services:
+                assignment = assignments.get(service.item_id)
+                if not assignment:
+                    continue
+                last_end = max(last_end, datetime_to_minutes(assignment["scheduled_end"], base))
+                preferred = self.preferred_staff.get(service.booking_id)
+                if preferred and assignment["staff_id"] != str(preferred):
+                    total += weights.preference
+                if service.is_confirmed and service.current_start is not None and _moved(service, assignment):
+                    total += weights.perturbation * horizon
+            total += weights.idle_time * last_end / slot
+        return total
+
+    # === Giải ===
+
+    def solve(self) -> OptimizationResult:
+        """Rolling horizon tạo nghiệm ban đầu, sau đó LNS cải thiện tới hết thời gian."""
+        started = time.perf_counter()
+        deadline = started + self.config.time_budget_seconds
+
+        failure = self._solve_rolling_windows(deadline)
+        if failure:
+            return failure
+
+        initial = self.score(self.assignments)
+        accepted, tried = self._improve(deadline)
+        final = self.score(self.assignments)
+
+        return OptimizationResult(
+            success=True,
+            status="FEASIBLE",
+            message=(
+                f"Đã tối ưu {len(self.days)} ngày: LNS nhận {accepted}/{tried} neighborhood, "
+                f"điểm {initial:.0f} -> {final:.0f}."
+            ),
+            solve_time_ms=(time.perf_counter() - started) * 1000,
+            engine=OptimizerEngine.CP_SAT,
+            stats=merge_stats(self._stats),
+            assigned_items=list(self.assignments.values()),
+        )
+
+    def _solve_rolling_windows(self, deadline: float) -> OptimizationResult | None:
+        """Giải lần lượt các cửa sổ chồng lấn; trả về kết quả lỗi nếu một cửa sổ vô nghiệm."""
+        window_days, step = self.config.window_days, max(1, self.config.step_days)
+        starts = list(range(0, max(1, len(self.days) - window_days + step), step))
+        for position, start in enumerate(starts):
+            window = self.days[start:start + window_days]
+            is_last = position == len(starts) - 1
+            commit_days = set(range(start, len(self.days) if is_last else start + step))
+
+            # WHY: Nửa time budget dành cho rolling, chia đều cho các cửa sổ còn lại - phần còn lại cho LNS
+            share = (deadline - time.perf_counter()) / 2 / (len(starts) - position)
+            timeout = max(1, int(min(self.config.window_timeout_seconds, share)))
+
+            input_data = replace(merge_day_inputs(window), staff_load_offsets=self.staff_loads(self.assignments))
+            result = solve_optimization(input_data, timeout, profile=self.profile)
+            if result.stats:
+                self._stats.append(result.stats)
+            if not result.success:
+                day = self.days[start].time_window[0].date()
+                return result.model_copy(update={"message": f"Ngày {day}: {result.message}"})
+
+            for assignment in result.assigned_items:
+                item_id = UUID(assignment["item_id"])
+                if self.day_of_item[item_id] in commit_days:
+                    self.assignments[item_id] = assignment
+        return None
+
+    def _improve(self, deadline: float) -> tuple[int, int]:
+        """Vòng LNS; trả về (số neighborhood được nhận, số đã thử)."""
+        accepted = tried = 0
+        best = self.score(self.assignments)
+        for _ in range(self.config.lns_iterations):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            neighborhoods = self._neighborhoods()
+            if not neighborhoods:
+                break
+
+            day_idx, booking_ids = self.rng.choice(neighborhoods)
+            booking_ids = self._limit_neighborhood(day_idx, booking_ids)
+            timeout = max(1, min(self.config.lns_timeout_seconds, int(remaining)))
+            result = BookingOptimizer(self._sub_input(day_idx, booking_ids), timeout).solve()
+            tried += 1
+            if not result.success:
+                continue
+
+            candidate = dict(self.assignments)
+            candidate.update({UUID(a["item_id"]): a for a in result.assigned_items})
+            candidate_score = self.score(candidate)
+            # WHY: Nhận cả nghiệm bằng điểm để search đi qua được các vùng "phẳng"
+            if candidate_score <= best:
+                self.assignments, best = candidate, candidate_score
+                accepted += 1
+        return accepted, tried
+
+    def _neighborhoods(self) -> list[tuple[int, set[UUID]]]:
+        """(ngày, booking_ids): ngày làm việc của từng staff, và từng resource group trong ngày."""
+        by_key: dict[tuple[int, str, UUID], set[UUID]] = {}
+        for item_id, assignment in self.assignments.items():
+            day_idx = self.day_of_item[item_id]
+            service = self.services[item_id]
+            if assignment["staff_id"]:
+                by_key.setdefault((day_idx, "staff", UUID(assignment["staff_id"])), set()).add(service.booking_id)
+            for requirement in service.resource_requirements:
+                by_key.setdefault((day_idx, "group", requirement.group_id), set()).add(service.booking_id)
+        # WHY: Sort để cùng seed luôn chọn cùng chuỗi neighborhood
+        return [(key[0], by_key[key]) for key in sorted(by_key, key=str)]
+
+    def _limit_neighborhood(self, day_idx: int, booking_ids: set[UUID]) -> set[UUID]:
+        """Lấy mẫu booking để neighborhood không vượt max_neighborhood_items item."""
+        items_per_booking: dict[UUID, int] = {}
+        for service in self.days[day_idx].services:
+            if service.booking_id in booking_ids:
+                items_per_booking[service.booking_id] = items_per_booking.get(service.booking_id, 0) + 1
+
+        chosen, count = set(), 0
+        for booking_id in self.rng.sample(sorted(booking_ids, key=str), len(booking_ids)):
+            if count and count + items_per_booking[booking_id] > self.config.max_neighborhood_items:
+                continue
+            chosen.add(booking_id)
+            count += items_per_booking[booking_id]
+        return chosen
+
+    def _sub_input(self, day_idx: int, booking_ids: set[UUID]) -> OptimizationInput:
+        """
+        Model của neighborhood: chỉ các booking được nới, item còn lại của ngày chiếm
+        staff/resource như lịch cố định (xem repair.neighbourhood_input).
+        """
+        relaxed_items = {s.item_id for s in self.days[day_idx].services if s.booking_id in booking_ids}
+        outside = {item_id: a for item_id, a in self.assignments.items() if item_id not in relaxed_items}
+        return replace(
+            neighbourhood_input(self.days[day_idx], booking_ids, self.assignments),
+            staff_load_offsets=self.staff_loads(outside),
+        )
+
+
+def _moved(service: ServiceData, assignment: dict) -> bool:
+    """Item đã confirm bị dời giờ hoặc đổi staff/resource so với lịch đã lưu."""
+    if assignment["scheduled_start"] != service.current_start:
+        return True
+    if service.current_staff_id and assignment["staff_id"] != str(service.current_staff_id):
+        return True
+    if service.current_resource_usages:
+        saved = {str(rid) for rid, _, _ in service.current_resource_usages}
+        return set(assignment["resource_ids"]) != saved
+    return bool(service.current_resource_id) and assignment["resource_id"] != str(service.current_resource_id)
+
+
+def optimize_week(
+    days: list[OptimizationInput],
+    config: RollingHorizonConfig | None = None,
+    profile: SolverProfile | None = None,
+) -> OptimizationResult:
+    """Entry point cho ProcessPoolExecutor (xem engine.solve_optimization)."""
+    return WeekOptimizer(days, config, profile).solve()
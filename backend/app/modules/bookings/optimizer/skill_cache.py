@@ -0,0 +1,79 @@
+"""
+Skill Catalog Cache - Kỹ năng của staff và của dịch vụ, nạp một lần và dùng lại giữa các job.
+
+- Nạp toàn bộ StaffSkillLink + ServiceRequiredSkill bằng 2 query, thay cho query theo từng job
+- Invalidate: API tăng SKILLS_VERSION_KEY trên Redis mỗi khi kỹ năng của staff/dịch vụ
+  thay đổi (bump_skills_version); worker so version trước mỗi job
+- CACHE_TTL_SECONDS: lưới an toàn khi bump thất bại (Redis không kết nối được)
+
+WHY: Kỹ năng hiếm khi đổi nhưng mọi job optimize đều cần - cache ở process worker
+(không đi qua process giải) nên chỉ là 2 dict.
+"""
+import time
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.core.redis import bump_version, read_version
+from app.modules.services.link_models import ServiceRequiredSkill
+from app.modules.staff.link_models import StaffSkillLink
+
+SKILLS_VERSION_KEY = "optimizer:skills_version"
+CACHE_TTL_SECONDS = 300
+
+
+@dataclass(slots=True)
+class SkillCatalog:
+    """Kỹ năng theo staff và theo dịch vụ."""
+    staff_skills: dict[UUID, set[UUID]]
+    service_skills: dict[UUID, set[UUID]]
+
+    def skills_of_staff(self, staff_id: UUID) -> set[UUID]:
+        # WHY: Trả bản sao - input của solver không được dùng chung set với cache
+        return set(self.staff_skills.get(staff_id, ()))
+
+    def skills_of_service(self, service_id: UUID) -> set[UUID]:
+        return set(self.service_skills.get(service_id, ()))
+
+
+async def load_skill_catalog(session: AsyncSession) -> SkillCatalog:
+    """Nạp toàn bộ kỹ năng từ database."""
+    staff_skills: dict[UUID, set[UUID]] = {}
+    for link in (await session.execute(select(StaffSkillLink))).scalars().all():
+        staff_skills.setdefault(link.staff_id, set()).add(link.skill_id)
+
+    service_skills: dict[UUID, set[UUID]] = {}
+    for link in (await session.execute(select(ServiceRequiredSkill))).scalars().all():
+        service_skills.setdefault(link.service_id, set()).add(link.skill_id)
+
+    return SkillCatalog(staff_skills=staff_skills, service_skills=service_skills)
+
+
+class SkillCatalogCache:
+    """Cache SkillCatalog trong process worker, nạp lại khi version trên Redis đổi hoặc hết TTL."""
+
+    def __init__(self, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._catalog: SkillCatalog | None = None
+        self._version: bytes | None = None
+        self._loaded_at = 0.0
+
+    async def get(self, session: AsyncSession, redis=None) -> SkillCatalog:
+        """Catalog hiện tại; `redis` (ArqRedis của job) để đọc version."""
+        version = await read_version(redis, SKILLS_VERSION_KEY)
+        expired = time.monotonic() - self._loaded_at > self.ttl_seconds
+        if self._catalog is None or expired or version != self._version:
+            self._catalog = await load_skill_catalog(session)
+            self._version = version
+            self._loaded_at = time.monotonic()
+        return self._catalog
+
+    def invalidate(self):
+        self._catalog = None
+
+
+async def bump_skills_version():
+    """Báo cho worker biết kỹ năng đã thay đổi (gọi sau khi commit)."""
+    await bump_version(SKILLS_VERSION_KEY)
@@ -0,0 +1,75 @@
+"""
+Model Snapshot - Lưu CpModel đã dựng + OptimizationInput của một lần giải để tái hiện offline.
+
+- Bật bằng OPTIMIZER_SNAPSHOT_DIR; lưu khi solve chậm hơn OPTIMIZER_SNAPSHOT_MIN_SOLVE_MS
+  hoặc khi profile của job đặt capture_snapshot
+- Replay: python -m benchmarks.replay <file> (xem benchmarks/replay.py)
+
+WHY: Model được lưu ở dạng text proto (đúng model đã giải, kể cả hint) cùng với input
+(để dựng lại model bằng code hiện tại khi so sánh thay đổi của model builder).
+Input đi qua pickle giống ranh giới process pool.
+"""
+import gzip
+import pickle
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from ortools.sat.python import cp_model
+
+from app.modules.bookings.optimizer.params import SearchParameters
+from app.modules.bookings.optimizer.solver import OptimizationInput
+from app.modules.bookings.schemas import OptimizationResult
+
+SNAPSHOT_SUFFIX = ".snapshot.gz"
+
+
+@dataclass(slots=True)
+class ModelSnapshot:
+    """Một lần giải đã ghi lại."""
+    input: OptimizationInput
+    model_text: str  # CpModelProto dạng text format
+    search: SearchParameters
+    status: str
+    solve_time_ms: float | None
+    objective_value: float | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def load_model(self) -> cp_model.CpModel:
+        """CpModel đúng như lúc giải."""
+        model = cp_model.CpModel()
+        if not model.Proto().parse_text_format(self.model_text):
+            raise ValueError("Snapshot chứa CpModelProto không hợp lệ")
+        return model
+
+
+def save_snapshot(
+    directory: Path,
+    input_data: OptimizationInput,
+    model: cp_model.CpModel,
+    search: SearchParameters,
+    result: OptimizationResult,
+) -> Path:
+    """Ghi snapshot vào `directory`, trả về đường dẫn file."""
+    snapshot = ModelSnapshot(
+        input=input_data,
+        model_text=str(model.Proto()),
+        search=search,
+        status=result.status,
+        solve_time_ms=result.solve_time_ms,
+        objective_value=result.stats.objective_value if result.stats else None,
+    )
+    scope = input_data.booking_id or input_data.time_window[0].date().isoformat()
+    stamp = snapshot.created_at.strftime("%Y%m%dT%H%M%S%f")
+    path = directory / f"{stamp}_{input_data.mode.value.lower()}_{scope}{SNAPSHOT_SUFFIX}"
+
+    directory.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wb") as f:
+        pickle.dump(snapshot, f)
+    return path
+
+
+def load_snapshot(path: Path) -> ModelSnapshot:
+    """Đọc snapshot (chỉ dùng với file do hệ thống tự ghi - pickle không an toàn với input lạ)."""
+    with gzip.open(path, "rb") as f:
+        return pickle.load(f)
@@ -3,20 +3,62 @@ Booking Optimizer - OR-Tools CP-SAT Solver để tối ưu hóa phân bổ Staff
 
 Bài toán: Resource-Constrained Project Scheduling Problem (RCPSP)
 - Mỗi BookingItem là một Task cần được assign Staff + Resource
-- Constraints: No-overlap, Skill matching, Time windows
+- Resource chỉ bị chiếm trong sub-interval [start + start_delay, + usage_duration)
+- Constraints: No-overlap, Skill matching, Time windows, Cumulative (quantity > 1)
+- Symmetry breaking: staff/resource hoán đổi được cho nhau được dùng theo thứ tự cố định
 - Objective: Minimize Z = α·C_fair + β·C_pref + γ·C_idle + δ·C_perturb
+
+Mode:
+- BOOKING: Giải riêng một booking trong time_window của nó
+- DAY: Giải chung mọi booking trong ngày, dùng chung no-overlap cho staff/resource
 """
-from dataclasses import dataclass, field
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
-from typing import Sequence
+from pathlib import Path
 from uuid import UUID
 
+import numpy as np
 from ortools.sat.python import cp_model
 
-from app.modules.bookings.schemas import OptimizationResult, OptimizationWeights
+from app.core.config import settings
+from app.modules.bookings.optimizer.params import SearchParameters, derive_search_parameters
+from app.modules.bookings.schemas import (
+    OptimizationMode,
+    OptimizationResult,
+    OptimizationWeights,
+    OptimizerEngine,
+    SolverProfile,
+    SolverStats,
+)
 
+# Thời gian tối đa cho lần giải phụ tìm tập xung đột khi model vô nghiệm
+EXPLAIN_TIMEOUT_SECONDS = 2
 
-@dataclass
+# Giải theo tầng (profile.lexicographic): (tên, thành phần của Z, tỉ lệ thời gian còn lại).
+# δ đi cùng makespan - trong tổng có trọng số δ đã được nhân horizon để trội hơn γ·max_end
+LEXICOGRAPHIC_STAGES = (
+    ("feasibility", (), 0.2),
+    ("makespan", ("makespan", "perturbation"), 0.5),
+    ("preference", ("preference", "fairness"), 1.0),
+)
+
+# WHY: CpSolverResponse không có trường presolve time - đọc từ solve log
+_SEARCH_START_PATTERN = re.compile(r"Starting search at ([\d.]+)s")
+
+
+@dataclass(slots=True)
+class ResourceRequirement:
+    """Yêu cầu resource của dịch vụ (theo ServiceResourceRequirement)."""
+    group_id: UUID
+    quantity: int = 1
+    start_delay: int = 0  # Phút từ đầu dịch vụ
+    usage_duration: int | None = None  # None = dùng đến hết dịch vụ (kể cả buffer)
+
+
+@dataclass(slots=True)
 class ServiceData:
     """Dữ liệu dịch vụ cần thực hiện."""
     item_id: UUID
@@ -26,9 +68,44 @@ class ServiceData:
     required_skill_ids: set[UUID]
     required_resource_group_ids: set[UUID]
     sequence_order: int
+    booking_id: UUID | None = None  # Bắt buộc ở mode DAY để nhóm combo theo booking
 
+    # Phương án hiện tại (nếu đã được optimize trước đó) - dùng làm hint và tính δ
+    current_staff_id: UUID | None = None
+    current_resource_id: UUID | None = None
+    current_start: datetime | None = None
+    is_confirmed: bool = False  # True -> di chuyển item bị phạt δ·C_perturb
+    # Mọi resource đã lưu kèm khoảng sử dụng (resource_id, start, end) - trống với lịch cũ
+    current_resource_usages: list[tuple[UUID, datetime, datetime]] = field(default_factory=list)
 
-@dataclass
+    # Chi tiết yêu cầu resource; để trống = 1 resource mỗi group, dùng suốt dịch vụ
+    resource_requirements: list[ResourceRequirement] = field(default_factory=list)
+
+    def __post_init__(self):
+        if not self.resource_requirements:
+            # WHY: Sort để model build deterministic (set không có thứ tự ổn định)
+            self.resource_requirements = [
+                ResourceRequirement(group_id=gid) for gid in sorted(self.required_resource_group_ids, key=str)
+            ]
+        elif not self.required_resource_group_ids:
+            self.required_resource_group_ids = {r.group_id for r in self.resource_requirements}
+
+    def resource_usage(self, requirement: ResourceRequirement) -> tuple[int, int]:
+        """(offset, thời lượng) phút mà requirement chiếm resource, giới hạn trong item."""
+        total = self.duration + self.buffer_time
+        offset = min(max(0, requirement.start_delay), total)
+        if requirement.usage_duration is None:
+            return offset, total - offset
+        return offset, min(requirement.usage_duration, total - offset)
+
+    def current_resource_ids(self) -> list[UUID]:
+        """Mọi resource item đang giữ theo lịch đã lưu."""
+        if self.current_resource_usages:
+            return list(dict.fromkeys(rid for rid, _, _ in self.current_resource_usages))
+        return [self.current_resource_id] if self.current_resource_id else []
+
+
+@dataclass(slots=True)
 class StaffAvailability:
     """Thông tin khả dụng của nhân viên."""
     staff_id: UUID
@@ -36,7 +113,7 @@ class StaffAvailability:
     available_slots: list[tuple[datetime, datetime]]  # Các khoảng thời gian khả dụng
 
 
-@dataclass
+@dataclass(slots=True)
 class ResourceAvailability:
     """Thông tin khả dụng của tài nguyên."""
     resource_id: UUID
@@ -44,16 +121,29 @@ class ResourceAvailability:
     available_slots: list[tuple[datetime, datetime]]
 
 
+@dataclass(slots=True)
+class BookingWindow:
+    """Khung giờ mong muốn và staff ưu tiên của một booking (dùng ở mode DAY)."""
+    booking_id: UUID
+    time_window: tuple[datetime, datetime]
+    preferred_staff_id: UUID | None = None
+
+
 @dataclass
 class OptimizationInput:
     """Input cho solver."""
-    booking_id: UUID
+    booking_id: UUID | None  # None ở mode DAY
     services: list[ServiceData]
     available_staff: list[StaffAvailability]
     available_resources: list[ResourceAvailability]
-    time_window: tuple[datetime, datetime]  # Khung giờ mong muốn
+    time_window: tuple[datetime, datetime]  # Khung giờ mong muốn (mode DAY: cả ngày)
     preferred_staff_id: UUID | None = None
     weights: OptimizationWeights = field(default_factory=OptimizationWeights)
+    mode: OptimizationMode = OptimizationMode.BOOKING
+    bookings: list[BookingWindow] = field(default_factory=list)  # Chỉ dùng ở mode DAY
+    slot_minutes: int = 1  # Độ phân giải thời gian của model (5/10/15 phút giúp domain nhỏ hơn)
+    # Phút staff đã được giao ngoài model (các ngày khác trong tuần); khác None -> bật α cân bằng tải
+    staff_load_offsets: dict[UUID, int] | None = None
 
 
 @dataclass
@@ -66,17 +156,194 @@ class Assignment:
     scheduled_end: datetime
 
 
-def _datetime_to_minutes(dt: datetime, base: datetime) -> int:
+def datetime_to_minutes(dt: datetime, base: datetime) -> int:
     """Chuyển datetime thành số phút tính từ base."""
     delta = dt - base
     return int(delta.total_seconds() / 60)
 
 
-def _minutes_to_datetime(minutes: int, base: datetime) -> datetime:
+def minutes_to_datetime(minutes: int, base: datetime) -> datetime:
     """Chuyển số phút thành datetime."""
     return base + timedelta(minutes=minutes)
 
 
+def blocked_ranges(
+    slots: list[tuple[datetime, datetime]], base: datetime, horizon: int
+) -> list[tuple[int, int]]:
+    """Phần bù của các slot khả dụng trong [0, horizon] - các khoảng KHÔNG được dùng."""
+    available = sorted(
+        (max(0, datetime_to_minutes(s, base)), min(horizon, datetime_to_minutes(e, base)))
+        for s, e in slots
+    )
+    blocked = []
+    cursor = 0
+    for start, end in available:
+        if start > cursor:
+            blocked.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < horizon:
+        blocked.append((cursor, horizon))
+    return blocked
+
+
+def subtract_intervals(
+    slots: list[tuple[datetime, datetime]], busy: list[tuple[datetime, datetime]]
+) -> list[tuple[datetime, datetime]]:
+    """Trừ các khoảng bận khỏi danh sách slot khả dụng."""
+    result = []
+    busy = sorted(busy)
+    for slot_start, slot_end in slots:
+        cursor = slot_start
+        for busy_start, busy_end in busy:
+            if busy_end <= cursor or busy_start >= slot_end:
+                continue
+            if busy_start > cursor:
+                result.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if cursor < slot_end:
+            result.append((cursor, slot_end))
+    return result
+
+
+def booking_key(input_data: OptimizationInput, service: ServiceData) -> UUID | None:
+    """Booking chứa service (mode BOOKING: luôn là input.booking_id)."""
+    if input_data.mode == OptimizationMode.DAY:
+        return service.booking_id
+    return input_data.booking_id
+
+
+def booking_windows(
+    input_data: OptimizationInput, base_time: datetime, horizon: int
+) -> tuple[dict[UUID | None, tuple[int, int]], dict[UUID | None, UUID | None]]:
+    """Khung giờ (offset phút trong horizon) và staff ưu tiên theo từng booking."""
+    windows: dict[UUID | None, tuple[int, int]] = {}
+    preferred: dict[UUID | None, UUID | None] = {}
+    if input_data.mode == OptimizationMode.DAY:
+        for booking in input_data.bookings:
+            start, end = booking.time_window
+            windows[booking.booking_id] = (
+                max(0, datetime_to_minutes(start, base_time)),
+                min(horizon, datetime_to_minutes(end, base_time)),
+            )
+            preferred[booking.booking_id] = booking.preferred_staff_id
+    else:
+        windows[input_data.booking_id] = (0, horizon)
+        preferred[input_data.booking_id] = input_data.preferred_staff_id
+    return windows, preferred
+
+
+def skill_eligibility(required: np.ndarray, owned: np.ndarray) -> np.ndarray:
+    """
+    Ma trận eligibility (N service × S staff) từ required (N × K skill) và owned (S × K skill).
+
+    Một phép nhân ma trận: đếm số skill yêu cầu mà staff không có - eligible khi bằng 0.
+    """
+    missing = required.astype(np.int32) @ (~owned).T.astype(np.int32)
+    return missing == 0
+
+
+class EligibilityIndex:
+    """
+    Index tra cứu eligibility: ma trận service × staff, group -> resources.
+
+    WHY: Dựng một lần cho mỗi input, dùng chung cho CP-SAT, greedy, pre-check và
+    decomposition. Kỹ năng được mã hóa thành ma trận boolean nên eligibility của mọi
+    service trong input là một phép toán vector hóa, thay vì set.issubset cho từng
+    cặp service × staff.
+    """
+
+    def __init__(
+        self,
+        staff: list[StaffAvailability],
+        resources: list[ResourceAvailability],
+        services: list[ServiceData] | None = None,
+    ):
+        self._all_staff_ids: list[UUID] = [member.staff_id for member in staff]
+        self._skill_columns: dict[UUID, int] = {}
+        for member in staff:
+            for skill_id in member.skill_ids:
+                self._skill_columns.setdefault(skill_id, len(self._skill_columns))
+
+        self._staff_skills = np.zeros((len(staff), len(self._skill_columns)), dtype=bool)
+        for row, member in enumerate(staff):
+            self._staff_skills[row, [self._skill_columns[k] for k in member.skill_ids]] = True
+
+        self._resources_by_group: dict[UUID, list[UUID]] = {}
+        for resource in resources:
+            self._resources_by_group.setdefault(resource.group_id, []).append(resource.resource_id)
+
+        self._eligible_rows: dict[UUID, np.ndarray] = {}
+        if services:
+            self._index_services(services)
+
+    def _index_services(self, services: list[ServiceData]):
+        """Tính eligibility của nhiều service cùng lúc (một phép toán cho cả danh sách)."""
+        required = np.zeros((len(services), len(self._skill_columns)), dtype=bool)
+        # WHY: Skill không staff nào có -> không có cột trong ma trận, service không ai làm được
+        unmatched = np.zeros(len(services), dtype=bool)
+        for row, service in enumerate(services):
+            for skill_id in service.required_skill_ids:
+                column = self._skill_columns.get(skill_id)
+                if column is None:
+                    unmatched[row] = True
+                else:
+                    required[row, column] = True
+
+        eligible = skill_eligibility(required, self._staff_skills) & ~unmatched[:, None]
+        for row, service in enumerate(services):
+            self._eligible_rows[service.item_id] = eligible[row]
+
+    def staff_for(self, service: ServiceData) -> list[UUID]:
+        """Staff có đủ TẤT CẢ kỹ năng service yêu cầu (theo thứ tự input)."""
+        if service.item_id not in self._eligible_rows:
+            self._index_services([service])
+        return [self._all_staff_ids[i] for i in np.flatnonzero(self._eligible_rows[service.item_id])]
+
+    def resources_for(self, service: ServiceData) -> list[UUID]:
+        """Lọc resources thuộc group yêu cầu."""
+        eligible = []
+        for group_id in service.required_resource_group_ids:
+            eligible.extend(self._resources_by_group.get(group_id, []))
+        return eligible
+
+    def staff_with_skill(self, skill_id: UUID) -> set[UUID]:
+        """Staff có một kỹ năng."""
+        column = self._skill_columns.get(skill_id)
+        if column is None:
+            return set()
+        return {self._all_staff_ids[i] for i in np.flatnonzero(self._staff_skills[:, column])}
+
+    def resources_in_group(self, group_id: UUID) -> list[UUID]:
+        """Resources thuộc một group (theo thứ tự input)."""
+        return list(self._resources_by_group.get(group_id, []))
+
+
+class _ImprovingSolutionCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Gọi `on_solution` với mỗi nghiệm tốt hơn mà CP-SAT tìm được trong lúc vẫn tiếp tục search.
+
+    WHY: CP-SAT chỉ gọi callback khi objective cải thiện, nên mỗi lần gọi là một
+    phương án tốt hơn phương án đã publish trước đó.
+    """
+
+    def __init__(self, optimizer: "BookingOptimizer", on_solution: Callable[[OptimizationResult], None]):
+        super().__init__()
+        self._optimizer = optimizer
+        self._on_solution = on_solution
+        self.solution_count = 0
+
+    def on_solution_callback(self):
+        self.solution_count += 1
+        self._on_solution(OptimizationResult(
+            success=True,
+            status="FEASIBLE",
+            message=f"Phương án tạm thời #{self.solution_count}, solver vẫn đang cải thiện.",
+            solve_time_ms=self.WallTime() * 1000,
+            engine=OptimizerEngine.CP_SAT,
+            assigned_items=self._optimizer._extract_assignments(self),
+        ))
+
+
 class BookingOptimizer:
     """
     OR-Tools CP-SAT Solver cho booking optimization.
@@ -84,53 +351,128 @@ class BookingOptimizer:
     Workflow:
     1. Nhận input (services, staff availability, resource availability)
     2. Tạo model với interval variables cho mỗi task
-    3. Thêm constraints (no-overlap, skill matching)
+    3. Thêm constraints (no-overlap, skill matching, availability, sequence)
     4. Định nghĩa objective function
     5. Solve và trả về kết quả
     """
 
-    def __init__(self, input_data: OptimizationInput, timeout_seconds: int = 30):
+    def __init__(
+        self,
+        input_data: OptimizationInput,
+        timeout_seconds: int = 30,
+        explain: bool = False,
+        profile: SolverProfile | None = None,
+    ):
         self.input = input_data
         self.timeout = timeout_seconds
+        self.profile = profile
         self.model = cp_model.CpModel()
+        self._built = False
+
+        # WHY: Mode explain - khung giờ booking và lịch staff/resource được gắn assumption
+        # literal, bỏ objective, để CP-SAT trả về tập ràng buộc gây xung đột
+        self.explain = explain
+        self._assumption_labels: dict[int, str] = {}
+        self._booking_literals: dict[UUID | None, cp_model.IntVar] = {}
+        self._objectives: dict[str, cp_model.LinearExpr] = {}
 
         # WHY: Dùng thời điểm bắt đầu của time_window làm base để tính offset
         self.base_time = input_data.time_window[0]
-        self.horizon = _datetime_to_minutes(input_data.time_window[1], self.base_time)
+        self.horizon = datetime_to_minutes(input_data.time_window[1], self.base_time)
+
+        # WHY: Model làm việc theo đơn vị slot (slot_minutes phút) - domain của
+        # mọi biến thời gian nhỏ đi slot_minutes lần so với độ phân giải phút
+        self.slot = max(1, input_data.slot_minutes)
+        self.horizon_units = self.horizon // self.slot
 
         # Variables storage
         self.task_starts: dict[UUID, cp_model.IntVar] = {}
         self.task_ends: dict[UUID, cp_model.IntVar] = {}
         self.task_intervals: dict[UUID, cp_model.IntervalVar] = {}
+        self._start_bounds: dict[UUID, tuple[int, int]] = {}
         self.staff_assignments: dict[tuple[UUID, UUID], cp_model.IntVar] = {}  # (item_id, staff_id) -> bool
         self.resource_assignments: dict[tuple[UUID, UUID], cp_model.IntVar] = {}  # (item_id, resource_id) -> bool
 
-    def _filter_eligible_staff(self, service: ServiceData) -> list[StaffAvailability]:
-        """Lọc staff có đủ kỹ năng cho service."""
-        eligible = []
-        for staff in self.input.available_staff:
-            # WHY: Hard constraint - staff phải có TẤT CẢ kỹ năng yêu cầu
-            if service.required_skill_ids.issubset(staff.skill_ids):
-                eligible.append(staff)
-        return eligible
+        # WHY: Index lists để mỗi bước build/extract chỉ duyệt phần liên quan,
+        # tránh quét toàn bộ dict assignments cho từng item (O(items² × staff))
+        self.item_staff_vars: dict[UUID, list[tuple[UUID, cp_model.IntVar]]] = {}
+        self.item_resource_vars: dict[UUID, list[tuple[UUID, cp_model.IntVar]]] = {}
+        self.staff_intervals: dict[UUID, list[cp_model.IntervalVar]] = {}
+        self.resource_intervals: dict[UUID, list[cp_model.IntervalVar]] = {}
+        # Biến assign theo từng requirement của item, và (sub-interval, quantity) theo group
+        self.item_requirement_vars: dict[UUID, list[tuple[ResourceRequirement, list[tuple[UUID, cp_model.IntVar]]]]] = {}
+        self.group_demands: dict[UUID, list[tuple[cp_model.IntervalVar, int]]] = {}
 
-    def _filter_eligible_resources(self, service: ServiceData) -> list[ResourceAvailability]:
-        """Lọc resources thuộc group yêu cầu."""
-        eligible = []
-        for resource in self.input.available_resources:
-            if resource.group_id in service.required_resource_group_ids:
-                eligible.append(resource)
-        return eligible
+        self.eligibility = EligibilityIndex(
+            input_data.available_staff, input_data.available_resources, input_data.services
+        )
+
+        # Khung giờ (phút) và staff ưu tiên theo booking
+        self._booking_windows, self._preferred_staff = booking_windows(
+            input_data, self.base_time, self.horizon
+        )
+
+    def _booking_key(self, service: ServiceData) -> UUID | None:
+        """Booking chứa service (mode BOOKING: luôn là input.booking_id)."""
+        return booking_key(self.input, service)
+
+    def _to_units(self, minutes: int, round_up: bool = False) -> int:
+        """Đổi phút sang số slot (làm tròn xuống, hoặc lên nếu round_up)."""
+        if round_up:
+            return -(-minutes // self.slot)
+        return minutes // self.slot
+
+    def _duration_units(self, service: ServiceData) -> int:
+        """Số slot item chiếm giữ (dịch vụ + buffer), làm tròn lên."""
+        return self._to_units(service.duration + service.buffer_time, round_up=True)
+
+    def _assumption(self, label: str) -> cp_model.IntVar:
+        """Tạo assumption literal (mode explain) kèm mô tả để báo lý do xung đột."""
+        literal = self.model.NewBoolVar(f"assume_{len(self._assumption_labels)}")
+        self.model.AddAssumption(literal)
+        self._assumption_labels[literal.Index()] = label
+        return literal
+
+    def _booking_literal(self, key: UUID | None) -> cp_model.IntVar:
+        """Assumption "booking nằm trong khung giờ mong muốn" (tạo một lần mỗi booking)."""
+        if key not in self._booking_literals:
+            self._booking_literals[key] = self._assumption(f"khung giờ của booking {key}")
+        return self._booking_literals[key]
+
+    def _usage_units(self, service: ServiceData, requirement: ResourceRequirement) -> tuple[int, int]:
+        """(offset, thời lượng) theo slot của sub-interval - mở rộng ra biên slot."""
+        offset, length = service.resource_usage(requirement)
+        offset_units = self._to_units(offset)
+        return offset_units, self._to_units(offset + length, round_up=True) - offset_units
 
     def _create_variables(self):
-        """Tạo biến cho mỗi task."""
+        """
+        Tạo biến cho mỗi task, kèm optional interval theo từng staff/resource.
+
+        WHY: Tạo optional interval ngay khi tạo biến assign và đẩy vào index
+        theo staff/resource, để bước no-overlap không phải duyệt staff × services.
+        """
         for service in self.input.services:
             item_id = service.item_id
-            duration = service.duration + service.buffer_time
+            duration = self._duration_units(service)
+            window_start, window_end = self._booking_windows.get(
+                self._booking_key(service), (0, self.horizon)
+            )
+            window_start = self._to_units(window_start, round_up=True)
+            window_end = self._to_units(window_end)
 
-            # Start, End, Interval variables
-            start = self.model.NewIntVar(0, self.horizon - duration, f"start_{item_id}")
-            end = self.model.NewIntVar(duration, self.horizon, f"end_{item_id}")
+            # Start, End, Interval variables - giới hạn trong khung giờ của booking
+            if self.explain:
+                # Khung giờ là ràng buộc có điều kiện thay vì domain để có thể bị "nới"
+                start = self.model.NewIntVar(0, self.horizon_units - duration, f"start_{item_id}")
+                end = self.model.NewIntVar(duration, self.horizon_units, f"end_{item_id}")
+                literal = self._booking_literal(self._booking_key(service))
+                self.model.Add(start >= window_start).OnlyEnforceIf(literal)
+                self.model.Add(end <= window_end).OnlyEnforceIf(literal)
+            else:
+                self._start_bounds[item_id] = (window_start, window_end - duration)
+                start = self.model.NewIntVar(window_start, window_end - duration, f"start_{item_id}")
+                end = self.model.NewIntVar(window_start + duration, window_end, f"end_{item_id}")
             interval = self.model.NewIntervalVar(start, duration, end, f"interval_{item_id}")
 
             self.task_starts[item_id] = start
@@ -138,16 +480,50 @@ class BookingOptimizer:
             self.task_intervals[item_id] = interval
 
             # Staff assignment variables
-            eligible_staff = self._filter_eligible_staff(service)
-            for staff in eligible_staff:
-                var = self.model.NewBoolVar(f"assign_{item_id}_{staff.staff_id}")
-                self.staff_assignments[(item_id, staff.staff_id)] = var
+            staff_vars = self.item_staff_vars.setdefault(item_id, [])
+            for staff_id in self.eligibility.staff_for(service):
+                var = self.model.NewBoolVar(f"assign_{item_id}_{staff_id}")
+                self.staff_assignments[(item_id, staff_id)] = var
+                staff_vars.append((staff_id, var))
+
+                # WHY: Optional interval - chỉ active khi staff được assign
+                self.staff_intervals.setdefault(staff_id, []).append(
+                    self.model.NewOptionalIntervalVar(
+                        start, duration, end, var, f"opt_staff_{item_id}_{staff_id}"
+                    )
+                )
+
+            # Resource assignment variables - theo từng requirement, trên sub-interval
+            resource_vars = self.item_resource_vars.setdefault(item_id, [])
+            requirement_vars = self.item_requirement_vars.setdefault(item_id, [])
+            for requirement in service.resource_requirements:
+                offset, length = self._usage_units(service, requirement)
+                if length <= 0:
+                    continue
+                # WHY: Affine expression trên start - không cần thêm biến cho sub-interval
+                usage_start = start + offset
+                usage_end = start + offset + length
 
-            # Resource assignment variables
-            eligible_resources = self._filter_eligible_resources(service)
-            for resource in eligible_resources:
-                var = self.model.NewBoolVar(f"resource_{item_id}_{resource.resource_id}")
-                self.resource_assignments[(item_id, resource.resource_id)] = var
+                candidates = []
+                for resource_id in self.eligibility.resources_in_group(requirement.group_id):
+                    var = self.model.NewBoolVar(f"resource_{item_id}_{resource_id}")
+                    self.resource_assignments[(item_id, resource_id)] = var
+                    candidates.append((resource_id, var))
+
+                    self.resource_intervals.setdefault(resource_id, []).append(
+                        self.model.NewOptionalIntervalVar(
+                            usage_start, length, usage_end, var, f"opt_resource_{item_id}_{resource_id}"
+                        )
+                    )
+                resource_vars.extend(candidates)
+                requirement_vars.append((requirement, candidates))
+
+                self.group_demands.setdefault(requirement.group_id, []).append((
+                    self.model.NewIntervalVar(
+                        usage_start, length, usage_end, f"usage_{item_id}_{requirement.group_id}"
+                    ),
+                    requirement.quantity,
+                ))
 
     def _add_assignment_constraints(self):
         """Mỗi task phải được assign đúng 1 staff và 1 resource (nếu cần)."""
@@ -155,147 +531,425 @@ class BookingOptimizer:
             item_id = service.item_id
 
             # Exactly one staff
-            staff_vars = [
-                var for (iid, sid), var in self.staff_assignments.items()
-                if iid == item_id
-            ]
+            staff_vars = self.item_staff_vars.get(item_id)
             if staff_vars:
-                self.model.AddExactlyOne(staff_vars)
+                self.model.AddExactlyOne([var for _, var in staff_vars])
 
-            # Exactly one resource (nếu service yêu cầu)
-            if service.required_resource_group_ids:
-                resource_vars = [
-                    var for (iid, rid), var in self.resource_assignments.items()
-                    if iid == item_id
-                ]
-                if resource_vars:
-                    self.model.AddExactlyOne(resource_vars)
+            # Đúng quantity resource cho mỗi requirement
+            for requirement, candidates in self.item_requirement_vars.get(item_id, []):
+                if requirement.quantity == 1 and candidates:
+                    self.model.AddExactlyOne([var for _, var in candidates])
+                else:
+                    self.model.Add(sum(var for _, var in candidates) == requirement.quantity)
 
     def _add_no_overlap_constraints(self):
         """Staff và Resource không thể phục vụ 2 task cùng lúc."""
-        # No-overlap cho mỗi staff
-        for staff in self.input.available_staff:
-            staff_id = staff.staff_id
-            intervals = []
-
-            for service in self.input.services:
-                item_id = service.item_id
-                key = (item_id, staff_id)
-
-                if key in self.staff_assignments:
-                    # WHY: Tạo optional interval - chỉ active khi staff được assign
-                    optional_interval = self.model.NewOptionalIntervalVar(
-                        self.task_starts[item_id],
-                        service.duration + service.buffer_time,
-                        self.task_ends[item_id],
-                        self.staff_assignments[key],
-                        f"opt_staff_{item_id}_{staff_id}"
-                    )
-                    intervals.append(optional_interval)
+        # WHY: Optional intervals đã được gom theo staff/resource khi tạo biến
+        for intervals in self.staff_intervals.values():
+            if len(intervals) > 1:
+                self.model.AddNoOverlap(intervals)
 
-            if intervals:
+        for intervals in self.resource_intervals.values():
+            if len(intervals) > 1:
                 self.model.AddNoOverlap(intervals)
 
-        # No-overlap cho mỗi resource
+        # WHY: Cumulative theo group là ràng buộc dư thừa (no-overlap từng resource đã đủ),
+        # nhưng giúp propagate mạnh hơn khi item cần nhiều resource cùng lúc (quantity > 1)
+        for group_id, demands in self.group_demands.items():
+            if any(quantity > 1 for _, quantity in demands):
+                self.model.AddCumulative(
+                    [interval for interval, _ in demands],
+                    [quantity for _, quantity in demands],
+                    len(self.eligibility.resources_in_group(group_id)),
+                )
+
+    def _add_availability_constraints(self):
+        """
+        Staff/Resource chỉ được dùng trong các slot khả dụng.
+
+        WHY: Thêm các khoảng bị chặn dưới dạng fixed interval vào chính
+        no-overlap của staff/resource, thay vì ràng buộc từng cặp item × slot.
+        """
+        for staff in self.input.available_staff:
+            intervals = self.staff_intervals.get(staff.staff_id)
+            if not intervals:
+                continue
+            blocked = self._blocked_units(staff.available_slots)
+            literal = self._assumption(f"lịch làm việc của nhân viên {staff.staff_id}") if self.explain and blocked else None
+            for start, end in blocked:
+                intervals.append(self._blocked_interval(start, end, literal, f"blocked_staff_{staff.staff_id}_{start}"))
+
         for resource in self.input.available_resources:
-            resource_id = resource.resource_id
-            intervals = []
-
-            for service in self.input.services:
-                item_id = service.item_id
-                key = (item_id, resource_id)
-
-                if key in self.resource_assignments:
-                    optional_interval = self.model.NewOptionalIntervalVar(
-                        self.task_starts[item_id],
-                        service.duration + service.buffer_time,
-                        self.task_ends[item_id],
-                        self.resource_assignments[key],
-                        f"opt_resource_{item_id}_{resource_id}"
-                    )
-                    intervals.append(optional_interval)
+            intervals = self.resource_intervals.get(resource.resource_id)
+            if not intervals:
+                continue
+            blocked = self._blocked_units(resource.available_slots)
+            literal = (
+                self._assumption(f"lịch khả dụng của tài nguyên {resource.resource_id}") if self.explain and blocked else None
+            )
+            for start, end in blocked:
+                intervals.append(
+                    self._blocked_interval(start, end, literal, f"blocked_resource_{resource.resource_id}_{start}")
+                )
 
-            if intervals:
-                self.model.AddNoOverlap(intervals)
+    def _blocked_interval(
+        self, start: int, end: int, literal: cp_model.IntVar | None, name: str
+    ) -> cp_model.IntervalVar:
+        """Khoảng bị chặn cố định; optional theo assumption literal ở mode explain."""
+        if literal is None:
+            return self.model.NewFixedSizeIntervalVar(start, end - start, name)
+        return self.model.NewOptionalFixedSizeIntervalVar(start, end - start, literal, name)
+
+    def _blocked_units(self, slots: list[tuple[datetime, datetime]]) -> list[tuple[int, int]]:
+        """Khoảng bị chặn theo slot - mở rộng ra biên slot để không lấn vào giờ bận."""
+        return [
+            (self._to_units(start), self._to_units(end, round_up=True))
+            for start, end in blocked_ranges(slots, self.base_time, self.horizon)
+        ]
+
+    def _add_symmetry_breaking(self):
+        """
+        Phá đối xứng giữa các staff/resource hoán đổi được cho nhau.
+
+        - Resource: cùng ResourceGroup + cùng khoảng bị chặn
+        - Staff: cùng tập kỹ năng + cùng khoảng bị chặn + cùng tải nền (α)
+
+        WHY: Với k giường giống hệt nhau, mỗi nghiệm có k! hoán vị tương đương -
+        solver phải duyệt hết mới chứng minh được tối ưu. Bỏ qua staff/resource
+        có vai trò riêng trong objective/hint (staff ưu tiên, phương án hiện tại).
+        """
+        pinned = {sid for sid in self._preferred_staff.values() if sid}
+        for service in self.input.services:
+            pinned.update(service.current_resource_ids())
+            if service.current_staff_id:
+                pinned.add(service.current_staff_id)
+
+        staff_classes: dict[tuple, list[UUID]] = {}
+        for staff in self.input.available_staff:
+            if staff.staff_id in pinned or staff.staff_id not in self.staff_intervals:
+                continue
+            signature = (
+                frozenset(staff.skill_ids),
+                tuple(self._blocked_units(staff.available_slots)),
+                self._staff_load_offset(staff.staff_id),
+            )
+            staff_classes.setdefault(signature, []).append(staff.staff_id)
+
+        resource_classes: dict[tuple, list[UUID]] = {}
+        for resource in self.input.available_resources:
+            if resource.resource_id in pinned or resource.resource_id not in self.resource_intervals:
+                continue
+            signature = (resource.group_id, tuple(self._blocked_units(resource.available_slots)))
+            resource_classes.setdefault(signature, []).append(resource.resource_id)
+
+        for members in staff_classes.values():
+            if len(members) > 1:
+                self._add_value_precedence(members, self.staff_assignments, {})
+        quantities = {
+            (item_id, resource_id): requirement.quantity
+            for item_id, requirements in self.item_requirement_vars.items()
+            for requirement, candidates in requirements
+            for resource_id, _ in candidates
+        }
+        for members in resource_classes.values():
+            if len(members) > 1:
+                self._add_value_precedence(members, self.resource_assignments, quantities)
+
+    def _add_value_precedence(
+        self,
+        members: list[UUID],
+        assignments: dict[tuple[UUID, UUID], cp_model.IntVar],
+        quantities: dict[tuple[UUID, UUID], int],
+    ):
+        """
+        Value precedence: members[m] chỉ được dùng khi members[m-1] đã được một item
+        trước đó dùng, hoặc được chính item này dùng (item cần quantity > 1).
+
+        WHY: Mọi item eligible với một member thì eligible với cả lớp, nên hoán vị
+        bất kỳ nghiệm nào về dạng chuẩn này mà không đổi objective.
+        """
+        items = [s.item_id for s in self.input.services if (s.item_id, members[0]) in assignments]
+        # used_before[m]: literal "members[m] đã được item đứng trước dùng" (None = chưa thể)
+        used_before: list[cp_model.IntVar | None] = [None] * len(members)
+        reachable = 0
+
+        for position, item_id in enumerate(items):
+            item_vars = [assignments[(item_id, member)] for member in members]
+            for m in range(1, len(members)):
+                if used_before[m - 1] is None:
+                    self.model.AddImplication(item_vars[m], item_vars[m - 1])
+                else:
+                    self.model.AddBoolOr([used_before[m - 1], item_vars[m - 1]]).OnlyEnforceIf(item_vars[m])
+
+            if position == len(items) - 1:
+                break
+            # WHY: Các item đến vị trí p chỉ dùng được members[0..tổng quantity) -
+            # không cần biến cho phần còn lại
+            reachable = min(reachable + quantities.get((item_id, members[0]), 1), len(members))
+            for m in range(reachable):
+                if used_before[m] is None:
+                    used_before[m] = item_vars[m]
+                else:
+                    used = self.model.NewBoolVar(f"sym_used_{members[m]}_{position}")
+                    self.model.AddMaxEquality(used, [used_before[m], item_vars[m]])
+                    used_before[m] = used
 
     def _add_sequence_constraints(self):
         """Các task trong cùng booking phải theo thứ tự."""
-        sorted_services = sorted(self.input.services, key=lambda s: s.sequence_order)
+        services_by_booking: dict[UUID | None, list[ServiceData]] = {}
+        for service in self.input.services:
+            services_by_booking.setdefault(self._booking_key(service), []).append(service)
 
-        for i in range(len(sorted_services) - 1):
-            current = sorted_services[i]
-            next_svc = sorted_services[i + 1]
+        for services in services_by_booking.values():
+            sorted_services = sorted(services, key=lambda s: s.sequence_order)
 
-            # WHY: Task sau phải bắt đầu sau khi task trước kết thúc
-            self.model.Add(
-                self.task_starts[next_svc.item_id] >= self.task_ends[current.item_id]
-            )
+            for current, next_svc in zip(sorted_services, sorted_services[1:]):
+                # WHY: Task sau phải bắt đầu sau khi task trước kết thúc
+                self.model.Add(
+                    self.task_starts[next_svc.item_id] >= self.task_ends[current.item_id]
+                )
 
     def _add_objective(self):
-        """Định nghĩa hàm mục tiêu."""
+        """Định nghĩa hàm mục tiêu: tổng có trọng số của các thành phần."""
+        self._objectives = self._objective_terms()
+        if self._objectives:
+            self.model.Minimize(sum(self._objectives.values()))
+
+    def _objective_terms(self) -> dict[str, cp_model.LinearExpr]:
+        """Các thành phần của Z (đã nhân trọng số) theo tên - bỏ qua thành phần rỗng."""
         weights = self.input.weights
-        objectives = []
-
-        # β - Preference: Ưu tiên staff khách yêu cầu
-        if self.input.preferred_staff_id:
-            preference_penalties = []
-            for service in self.input.services:
-                item_id = service.item_id
-                key = (item_id, self.input.preferred_staff_id)
-
-                if key in self.staff_assignments:
-                    # WHY: Penalty = 0 nếu được preferred staff, = 1 nếu không
-                    not_preferred = self.model.NewBoolVar(f"not_pref_{item_id}")
-                    self.model.Add(not_preferred == 1).OnlyEnforceIf(
-                        self.staff_assignments[key].Not()
-                    )
-                    self.model.Add(not_preferred == 0).OnlyEnforceIf(
-                        self.staff_assignments[key]
-                    )
-                    preference_penalties.append(not_preferred)
+        objectives = {}
+
+        # β - Preference: Ưu tiên staff khách yêu cầu (theo từng booking)
+        preference_penalties = []
+        for service in self.input.services:
+            preferred_staff_id = self._preferred_staff.get(self._booking_key(service))
+            if not preferred_staff_id:
+                continue
+
+            item_id = service.item_id
+            key = (item_id, preferred_staff_id)
+            if key in self.staff_assignments:
+                # WHY: Penalty = 0 nếu được preferred staff, = 1 nếu không
+                not_preferred = self.model.NewBoolVar(f"not_pref_{item_id}")
+                self.model.Add(not_preferred == 1).OnlyEnforceIf(
+                    self.staff_assignments[key].Not()
+                )
+                self.model.Add(not_preferred == 0).OnlyEnforceIf(
+                    self.staff_assignments[key]
+                )
+                preference_penalties.append(not_preferred)
+
+        if preference_penalties:
+            objectives["preference"] = weights.preference * sum(preference_penalties)
 
-            if preference_penalties:
-                objectives.append(weights.preference * sum(preference_penalties))
+        # α - Fairness: Cân bằng tải staff (chỉ khi có tải nền ngoài model - mode WEEK)
+        if self.input.staff_load_offsets is not None and weights.fairness:
+            objectives["fairness"] = weights.fairness * self._max_staff_load()
+
+        # δ - Perturbation: Hạn chế xáo trộn các item đã confirm
+        perturbation_penalties = self._perturbation_penalties()
+        if perturbation_penalties:
+            objectives["perturbation"] = weights.perturbation * sum(perturbation_penalties)
 
         # Minimize total end time (proxy cho idle time)
         if self.input.services:
-            max_end = self.model.NewIntVar(0, self.horizon, "max_end")
+            max_end = self.model.NewIntVar(0, self.horizon_units, "max_end")
             self.model.AddMaxEquality(
                 max_end,
                 [self.task_ends[s.item_id] for s in self.input.services]
             )
-            objectives.append(weights.idle_time * max_end)
+            objectives["makespan"] = weights.idle_time * max_end
 
-        if objectives:
-            self.model.Minimize(sum(objectives))
+        return objectives
 
-    def solve(self) -> OptimizationResult:
-        """Chạy solver và trả về kết quả."""
-        # Build model
-        self._create_variables()
+    def _staff_load_offset(self, staff_id: UUID) -> int:
+        """Tải nền (slot) của staff - phút đã giao ở các ngày/item ngoài model."""
+        offsets = self.input.staff_load_offsets or {}
+        return self._to_units(offsets.get(staff_id, 0))
+
+    def _max_staff_load(self) -> cp_model.IntVar:
+        """
+        Tải lớn nhất (slot) trong số staff: tải nền + thời lượng các item được giao.
 
-        # Check feasibility: Mỗi service phải có ít nhất 1 staff eligible
+        WHY: Minimize max thay vì phương sai - tuyến tính, và đủ để kéo việc
+        khỏi staff đã làm nhiều trong tuần khi có staff khác rảnh.
+        """
+        durations = {s.item_id: self._duration_units(s) for s in self.input.services}
+        assigned: dict[UUID, list] = {}
+        for (item_id, staff_id), var in self.staff_assignments.items():
+            assigned.setdefault(staff_id, []).append(durations[item_id] * var)
+
+        offsets = {s.staff_id: self._staff_load_offset(s.staff_id) for s in self.input.available_staff}
+        upper = max(offsets.values(), default=0) + sum(durations.values())
+        max_load = self.model.NewIntVar(0, upper, "max_staff_load")
+        for staff_id, offset in offsets.items():
+            self.model.Add(max_load >= offset + sum(assigned.get(staff_id, [])))
+        return max_load
+
+    def _perturbation_penalties(self) -> list:
+        """
+        C_perturb = số item đã confirm bị dời giờ hoặc đổi staff/resource.
+
+        WHY: Mỗi item bị xáo trộn phạt theo horizon (slot) để cùng thang đo với
+        γ·max_end - chỉ dời lịch cũ khi rút ngắn được phần lớn ngày làm việc.
+        """
+        penalties = []
         for service in self.input.services:
-            eligible = self._filter_eligible_staff(service)
-            if not eligible:
-                return OptimizationResult(
-                    success=False,
-                    status="INFEASIBLE",
-                    message=f"Không có nhân viên nào có đủ kỹ năng cho dịch vụ {service.service_id}",
-                )
+            if not service.is_confirmed or service.current_start is None:
+                continue
+
+            item_id = service.item_id
+            moved = self.model.NewBoolVar(f"moved_{item_id}")
+            self.model.Add(
+                self.task_starts[item_id] == self._current_start_units(service)
+            ).OnlyEnforceIf(moved.Not())
+
+            keep_keys = []
+            if service.current_staff_id:
+                keep_keys.append(self.staff_assignments.get((item_id, service.current_staff_id)))
+            for resource_id in service.current_resource_ids():
+                keep_keys.append(self.resource_assignments.get((item_id, resource_id)))
+            for keep in keep_keys:
+                if keep is None:
+                    # WHY: Staff/resource cũ không còn eligible -> bắt buộc xáo trộn
+                    self.model.Add(moved == 1)
+                else:
+                    self.model.AddImplication(moved.Not(), keep)
+
+            penalties.append(self.horizon_units * moved)
+        return penalties
 
+    def _current_start_units(self, service: ServiceData) -> int:
+        """Giờ bắt đầu hiện tại của item, theo slot."""
+        return self._to_units(datetime_to_minutes(service.current_start, self.base_time), round_up=True)
+
+    def _add_solution_hints(self):
+        """
+        Warm-start: Seed CP-SAT bằng phương án hiện tại của từng item.
+
+        WHY: Khi re-optimize một ngày đã có lịch, phần lớn assignment cũ vẫn hợp lệ,
+        solver bắt đầu từ nghiệm gần đúng thay vì tìm từ đầu.
+        """
+        for service in self.input.services:
+            item_id = service.item_id
+
+            if service.current_start is not None:
+                start = self.task_starts[item_id]
+                offset = self._current_start_units(service)
+                lb, ub = self._start_bounds[item_id]
+                if lb <= offset <= ub:
+                    self.model.AddHint(start, offset)
+                    self.model.AddHint(self.task_ends[item_id], offset + self._duration_units(service))
+
+            if service.current_staff_id:
+                for staff_id, var in self.item_staff_vars.get(item_id, []):
+                    self.model.AddHint(var, staff_id == service.current_staff_id)
+
+            current_resources = set(service.current_resource_ids())
+            if current_resources:
+                # WHY: Chỉ hint trong requirement chứa resource cũ - các group khác để solver tự chọn
+                for _, candidates in self.item_requirement_vars.get(item_id, []):
+                    if any(rid in current_resources for rid, _ in candidates):
+                        for resource_id, var in candidates:
+                            self.model.AddHint(var, resource_id in current_resources)
+
+    def _precheck(self) -> OptimizationResult | None:
+        """Kiểm tra điều kiện cần (vài mili-giây), trả về INFEASIBLE kèm lý do nếu vi phạm."""
+        # WHY: Import muộn - feasibility import các helper từ module này
+        from app.modules.bookings.optimizer.feasibility import find_infeasibility
+
+        started = time.perf_counter()
+        reason = find_infeasibility(self.input, self.eligibility)
+        if reason is None:
+            return None
+        return OptimizationResult(
+            success=False,
+            status="INFEASIBLE",
+            message=reason,
+            solve_time_ms=(time.perf_counter() - started) * 1000,
+            engine=OptimizerEngine.CP_SAT,
+        )
+
+    def build(self):
+        """Dựng toàn bộ CP-SAT model (variables, constraints, objective)."""
+        if self._built:
+            return
+        self._create_variables()
         self._add_assignment_constraints()
+        self._add_availability_constraints()
         self._add_no_overlap_constraints()
+        if not self.explain:
+            # WHY: Nới một assumption làm staff/resource hết hoán đổi được - phá đối xứng
+            # không còn đúng, và mode explain chỉ cần tính khả thi (không objective/hint)
+            self._add_symmetry_breaking()
         self._add_sequence_constraints()
-        self._add_objective()
+        if not self.explain:
+            self._add_objective()
+            self._add_solution_hints()
+        self._built = True
+
+    def explain_infeasibility(self) -> str | None:
+        """
+        Giải lại ở mode explain và mô tả tập ràng buộc gây xung đột.
+
+        WHY: SufficientAssumptionsForInfeasibility trả về một tập con assumption vẫn đủ
+        gây vô nghiệm - thường chỉ vài booking/staff, đủ để lễ tân biết cần nới gì.
+        """
+        explainer = BookingOptimizer(self.input, min(self.timeout, EXPLAIN_TIMEOUT_SECONDS), explain=True)
+        explainer.build()
 
-        # Solve
         solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = self.timeout
+        solver.parameters.max_time_in_seconds = explainer.timeout
+        if solver.Solve(explainer.model) != cp_model.INFEASIBLE:
+            return None
 
-        status = solver.Solve(self.model)
+        labels = [
+            explainer._assumption_labels[index]
+            for index in solver.SufficientAssumptionsForInfeasibility()
+            if index in explainer._assumption_labels
+        ]
+        if not labels:
+            return "Không đủ nhân viên/tài nguyên cho các dịch vụ (kể cả khi nới khung giờ và lịch làm việc)"
+        return "Xung đột giữa: " + "; ".join(labels)
 
-        # Map status
+    def solve(self, on_solution: Callable[[OptimizationResult], None] | None = None) -> OptimizationResult:
+        """
+        Chạy solver và trả về kết quả.
+
+        Args:
+            on_solution: Nếu có, được gọi ngay với nghiệm khả thi đầu tiên và với mỗi nghiệm
+                tốt hơn sau đó (chạy trong thread của solver, phải nhanh và thread-safe)
+        """
+        # WHY: Check feasibility trước khi build để không tốn công dựng model vô ích
+        infeasible = self._precheck()
+        if infeasible:
+            return infeasible
+
+        self.build()
+
+        search = derive_search_parameters(len(self.input.services), self.profile, self.timeout)
+        if self.profile is not None and self.profile.lexicographic:
+            result = self._solve_lexicographic(search, on_solution)
+        else:
+            solver = self._new_solver(search)
+            callback = _ImprovingSolutionCallback(self, on_solution) if on_solution else None
+            result = self._to_result(solver, solver.Solve(self.model, callback))
+
+        self._maybe_snapshot(search, result)
+        return result
+
+    def _new_solver(self, search: SearchParameters) -> cp_model.CpSolver:
+        solver = cp_model.CpSolver()
+        search.apply(solver)
+        # WHY: Ghi log vào response (không in ra stdout) để lấy presolve time cho telemetry
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.parameters.log_to_response = True
+        return solver
+
+    def _to_result(self, solver: cp_model.CpSolver, status: int) -> OptimizationResult:
+        """Kết quả của một lần Solve (kèm giải thích xung đột nếu vô nghiệm)."""
         status_map = {
             cp_model.OPTIMAL: ("OPTIMAL", True),
             cp_model.FEASIBLE: ("FEASIBLE", True),
@@ -306,47 +960,185 @@ class BookingOptimizer:
         status_str, success = status_map.get(status, ("UNKNOWN", False))
 
         if not success:
+            message = "Không tìm được phương án phân bổ phù hợp."
+            if status == cp_model.INFEASIBLE and not self.explain:
+                reason = self.explain_infeasibility()
+                if reason:
+                    message = f"{message} {reason}"
             return OptimizationResult(
                 success=False,
                 status=status_str,
-                message="Không tìm được phương án phân bổ phù hợp.",
+                message=message,
                 solve_time_ms=solver.WallTime() * 1000,
+                engine=OptimizerEngine.CP_SAT,
+                stats=self._collect_stats(solver, has_solution=False),
             )
+        return OptimizationResult(
+            success=True,
+            status=status_str,
+            message="Đã tìm được phương án phân bổ tối ưu.",
+            solve_time_ms=solver.WallTime() * 1000,
+            engine=OptimizerEngine.CP_SAT,
+            stats=self._collect_stats(solver, has_solution=True),
+            assigned_items=self._extract_assignments(solver),
+        )
+
+    def _solve_lexicographic(
+        self, search: SearchParameters, on_solution: Callable[[OptimizationResult], None] | None
+    ) -> OptimizationResult:
+        """
+        Giải theo tầng (LEXICOGRAPHIC_STAGES): mỗi tầng tối ưu một nhóm thành phần của Z,
+        chốt giá trị đạt được làm cận trên, rồi seed tầng sau bằng nghiệm vừa tìm.
+
+        WHY: Tổng có trọng số trộn các thành phần khác thang đo nên khó chứng minh tối ưu;
+        mỗi tầng chỉ còn một mục tiêu nhỏ nên hội tụ nhanh, và thứ tự ưu tiên rõ ràng
+        thay vì phụ thuộc vào tỉ lệ trọng số. Tầng hết giờ giữ nghiệm tốt nhất của nó.
+
+        Các tầng giải trên bản clone: cận trên/hint của tầng không lọt vào self.model
+        (snapshot và lần solve() sau vẫn thấy model gốc).
+        """
+        # WHY: Clone giữ nguyên index biến -> biến của self.model dùng được trên bản clone
+        model = self.model.Clone()
+        started = time.perf_counter()
+        deadline = started + search.max_time_seconds
+        result: OptimizationResult | None = None
+        stage_stats: list[SolverStats] = []
+        reached = []
+        all_optimal = True
+
+        for name, terms, share in LEXICOGRAPHIC_STAGES:
+            objective = [self._objectives[t] for t in terms if t in self._objectives]
+            if terms and not objective:
+                continue
+            if objective:
+                model.Minimize(sum(objective))
+            else:
+                model.ClearObjective()
+
+            remaining = max(0.1, deadline - time.perf_counter())
+            solver = self._new_solver(replace(search, max_time_seconds=remaining * share))
+            callback = _ImprovingSolutionCallback(self, on_solution) if on_solution else None
+            status = solver.Solve(model, callback)
+            if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                if result is None:
+                    return self._to_result(solver, status)
+                # WHY: Tầng sau không tìm được nghiệm trong thời gian còn lại - giữ nghiệm tầng trước
+                all_optimal = False
+                break
+
+            result = self._to_result(solver, status)
+            stage_stats.append(result.stats)
+            reached.append(name)
+            all_optimal = all_optimal and status == cp_model.OPTIMAL
+            if objective:
+                # WHY: Chốt tầng - tầng sau không được làm tệ đi mục tiêu đã đạt
+                model.Add(sum(objective) <= round(solver.ObjectiveValue()))
+            self._hint_from(model, solver)
+
+        final_stats = stage_stats[-1].model_copy(update={
+            "num_conflicts": sum(st.num_conflicts for st in stage_stats),
+            "num_branches": sum(st.num_branches for st in stage_stats),
+        })
+        return result.model_copy(update={
+            "status": "OPTIMAL" if all_optimal else "FEASIBLE",
+            "message": f"Đã tìm được phương án phân bổ (giải theo tầng: {' -> '.join(reached)}).",
+            "solve_time_ms": (time.perf_counter() - started) * 1000,
+            "stats": final_stats,
+        })
+
+    def _hint_from(self, model: cp_model.CpModel, solver: cp_model.CpSolver):
+        """Thay hint của `model` bằng nghiệm vừa tìm (warm-start cho tầng sau)."""
+        model.ClearHints()
+        for var in (
+            *self.task_starts.values(),
+            *self.task_ends.values(),
+            *self.staff_assignments.values(),
+            *self.resource_assignments.values(),
+        ):
+            model.AddHint(var, solver.Value(var))
+
+    def _maybe_snapshot(self, search: SearchParameters, result: OptimizationResult):
+        """Lưu snapshot model + input nếu được bật (lần giải chậm hoặc profile yêu cầu)."""
+        if not settings.OPTIMIZER_SNAPSHOT_DIR or self.explain:
+            return
+        requested = self.profile is not None and self.profile.capture_snapshot
+        if not requested and (result.solve_time_ms or 0) < settings.OPTIMIZER_SNAPSHOT_MIN_SOLVE_MS:
+            return
+
+        # WHY: Import muộn - snapshot import OptimizationInput từ module này
+        from app.modules.bookings.optimizer.snapshot import save_snapshot
+
+        # WHY: Snapshot chỉ phục vụ debug - lỗi ghi file không được làm hỏng kết quả giải
+        try:
+            path = save_snapshot(Path(settings.OPTIMIZER_SNAPSHOT_DIR), self.input, self.model, search, result)
+            print(f"📸 Saved model snapshot {path}")
+        except OSError as e:
+            print(f"⚠️ Failed to save model snapshot: {e}")
 
-        # Extract solution
+    def _collect_stats(self, solver: cp_model.CpSolver, has_solution: bool) -> SolverStats:
+        """Thống kê search + kích thước model của lần giải vừa xong."""
+        response = solver.ResponseProto()
+        proto = self.model.Proto()
+
+        match = _SEARCH_START_PATTERN.search(response.solve_log)
+        objective = bound = gap = None
+        if has_solution and self.model.HasObjective():
+            objective = solver.ObjectiveValue()
+            bound = solver.BestObjectiveBound()
+            gap = abs(objective - bound) / max(1.0, abs(objective))
+
+        return SolverStats(
+            num_conflicts=solver.NumConflicts(),
+            num_branches=solver.NumBranches(),
+            presolve_time_ms=float(match.group(1)) * 1000 if match else None,
+            objective_value=objective,
+            best_objective_bound=bound,
+            relative_gap=gap,
+            num_variables=len(proto.variables),
+            num_constraints=len(proto.constraints),
+        )
+
+    def _extract_assignments(
+        self, solver: cp_model.CpSolver | cp_model.CpSolverSolutionCallback
+    ) -> list[dict]:
+        """Đọc nghiệm: staff/resource được assign và thời gian của từng item."""
         assignments = []
         for service in self.input.services:
             item_id = service.item_id
 
-            # Tìm staff được assign
-            assigned_staff = None
-            for (iid, sid), var in self.staff_assignments.items():
-                if iid == item_id and solver.Value(var) == 1:
-                    assigned_staff = sid
-                    break
-
-            # Tìm resource được assign
-            assigned_resource = None
-            for (iid, rid), var in self.resource_assignments.items():
-                if iid == item_id and solver.Value(var) == 1:
-                    assigned_resource = rid
-                    break
+            assigned_staff = next(
+                (sid for sid, var in self.item_staff_vars.get(item_id, []) if solver.Value(var) == 1),
+                None,
+            )
+            # WHY: Giờ kết thúc theo thời lượng thực, không theo biên slot đã làm tròn
+            start_minutes = solver.Value(self.task_starts[item_id]) * self.slot
+            end_minutes = start_minutes + service.duration + service.buffer_time
 
-            start_minutes = solver.Value(self.task_starts[item_id])
-            end_minutes = solver.Value(self.task_ends[item_id])
+            # Mọi resource được chọn (theo requirement) kèm sub-interval sử dụng thực
+            assigned_resources, resource_usages = [], []
+            for requirement, candidates in self.item_requirement_vars.get(item_id, []):
+                offset, length = service.resource_usage(requirement)
+                for rid, var in candidates:
+                    if solver.Value(var) == 1:
+                        assigned_resources.append(rid)
+                        resource_usages.append({
+                            "resource_id": str(rid),
+                            "start": minutes_to_datetime(start_minutes + offset, self.base_time),
+                            "end": minutes_to_datetime(start_minutes + offset + length, self.base_time),
+                        })
+            # WHY: BookingItem.assigned_resource_id chỉ giữ một resource - resource đầu tiên
+            assigned_resource = assigned_resources[0] if assigned_resources else None
 
+            booking_id = self._booking_key(service)
             assignments.append({
                 "item_id": str(item_id),
+                "booking_id": str(booking_id) if booking_id else None,
                 "staff_id": str(assigned_staff) if assigned_staff else None,
                 "resource_id": str(assigned_resource) if assigned_resource else None,
-                "scheduled_start": _minutes_to_datetime(start_minutes, self.base_time),
-                "scheduled_end": _minutes_to_datetime(end_minutes, self.base_time),
+                "resource_ids": [str(rid) for rid in assigned_resources],
+                "resource_usages": resource_usages,
+                "scheduled_start": minutes_to_datetime(start_minutes, self.base_time),
+                "scheduled_end": minutes_to_datetime(end_minutes, self.base_time),
             })
+        return assignments
 
-        return OptimizationResult(
-            success=True,
-            status=status_str,
-            message="Đã tìm được phương án phân bổ tối ưu.",
-            solve_time_ms=solver.WallTime() * 1000,
-            assigned_items=assignments,
-        )
@@ -4,10 +4,12 @@ Booking Router - API Endpoints cho module bookings.
 from datetime import datetime
 from uuid import UUID
 
+from arq.connections import ArqRedis
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
+from app.core.redis import get_redis
 from app.modules.bookings import service
 from app.modules.bookings.exceptions import BookingNotFoundException
 from app.modules.bookings.models import BookingStatus
@@ -17,10 +19,12 @@ from app.modules.bookings.schemas import (
     BookingReadWithItems,
     BookingStatusUpdate,
     BookingUpdate,
+    DayOptimizationRequest,
     OptimizationRequest,
     OptimizationResult,
     SuggestSlotsRequest,
     SuggestSlotsResponse,
+    WeekOptimizationRequest,
 )
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
@@ -85,17 +89,19 @@ async def get_booking(
 async def create_booking(
     booking_in: BookingCreate,
     session: AsyncSession = Depends(get_db),
+    redis: ArqRedis | None = Depends(get_redis),
 ):
     """
     Tạo booking mới.
-    Booking sẽ có status PENDING và tự động được enqueue cho optimization.
+    Booking sẽ có status PENDING và tự động được enqueue cho optimization
+    (gộp với các booking mới cùng ngày trong cửa sổ debounce).
     """
     booking = await service.create_booking(session, booking_in)
 
     # WHY: Enqueue optimization job vào ARQ background worker
     try:
-        from app.worker import enqueue_optimization_job
-        await enqueue_optimization_job(booking.id)
+        from app.worker import enqueue_new_booking_job
+        await enqueue_new_booking_job(booking, redis=redis)
     except Exception as e:
         # WHY: Không block response nếu Redis không available
         # Job có thể được retry thủ công qua /optimize endpoint
@@ -128,9 +134,17 @@ async def update_booking_status(
 async def cancel_booking(
     booking_id: UUID,
     session: AsyncSession = Depends(get_db),
+    redis: ArqRedis | None = Depends(get_redis),
 ):
-    """Hủy booking."""
+    """Hủy booking. Lịch trong ngày được sửa cục bộ quanh khoảng vừa trống."""
     await service.delete_booking(session, booking_id)
+
+    try:
+        from app.worker import enqueue_repair_job
+        await enqueue_repair_job(cancelled_booking_id=booking_id, redis=redis)
+    except Exception as e:
+        print(f"Warning: Failed to enqueue repair job: {e}")
+
     return None
 
 
@@ -140,6 +154,7 @@ async def cancel_booking(
 async def trigger_optimization(
     request: OptimizationRequest,
     session: AsyncSession = Depends(get_db),
+    redis: ArqRedis | None = Depends(get_redis),
 ):
     """
     Trigger optimization cho một booking.
@@ -151,8 +166,72 @@ async def trigger_optimization(
 
     # WHY: Enqueue job vào ARQ worker
     try:
+        from app.modules.bookings.optimizer.coalesce import optimization_version
+        from app.modules.bookings.optimizer.queues import queue_for
         from app.worker import enqueue_optimization_job
-        job = await enqueue_optimization_job(booking.id)
+        job = await enqueue_optimization_job(
+            booking.id,
+            request.timeout_seconds,
+            request.profile,
+            redis=redis,
+            version=optimization_version(booking),
+            queue_name=queue_for(booking.source),
+        )
+
+        # WHY: job None = job cùng id (cùng booking + version) đang chờ / đang chạy
+        return OptimizationResult(
+            success=True,
+            status="ENQUEUED",
+            message=f"Job đã được enqueue. Job ID: {job.job_id}" if job else "Job trùng đang chờ xử lý",
+        )
+    except Exception as e:
+        return OptimizationResult(
+            success=False,
+            status="ENQUEUE_FAILED",
+            message=f"Không thể enqueue job: {str(e)}",
+        )
+
+
+@router.post("/optimize-day", response_model=OptimizationResult)
+async def trigger_day_optimization(
+    request: DayOptimizationRequest,
+    redis: ArqRedis | None = Depends(get_redis),
+):
+    """
+    Trigger optimization chung cho toàn bộ booking PENDING/CONFIRMED trong một ngày.
+    Một lần solve thay cho việc giải riêng từng booking.
+    """
+    try:
+        from app.worker import enqueue_day_optimization_job
+        job = await enqueue_day_optimization_job(request.date, request.profile, redis=redis)
+
+        return OptimizationResult(
+            success=True,
+            status="ENQUEUED",
+            message=f"Job đã được enqueue. Job ID: {job.job_id if job else 'N/A'}",
+        )
+    except Exception as e:
+        return OptimizationResult(
+            success=False,
+            status="ENQUEUE_FAILED",
+            message=f"Không thể enqueue job: {str(e)}",
+        )
+
+
+@router.post("/optimize-week", response_model=OptimizationResult)
+async def trigger_week_optimization(
+    request: WeekOptimizationRequest,
+    redis: ArqRedis | None = Depends(get_redis),
+):
+    """
+    Trigger cân bằng lại nhiều ngày liên tiếp (mặc định 7): rolling horizon theo cửa sổ
+    chồng lấn, sau đó LNS giải lại từng ngày của một staff / một resource group.
+    """
+    try:
+        from app.worker import enqueue_week_optimization_job
+        job = await enqueue_week_optimization_job(
+            request.start_date, request.days, request.profile, redis=redis
+        )
 
         return OptimizationResult(
             success=True,
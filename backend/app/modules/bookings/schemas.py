@@ -1,7 +1,8 @@
 """
 Booking Schemas - Pydantic v2 schemas cho API request/response.
 """
-from datetime import datetime
+from datetime import date, datetime
+from enum import Enum as PyEnum
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -113,6 +114,22 @@ class BookingStatusUpdate(BaseModel):
 
 # === Optimization Schemas ===
 
+class OptimizationMode(str, PyEnum):
+    """Phạm vi bài toán optimization."""
+    BOOKING = "BOOKING"  # Giải riêng từng booking
+    DAY = "DAY"          # Giải chung toàn bộ booking trong ngày
+    WEEK = "WEEK"        # Nhiều ngày liên tiếp: rolling horizon + LNS
+    REPAIR = "REPAIR"    # Sửa lịch sau hủy booking / hủy ca (chỉ telemetry, input vẫn là DAY)
+    BATCH = "BATCH"      # Booking mới gộp trong cửa sổ debounce (chỉ telemetry, input vẫn là DAY)
+
+
+class OptimizerEngine(str, PyEnum):
+    """Engine đã tạo ra kết quả optimization."""
+    GREEDY = "GREEDY"  # Heuristic earliest-fit (booking nhỏ)
+    CP_SAT = "CP_SAT"  # OR-Tools CP-SAT solver
+    CACHE = "CACHE"  # Kết quả đã lưu của một bài toán giống hệt (xem optimizer/memo.py)
+
+
 class OptimizationWeights(BaseModel):
     """Trọng số cho hàm mục tiêu optimization."""
     fairness: int = Field(default=5, ge=0, le=10)      # α - Cân bằng tải
@@ -121,11 +138,58 @@ class OptimizationWeights(BaseModel):
     perturbation: int = Field(default=2, ge=0, le=10)  # δ - Ổn định
 
 
+class SolverPriority(str, PyEnum):
+    """Mức ưu tiên của lần giải - quyết định thời gian tìm kiếm và ngưỡng gap."""
+    INTERACTIVE = "INTERACTIVE"  # Lễ tân đang chờ kết quả
+    NORMAL = "NORMAL"
+    BACKGROUND = "BACKGROUND"    # Tối ưu lại theo lịch, không ai chờ
+
+
+class SolverProfile(BaseModel):
+    """
+    Tham số tìm kiếm của CP-SAT.
+    Trường None được suy ra từ kích thước model và priority (xem optimizer/params.py).
+    """
+    priority: SolverPriority = SolverPriority.NORMAL
+    num_workers: int | None = Field(default=None, ge=1, le=64)
+    max_time_seconds: float | None = Field(default=None, gt=0, le=300)
+    relative_gap_limit: float | None = Field(default=None, ge=0, le=1)  # Dừng khi gap <= ngưỡng
+    capture_snapshot: bool = False  # Lưu snapshot model để replay (cần OPTIMIZER_SNAPSHOT_DIR)
+    # Giải theo tầng: khả thi -> makespan -> preference thay vì một tổng có trọng số
+    lexicographic: bool = False
+
+
 class OptimizationRequest(BaseModel):
     """Request để trigger optimization cho một booking."""
     booking_id: UUID
     weights: OptimizationWeights = OptimizationWeights()
-    timeout_seconds: int = Field(default=30, ge=5, le=300)
+    timeout_seconds: int = Field(default=30, ge=5, le=300)  # Giới hạn cứng, profile không vượt quá
+    profile: SolverProfile = SolverProfile()
+
+
+class DayOptimizationRequest(BaseModel):
+    """Request để trigger optimization chung cho toàn bộ booking trong một ngày."""
+    date: date
+    profile: SolverProfile = SolverProfile()
+
+
+class WeekOptimizationRequest(BaseModel):
+    """Request để cân bằng lại nhiều ngày liên tiếp (rolling horizon + LNS)."""
+    start_date: date
+    days: int = Field(default=7, ge=1, le=14)
+    profile: SolverProfile = SolverProfile()
+
+
+class SolverStats(BaseModel):
+    """Thống kê CP-SAT của một lần giải (None với engine GREEDY)."""
+    num_conflicts: int = 0
+    num_branches: int = 0
+    presolve_time_ms: float | None = None
+    objective_value: float | None = None
+    best_objective_bound: float | None = None
+    relative_gap: float | None = None  # |obj - bound| / max(1, |obj|)
+    num_variables: int = 0
+    num_constraints: int = 0
 
 
 class OptimizationResult(BaseModel):
@@ -134,7 +198,9 @@ class OptimizationResult(BaseModel):
     status: str  # OPTIMAL, FEASIBLE, INFEASIBLE, TIMEOUT
     message: str | None = None
     solve_time_ms: float | None = None
-    assigned_items: list[dict] = []  # [{item_id, staff_id, resource_id, start, end}]
+    engine: OptimizerEngine | None = None
+    stats: SolverStats | None = None
+    assigned_items: list[dict] = []  # [{item_id, booking_id, staff_id, resource_id, resource_ids, resource_usages, start, end}]
 
 
 # === Suggest Slots Schemas ===
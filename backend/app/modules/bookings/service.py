@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import Sequence
 from uuid import UUID
 
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlmodel import and_, select
@@ -16,7 +17,7 @@ from app.modules.bookings.exceptions import (
     CustomerNotFoundException,
     ServiceNotFoundException,
 )
-from app.modules.bookings.models import Booking, BookingItem, BookingStatus
+from app.modules.bookings.models import Booking, BookingItem, BookingItemResource, BookingStatus
 from app.modules.bookings.schemas import (
     BookingCreate,
     BookingStatusUpdate,
@@ -285,11 +286,13 @@ async def update_booking_optimization_result(
         # Tìm item trong booking
         for item in booking.items:
             if str(item.id) == str(item_id):
-                item.assigned_staff_id = assignment.get("staff_id")
-                item.assigned_resource_id = assignment.get("resource_id")
+                # WHY: Kết quả solver (và cache JSON) giữ id dạng str
+                item.assigned_staff_id = _as_uuid(assignment.get("staff_id"))
+                item.assigned_resource_id = _as_uuid(assignment.get("resource_id"))
                 item.scheduled_start = assignment.get("scheduled_start")
                 item.scheduled_end = assignment.get("scheduled_end")
                 session.add(item)
+                await _replace_item_resources(session, item, assignment)
                 break
 
     session.add(booking)
@@ -297,3 +300,54 @@ async def update_booking_optimization_result(
     await session.refresh(booking)
 
     return booking
+
+
+def _as_uuid(value) -> UUID | None:
+    return UUID(str(value)) if value else None
+
+
+async def _replace_item_resources(session: AsyncSession, item: BookingItem, assignment: dict) -> None:
+    """
+    Ghi lại toàn bộ resource của item kèm khoảng sử dụng.
+
+    WHY: assigned_resource_id chỉ giữ một resource; requirement quantity > 1, nhiều group
+    hay sub-interval (start_delay / usage_duration) cần đủ dữ liệu để lần giải sau block đúng.
+    """
+    await session.execute(delete(BookingItemResource).where(BookingItemResource.booking_item_id == item.id))
+
+    usages = assignment.get("resource_usages")
+    if usages is None and assignment.get("resource_id") and item.scheduled_start and item.scheduled_end:
+        # Assignment không kèm sub-interval -> resource bận suốt item
+        usages = [{"resource_id": assignment["resource_id"], "start": item.scheduled_start,
+                   "end": item.scheduled_end}]
+
+    for usage in usages or []:
+        session.add(BookingItemResource(
+            booking_item_id=item.id,
+            resource_id=_as_uuid(usage["resource_id"]),
+            usage_start=usage["start"],
+            usage_end=usage["end"],
+        ))
+
+
+async def update_day_optimization_result(
+    session: AsyncSession,
+    booking_ids: list[UUID],
+    status: str,
+    message: str | None,
+    items_assignment: list[dict],
+) -> None:
+    """
+    Cập nhật kết quả optimization mode DAY cho từng booking trong ngày.
+    WHY: Một lần solve trả về assignment của nhiều booking, tách theo booking_id.
+    """
+    items_by_booking: dict[str, list[dict]] = {str(bid): [] for bid in booking_ids}
+    for assignment in items_assignment:
+        booking_key = str(assignment.get("booking_id"))
+        if booking_key in items_by_booking:
+            items_by_booking[booking_key].append(assignment)
+
+    for booking_id in booking_ids:
+        await update_booking_optimization_result(
+            session, booking_id, status, message, items_by_booking[str(booking_id)]
+        )
@@ -7,6 +7,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.modules.bookings.optimizer.memo import bump_availability_version
 from app.modules.resources.models import (
     Resource,
     ResourceGroup,
@@ -185,6 +186,7 @@ async def update_resource(session: AsyncSession, resource_id: UUID, data: Resour
     try:
         session.add(resource)
         await session.commit()
+        await bump_availability_version()
         await session.refresh(resource)
         return resource
     except IntegrityError as e:
@@ -206,6 +208,7 @@ async def delete_resource(session: AsyncSession, resource_id: UUID) -> None:
     resource.deleted_at = datetime.now(timezone.utc)
     session.add(resource)
     await session.commit()
+    await bump_availability_version()
 
 
 # Maintenance CRUD
@@ -244,6 +247,7 @@ async def create_maintenance(
         session.add(resource)
 
     await session.commit()
+    await bump_availability_version()
     await session.refresh(maintenance)
     return maintenance
 
@@ -258,3 +262,4 @@ async def delete_maintenance(session: AsyncSession, maintenance_id: UUID) -> Non
 
     await session.delete(maintenance)
     await session.commit()
+    await bump_availability_version()
@@ -4,10 +4,12 @@ Scheduling Router - API Endpoints cho quản lý ca và lịch làm việc.
 from datetime import date
 from uuid import UUID
 
+from arq.connections import ArqRedis
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
+from app.core.redis import get_redis
 from app.modules.scheduling import service
 from app.modules.scheduling.models import ScheduleStatus
 from app.modules.scheduling.schemas import (
@@ -127,9 +129,19 @@ async def update_schedule_status(
     schedule_id: UUID,
     new_status: ScheduleStatus = Query(..., description="Trạng thái mới"),
     session: AsyncSession = Depends(get_db),
+    redis: ArqRedis | None = Depends(get_redis),
 ):
-    """Cập nhật trạng thái lịch làm việc."""
+    """Cập nhật trạng thái lịch làm việc. Hủy ca -> xếp lại các booking đang giao cho staff đó."""
     schedule = await service.update_schedule_status(session, schedule_id, new_status)
+
+    if new_status == ScheduleStatus.CANCELLED:
+        # WHY: Không block response nếu Redis không available
+        try:
+            from app.worker import enqueue_repair_job
+            await enqueue_repair_job(target_date=schedule.work_date, redis=redis)
+        except Exception as e:
+            print(f"Warning: Failed to enqueue repair job: {e}")
+
     return schedule
 
 
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlmodel import and_, select
 
+from app.modules.bookings.optimizer.memo import bump_availability_version
 from app.modules.scheduling.exceptions import (
     ScheduleConflictException,
     ScheduleNotFoundException,
@@ -137,6 +138,7 @@ async def update_shift(
 
     session.add(shift)
     await session.commit()
+    await bump_availability_version()
     await session.refresh(shift)
     return shift
 
@@ -218,6 +220,7 @@ async def create_schedule(
     schedule = StaffSchedule.model_validate(schedule_in)
     session.add(schedule)
     await session.commit()
+    await bump_availability_version()
     await session.refresh(schedule)
     return schedule
 
@@ -264,6 +267,8 @@ async def batch_create_schedules(
         except (ScheduleConflictException, ScheduleOverlapException):
             continue
 
+    if created_schedules:
+        await bump_availability_version()
     return created_schedules
 
 
@@ -281,6 +286,7 @@ async def update_schedule_status(
     schedule.status = new_status
     session.add(schedule)
     await session.commit()
+    await bump_availability_version()
     await session.refresh(schedule)
     return schedule
 
@@ -296,6 +302,7 @@ async def delete_schedule(session: AsyncSession, schedule_id: UUID) -> bool:
 
     await session.delete(schedule)
     await session.commit()
+    await bump_availability_version()
     return True
 
 
@@ -315,4 +322,5 @@ async def batch_delete_schedules(
         await session.delete(sch)
 
     await session.commit()
+    await bump_availability_version()
     return True
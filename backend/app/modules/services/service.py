@@ -9,6 +9,7 @@ from sqlalchemy.orm import selectinload
 from sqlmodel import func, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.modules.bookings.optimizer.skill_cache import bump_skills_version
 from app.modules.categories.models import ServiceCategory
 from app.modules.services.models import (
     Service,
@@ -119,6 +120,8 @@ async def create_service(session: AsyncSession, data: ServiceCreate) -> Service:
 
         session.add(service)
         await session.commit()
+        if skills:
+            await bump_skills_version()
 
         # WHY: Fetch lại để eager load relationships (category, skills, etc.)
         return await get_service_by_id(session, service.id)
@@ -162,6 +165,8 @@ async def update_service(session: AsyncSession, service_id: UUID, data: ServiceU
 
         session.add(service)
         await session.commit()
+        if data.skill_ids is not None:
+            await bump_skills_version()
         return await get_service_by_id(session, service_id)
     except HTTPException:
         await session.rollback()
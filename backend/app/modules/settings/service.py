@@ -1,4 +1,4 @@
-from datetime import time
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
 
 from sqlmodel import delete, select
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -50,6 +50,43 @@ class SettingsService:
 
         return await self.get_settings(db)
 
+    async def get_open_intervals(
+        self, db: AsyncSession, target_date: date, tz: tzinfo | None = timezone.utc
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Các khoảng mở cửa (datetime) của một ngày, áp dụng ExceptionDate nếu có.
+        Bao gồm phần ca qua đêm của ngày hôm trước tràn sang ngày này.
+
+        WHY: Dùng db.execute để tương thích cả AsyncSession của SQLAlchemy (ARQ worker).
+        """
+        previous_date = target_date - timedelta(days=1)
+
+        # WHY: Cùng fallback với get_settings - chưa cấu hình giờ nào thì dùng giờ mặc định
+        result_hours = await db.execute(select(OperatingHour))
+        hours = list(result_hours.scalars().all()) or self._get_default_hours()
+
+        result_dates = await db.execute(
+            select(ExceptionDate).where(ExceptionDate.date.in_([previous_date, target_date]))
+        )
+        exceptions = list(result_dates.scalars().all())
+
+        day_start = datetime.combine(target_date, time.min, tzinfo=tz)
+        intervals = []
+        for day in (previous_date, target_date):
+            for start, end in _day_intervals(day, hours, exceptions, tz):
+                # WHY: Ngày hôm trước chỉ lấy phần qua đêm tràn sang ngày này
+                start = max(start, day_start)
+                if start < end:
+                    intervals.append((start, end))
+
+        merged: list[tuple[datetime, datetime]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
     def _get_default_hours(self) -> list[OperatingHour]:
         """Tạo cấu hình mặc định: Tất cả các ngày đều mở từ 08:00 - 20:00."""
         defaults = []
@@ -62,4 +99,40 @@ class SettingsService:
             ))
         return defaults
 
+def _day_of_week(day: date) -> int:
+    """Quy ước của OperatingHour: 0=Sun ... 6=Sat (Python weekday: 0=Mon)."""
+    return (day.weekday() + 1) % 7
+
+
+def _to_interval(day: date, open_time: time, close_time: time, tz: tzinfo | None) -> tuple[datetime, datetime]:
+    """Khoảng mở cửa theo Domain Rules: 24h khi open == close, qua đêm khi close < open."""
+    start = datetime.combine(day, open_time, tzinfo=tz)
+    end = datetime.combine(day, close_time, tzinfo=tz)
+    if close_time <= open_time:
+        end += timedelta(days=1)
+    return start, end
+
+
+def _day_intervals(
+    day: date, hours: list[OperatingHour], exceptions: list[ExceptionDate], tz: tzinfo | None
+) -> list[tuple[datetime, datetime]]:
+    """Khoảng mở cửa của một ngày: ExceptionDate (nếu có) ghi đè giờ thường lệ."""
+    day_exceptions = [e for e in exceptions if e.date == day]
+    if day_exceptions:
+        if any(e.is_closed for e in day_exceptions):
+            return []
+        return [
+            _to_interval(day, e.open_time, e.close_time, tz)
+            for e in day_exceptions
+            if e.open_time is not None and e.close_time is not None
+        ]
+
+    weekday = _day_of_week(day)
+    return [
+        _to_interval(day, h.open_time, h.close_time, tz)
+        for h in hours
+        if h.day_of_week == weekday and not h.is_closed
+    ]
+
+
 settings_service = SettingsService()
@@ -8,6 +8,7 @@ from sqlalchemy import func
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.modules.bookings.optimizer.skill_cache import bump_skills_version
 from app.modules.skills.models import Skill
 from app.modules.skills.schemas import SkillCreate, SkillUpdate
 
@@ -85,3 +86,5 @@ async def delete_skill(session: AsyncSession, skill_id: UUID) -> None:
 
     await session.delete(skill)
     await session.commit()
+    # WHY: Skill có thể vẫn gắn với staff -> catalog kỹ năng của optimizer đã cũ
+    await bump_skills_version()
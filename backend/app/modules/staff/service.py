@@ -11,6 +11,7 @@ from sqlmodel import select
 
 from app.core.config import settings
 from app.core.supabase import supabase_admin
+from app.modules.bookings.optimizer.skill_cache import bump_skills_version
 from app.modules.staff.exceptions import StaffNotFoundException
 import logging
 
@@ -112,6 +113,8 @@ async def sync_staff_profile(session: AsyncSession, sync_in: StaffSyncRequest) -
 
     try:
         await session.commit()
+        if sync_in.skill_ids:
+            await bump_skills_version()
         # WHY: Thay vì refresh đơn lẻ, ta dùng lại hàm getter có đầy đủ selectinload
         # để đảm bảo trả về object hoàn chỉnh cho Validator của Pydantic.
         return await get_staff_by_id(session, sync_in.user_id)
@@ -190,6 +193,7 @@ async def update_staff_skills(
         session.add(new_link)
 
     await session.commit()
+    await bump_skills_version()
     await session.refresh(staff)
     return staff
 
@@ -1,2 +1,43 @@
+"""
+System Models - Telemetry của optimizer.
+"""
+from datetime import date, datetime, timezone
+from uuid import UUID, uuid4
 
-# Models cho module System sẽ được định nghĩa tại đây.
+from sqlalchemy import BigInteger, Column, Date, DateTime, String
+from sqlmodel import Field, SQLModel
+
+
+class SolverRun(SQLModel, table=True):
+    """
+    Một lần giải optimization (mode BOOKING hoặc DAY) kèm thống kê CP-SAT.
+    Dùng để theo dõi latency của solver và phát hiện regression giữa các bản release.
+    """
+    __tablename__ = "solver_runs"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+
+    # WHY: Không dùng FK - giữ telemetry kể cả khi booking đã bị xóa
+    booking_id: UUID | None = Field(default=None, index=True)  # None ở mode DAY
+    target_date: date | None = Field(default=None, sa_column=Column(Date, nullable=True))
+
+    mode: str = Field(sa_column=Column(String(20), nullable=False))
+    engine: str | None = Field(default=None, sa_column=Column(String(20), nullable=True))
+    status: str = Field(max_length=50)
+    num_items: int = Field(default=0)
+
+    solve_time_ms: float | None = None
+    presolve_time_ms: float | None = None
+    num_conflicts: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, default=0))
+    num_branches: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, default=0))
+    objective_value: float | None = None
+    best_objective_bound: float | None = None
+    relative_gap: float | None = None
+    num_variables: int = Field(default=0)
+    num_constraints: int = Field(default=0)
+
+    created_at: datetime = Field(
+        sa_type=DateTime(timezone=True),
+        default_factory=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
@@ -1,5 +1,63 @@
-from fastapi import APIRouter
+"""
+System Router - API endpoints cho telemetry của optimizer và pool Redis.
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import get_db
+from app.core.redis import redis_pool
+from app.modules.bookings.schemas import OptimizationMode, OptimizerEngine
+from app.modules.system.schemas import (
+    RedisPoolStats,
+    SolverHistogram,
+    SolverMetric,
+    SolverRunRead,
+    SolverStatsSummary,
+)
+from app.modules.system.service import system_service
 
 router = APIRouter()
 
-# Các endpoints của module System sẽ được định nghĩa tại đây.
+
+@router.get("/solver-stats", response_model=SolverStatsSummary)
+async def get_solver_stats(
+    days: int = Query(7, ge=1, le=365),
+    mode: OptimizationMode | None = Query(None),
+    engine: OptimizerEngine | None = Query(None),
+    session: AsyncSession = Depends(get_db),
+):
+    """Phân vị p50/p90/p95/p99 của latency, conflicts, branches, gap, kích thước model."""
+    return await system_service.get_solver_stats(
+        session, days, mode.value if mode else None, engine.value if engine else None
+    )
+
+
+@router.get("/solver-stats/histogram", response_model=SolverHistogram)
+async def get_solver_histogram(
+    metric: SolverMetric = Query(SolverMetric.SOLVE_TIME_MS),
+    days: int = Query(7, ge=1, le=365),
+    edges: list[float] | None = Query(None, description="Các mốc bucket, VD: ?edges=0&edges=100&edges=1000"),
+    mode: OptimizationMode | None = Query(None),
+    engine: OptimizerEngine | None = Query(None),
+    session: AsyncSession = Depends(get_db),
+):
+    """Histogram của một chỉ số solver."""
+    return await system_service.get_solver_histogram(
+        session, metric, days, edges, mode.value if mode else None, engine.value if engine else None
+    )
+
+
+@router.get("/solver-stats/slowest", response_model=list[SolverRunRead])
+async def get_slowest_solver_runs(
+    days: int = Query(7, ge=1, le=365),
+    limit: int = Query(20, ge=1, le=200),
+    session: AsyncSession = Depends(get_db),
+):
+    """Các lần giải chậm nhất kèm booking/ngày tương ứng."""
+    return await system_service.get_slowest_runs(session, days, limit)
+
+
+@router.get("/redis-pool", response_model=RedisPoolStats)
+async def get_redis_pool_stats():
+    """Trạng thái pool Redis dùng chung: kết nối, số lần kết nối lại, lỗi gần nhất."""
+    return redis_pool.stats()
@@ -0,0 +1,88 @@
+"""
+System Schemas - Thống kê solver.
+"""
+from datetime import date, datetime
+from enum import Enum as PyEnum
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SolverMetric(str, PyEnum):
+    """Các chỉ số solver có thể thống kê."""
+    SOLVE_TIME_MS = "solve_time_ms"
+    PRESOLVE_TIME_MS = "presolve_time_ms"
+    NUM_CONFLICTS = "num_conflicts"
+    NUM_BRANCHES = "num_branches"
+    RELATIVE_GAP = "relative_gap"
+    NUM_VARIABLES = "num_variables"
+    NUM_CONSTRAINTS = "num_constraints"
+
+
+class MetricPercentiles(BaseModel):
+    """Phân vị của một chỉ số."""
+    count: int
+    p50: float | None = None
+    p90: float | None = None
+    p95: float | None = None
+    p99: float | None = None
+    max: float | None = None
+
+
+class SolverStatsSummary(BaseModel):
+    """Tổng hợp các lần giải trong khoảng thời gian."""
+    since: datetime
+    total_runs: int
+    status_counts: dict[str, int] = {}
+    engine_counts: dict[str, int] = {}
+    metrics: dict[SolverMetric, MetricPercentiles] = {}
+
+
+class HistogramBucket(BaseModel):
+    """Một bucket [lower, upper) - upper None là bucket cuối không giới hạn."""
+    lower: float
+    upper: float | None = None
+    count: int
+
+
+class SolverHistogram(BaseModel):
+    """Histogram của một chỉ số."""
+    metric: SolverMetric
+    since: datetime
+    buckets: list[HistogramBucket]
+
+
+class SolverRunRead(BaseModel):
+    """Một lần giải (dùng cho danh sách lần giải chậm nhất)."""
+    id: UUID
+    booking_id: UUID | None
+    target_date: date | None
+    mode: str
+    engine: str | None
+    status: str
+    num_items: int
+    solve_time_ms: float | None
+    presolve_time_ms: float | None
+    num_conflicts: int
+    num_branches: int
+    relative_gap: float | None
+    num_variables: int
+    num_constraints: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RedisPoolStats(BaseModel):
+    """Trạng thái pool Redis dùng chung của API."""
+    connected: bool
+    healthy: bool
+    connects: int
+    reconnects: int
+    failures: int
+    last_error: str | None = None
+    last_health_check: float | None = None
+    max_connections: int | None = None
+    created_connections: int | None = None
+    available_connections: int | None = None
+    in_use_connections: int | None = None
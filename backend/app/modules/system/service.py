@@ -1,7 +1,199 @@
+"""
+System Service - Telemetry của optimizer: ghi nhận lần giải và thống kê phân vị/histogram (tính trong SQL).
+"""
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import case, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.modules.bookings.schemas import OptimizationMode, OptimizationResult
+from app.modules.system.models import SolverRun
+from app.modules.system.schemas import (
+    HistogramBucket,
+    MetricPercentiles,
+    SolverHistogram,
+    SolverMetric,
+    SolverStatsSummary,
+)
+
+# WHY: Bucket mặc định theo thang log cho solve_time_ms (greedy ~1ms, CP-SAT tới timeout)
+DEFAULT_TIME_BUCKETS = [0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+# Phân vị trả về trong MetricPercentiles (p50, p90, ...)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    """Phân vị q (0-100) theo nội suy tuyến tính trên danh sách đã sort."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
 class SystemService:
     """
     Service xử lý các tác vụ hệ thống.
+
+    WHY: Dùng session.execute để chạy được với cả AsyncSession của SQLModel (API)
+    và SQLAlchemy (ARQ worker).
     """
-    pass
+
+    async def record_solver_run(
+        self,
+        session: AsyncSession,
+        result: OptimizationResult,
+        mode: OptimizationMode,
+        num_items: int,
+        booking_id: UUID | None = None,
+        target_date: date | None = None,
+    ) -> SolverRun:
+        """Lưu thống kê của một lần giải."""
+        stats = result.stats
+        run = SolverRun(
+            booking_id=booking_id,
+            target_date=target_date,
+            mode=mode.value,
+            engine=result.engine.value if result.engine else None,
+            status=result.status,
+            num_items=num_items,
+            solve_time_ms=result.solve_time_ms,
+            **(stats.model_dump() if stats else {}),
+        )
+        session.add(run)
+        await session.commit()
+        return run
+
+    def _filters(self, since: datetime, mode: str | None, engine: str | None) -> list:
+        conditions = [SolverRun.created_at >= since]
+        if mode:
+            conditions.append(SolverRun.mode == mode)
+        if engine:
+            conditions.append(SolverRun.engine == engine)
+        return conditions
+
+    async def _count_by(self, session: AsyncSession, column, conditions: list) -> dict[str | None, int]:
+        result = await session.execute(select(column, func.count()).where(*conditions).group_by(column))
+        return {key: count for key, count in result.all()}
+
+    async def _metric_percentiles(
+        self, session: AsyncSession, column, conditions: list
+    ) -> MetricPercentiles:
+        """
+        Phân vị của một chỉ số trong khoảng thời gian.
+
+        WHY: PostgreSQL tính percentile_cont ngay trong database - API không phải tải
+        toàn bộ solver_runs. Database khác (SQLite khi test) chỉ tải đúng một cột đã lọc.
+        """
+        if session.bind.dialect.name == "postgresql":
+            row = (await session.execute(
+                select(
+                    func.count(column),
+                    *(func.percentile_cont(q / 100).within_group(column) for q in PERCENTILES),
+                    func.max(column),
+                ).where(*conditions)
+            )).one()
+            count, *quantiles, maximum = row
+            return MetricPercentiles(
+                count=count,
+                **{f"p{q}": value for q, value in zip(PERCENTILES, quantiles)},
+                max=maximum,
+            )
+
+        result = await session.execute(
+            select(column).where(*conditions, column.is_not(None)).order_by(column)
+        )
+        values = [float(value) for value in result.scalars().all()]
+        return MetricPercentiles(
+            count=len(values),
+            **{f"p{q}": _percentile(values, q) for q in PERCENTILES},
+            max=values[-1] if values else None,
+        )
+
+    async def get_solver_stats(
+        self,
+        session: AsyncSession,
+        days: int = 7,
+        mode: str | None = None,
+        engine: str | None = None,
+    ) -> SolverStatsSummary:
+        """Phân vị p50/p90/p95/p99 của các chỉ số solver trong `days` ngày gần nhất."""
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        conditions = self._filters(since, mode, engine)
+
+        status_counts = await self._count_by(session, SolverRun.status, conditions)
+        engine_counts = {
+            engine or "UNKNOWN": count
+            for engine, count in (await self._count_by(session, SolverRun.engine, conditions)).items()
+        }
+        metrics = {
+            metric: await self._metric_percentiles(session, getattr(SolverRun, metric.value), conditions)
+            for metric in SolverMetric
+        }
+
+        return SolverStatsSummary(
+            since=since,
+            total_runs=sum(status_counts.values()),
+            status_counts=status_counts,
+            engine_counts=engine_counts,
+            metrics=metrics,
+        )
+
+    async def get_solver_histogram(
+        self,
+        session: AsyncSession,
+        metric: SolverMetric = SolverMetric.SOLVE_TIME_MS,
+        days: int = 7,
+        edges: list[float] | None = None,
+        mode: str | None = None,
+        engine: str | None = None,
+    ) -> SolverHistogram:
+        """Histogram của một chỉ số theo các mốc `edges` (tăng dần), đếm bằng GROUP BY."""
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        edges = sorted(edges or DEFAULT_TIME_BUCKETS)
+        column = getattr(SolverRun, metric.value)
+
+        # WHY: Bucket cuối cùng gom mọi giá trị >= mốc lớn nhất
+        bucket = case(
+            *((column < edges[i + 1], i) for i in range(len(edges) - 1)), else_=len(edges) - 1
+        ) if len(edges) > 1 else literal(0)
+        # WHY: GROUP BY qua subquery - Postgres coi hai lần render CASE (tham số khác nhau) là hai biểu thức
+        buckets = (
+            select(bucket.label("bucket"))
+            .where(*self._filters(since, mode, engine), column.is_not(None), column >= edges[0])
+            .subquery()
+        )
+        result = await session.execute(select(buckets.c.bucket, func.count()).group_by(buckets.c.bucket))
+        counts = dict(result.all())
+
+        return SolverHistogram(
+            metric=metric,
+            since=since,
+            buckets=[
+                HistogramBucket(
+                    lower=edges[i],
+                    upper=edges[i + 1] if i + 1 < len(edges) else None,
+                    count=counts.get(i, 0),
+                )
+                for i in range(len(edges))
+            ],
+        )
+
+    async def get_slowest_runs(
+        self, session: AsyncSession, days: int = 7, limit: int = 20
+    ) -> list[SolverRun]:
+        """Các lần giải chậm nhất - xem booking/ngày nào đang kéo latency lên."""
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        result = await session.execute(
+            select(SolverRun)
+            .where(SolverRun.created_at >= since, SolverRun.solve_time_ms.is_not(None))
+            .order_by(SolverRun.solve_time_ms.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
 
 system_service = SystemService()
@@ -3,17 +3,198 @@ ARQ Worker - Background job worker cho booking optimization.
 
 Chạy với: arq app.worker.WorkerSettings
 Hoặc: uv run arq app.worker.WorkerSettings
+Queue interactive (booking WALK_IN/RECEPTIONIST, khi đặt OPTIMIZER_INTERACTIVE_QUEUE):
+    arq app.worker.InteractiveWorkerSettings
+Không có UPSTASH_REDIS_URL: job chạy in-process trong API, không cần worker riêng
 
 Cú pháp theo ARQ docs: https://arq-docs.helpmanual.io/
 """
+import asyncio
+import multiprocessing
+import os
+import queue
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
 from uuid import UUID
 
-from arq import create_pool
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from arq import func
+from arq.connections import ArqRedis
+from arq.constants import default_queue_name
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.core.config import settings
 from app.core.db import engine
-from app.core.redis import get_redis_settings
+from app.core.job_queue import InProcessQueue, JobQueue
+from app.core.redis import get_redis_settings, redis_pool
+from app.modules.bookings.models import Booking
+from app.modules.bookings.optimizer.engine import solve_optimization
+from app.modules.bookings.optimizer.rolling import merge_day_inputs
+from app.modules.bookings.optimizer.rolling import optimize_week as solve_rolling_week
+from app.modules.bookings.optimizer.solver import OptimizationInput
+from app.modules.bookings.schemas import OptimizationMode, OptimizationResult, SolverPriority, SolverProfile
+
+
+def solver_pool_size() -> int:
+    """Số process giải song song: OPTIMIZER_POOL_SIZE hoặc số CPU."""
+    return settings.OPTIMIZER_POOL_SIZE or os.cpu_count() or 1
+
+
+def create_solver_pool() -> ProcessPoolExecutor:
+    """
+    Tạo process pool cho CP-SAT solver.
+
+    WHY: Dùng "spawn" thay vì fork để process con không thừa hưởng event loop
+    và connection pool của worker.
+    """
+    return ProcessPoolExecutor(
+        max_workers=solver_pool_size(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# Chu kỳ (giây) kiểm tra nghiệm trung gian từ process giải
+SOLUTION_POLL_SECONDS = 0.2
+
+
+def _latest_solution(solutions: queue.Queue) -> OptimizationResult | None:
+    """Lấy hết nghiệm đang chờ trong queue, chỉ giữ nghiệm mới nhất (tốt nhất)."""
+    latest = None
+    while True:
+        try:
+            latest = solutions.get_nowait()
+        except queue.Empty:
+            return latest
+
+
+async def run_solver(
+    ctx: dict,
+    input_data: OptimizationInput,
+    timeout_seconds: int = 30,
+    profile: SolverProfile | None = None,
+    publish: Callable[[OptimizationResult], Awaitable[None]] | None = None,
+) -> OptimizationResult:
+    """
+    Giải model trong process pool, không block event loop của ARQ.
+
+    Nếu có `publish`: mỗi nghiệm tốt hơn mà solver tìm được (trong process con) được đẩy
+    qua Manager queue và publish ngay, trong khi solver vẫn tiếp tục search.
+    Nghiệm trung gian đến sau khi solve xong bị bỏ qua - kết quả cuối thay thế chúng.
+
+    Bài toán giống hệt đã giải (cùng fingerprint + availability version) trả về ngay
+    từ ctx["solve_cache"] (xem optimizer/memo.py).
+    """
+    cache = ctx.get("solve_cache")
+    if cache is None:
+        return await _solve_in_pool(ctx, input_data, timeout_seconds, profile, publish)
+
+    key = await cache.key_for(input_data, timeout_seconds, profile, ctx.get("redis"))
+    cached = await cache.get(key, ctx.get("redis"))
+    if cached is not None:
+        print(f"♻️ Reusing cached solve result ({cached.status})")
+        return cached
+
+    result = await _solve_in_pool(ctx, input_data, timeout_seconds, profile, publish)
+    await cache.put(key, result, ctx.get("redis"))
+    return result
+
+
+async def _solve_in_pool(
+    ctx: dict,
+    input_data: OptimizationInput,
+    timeout_seconds: int,
+    profile: SolverProfile | None,
+    publish: Callable[[OptimizationResult], Awaitable[None]] | None,
+) -> OptimizationResult:
+    loop = asyncio.get_running_loop()
+    manager = ctx.get("solution_manager")
+    if publish is None or manager is None:
+        return await loop.run_in_executor(
+            ctx["solver_pool"],
+            partial(solve_optimization, input_data, timeout_seconds, profile=profile),
+        )
+
+    # WHY: Queue của Manager là proxy picklable, đi qua được ranh giới process (spawn)
+    solutions = manager.Queue()
+    future = loop.run_in_executor(
+        ctx["solver_pool"],
+        partial(solve_optimization, input_data, timeout_seconds, profile=profile, on_solution=solutions.put),
+    )
+    while not future.done():
+        await asyncio.wait({future}, timeout=SOLUTION_POLL_SECONDS)
+        latest = await loop.run_in_executor(None, _latest_solution, solutions)
+        if latest is not None and not future.done():
+            await publish(latest)
+    return future.result()
+
+
+async def record_solver_run(
+    session: AsyncSession,
+    result: OptimizationResult,
+    input_data: OptimizationInput,
+    booking_id: UUID | None = None,
+    target_date: date | None = None,
+    mode: OptimizationMode | None = None,
+):
+    """
+    Lưu telemetry của lần giải (mode mặc định theo input_data).
+
+    WHY: Telemetry không được làm hỏng job - lỗi ghi chỉ được log lại.
+    """
+    from app.modules.system.service import system_service
+
+    try:
+        await system_service.record_solver_run(
+            session,
+            result,
+            mode or input_data.mode,
+            len(input_data.services),
+            booking_id=booking_id,
+            target_date=target_date,
+        )
+    except Exception as e:
+        await session.rollback()
+        print(f"⚠️ Failed to record solver telemetry: {e}")
+
+
+async def solve_neighbourhood(
+    ctx: dict,
+    session: AsyncSession,
+    input_data: OptimizationInput,
+    booking_ids: set[UUID],
+    work_date: date,
+    timeout_seconds: int,
+    profile: SolverProfile,
+    mode: OptimizationMode,
+) -> tuple[OptimizationResult, set[UUID]]:
+    """
+    Giải lại `booking_ids` của ngày, phần còn lại giữ nguyên lịch đã lưu; lưu kết quả + telemetry.
+    Trả về kết quả và các booking thực sự được giải.
+
+    WHY: Lịch cố định của phần còn lại không chừa đủ chỗ -> giải lại cả ngày.
+    """
+    from app.modules.bookings import service as booking_service
+    from app.modules.bookings.optimizer.repair import repair_input
+
+    solved_input = repair_input(input_data, booking_ids)
+    result = await run_solver(ctx, solved_input, timeout_seconds, profile)
+
+    if not result.success:
+        print(f"↩️ Neighbourhood {result.status}, falling back to full day solve")
+        booking_ids = {b.booking_id for b in input_data.bookings}
+        solved_input = input_data
+        result = await run_solver(ctx, input_data, timeout_seconds, profile)
+
+    await booking_service.update_day_optimization_result(
+        session,
+        list(booking_ids),
+        result.status,
+        result.message,
+        result.assigned_items if result.success else [],
+    )
+    await record_solver_run(session, result, solved_input, target_date=work_date, mode=mode)
+    return result, booking_ids
 
 
 async def startup(ctx: dict):
@@ -24,7 +205,6 @@ async def startup(ctx: dict):
     import app.core.models  # noqa: F401
 
     # WHY: Tạo DB session factory để dùng trong các job
-    from sqlalchemy.ext.asyncio import async_sessionmaker
     ctx["session_factory"] = async_sessionmaker(
         engine,
         class_=AsyncSession,
@@ -33,23 +213,62 @@ async def startup(ctx: dict):
 
     print("✅ Database session factory initialized")
 
+    ctx["solver_pool"] = create_solver_pool()
+    print(f"✅ Solver process pool initialized ({solver_pool_size()} processes)")
+
+    from app.modules.bookings.optimizer.skill_cache import SkillCatalogCache
+    ctx["skill_cache"] = SkillCatalogCache()
+
+    if settings.OPTIMIZER_SOLVE_CACHE_SIZE > 0:
+        from app.modules.bookings.optimizer.memo import SolveCache
+        ctx["solve_cache"] = SolveCache(
+            max_entries=settings.OPTIMIZER_SOLVE_CACHE_SIZE,
+            ttl_seconds=settings.OPTIMIZER_SOLVE_CACHE_TTL_SECONDS,
+            use_redis=settings.OPTIMIZER_SOLVE_CACHE_REDIS,
+        )
+        print(f"✅ Solve cache enabled ({settings.OPTIMIZER_SOLVE_CACHE_SIZE} entries)")
+
+    if settings.OPTIMIZER_STREAM_SOLUTIONS:
+        ctx["solution_manager"] = multiprocessing.get_context("spawn").Manager()
+        print("✅ Solution streaming enabled")
+
 
 async def shutdown(ctx: dict):
     """Cleanup khi worker shutdown."""
     print("🛑 ARQ Worker shutting down...")
 
+    # WHY: Hủy các solve chưa bắt đầu, chờ solve đang chạy kết thúc.
+    # Chờ trong thread: với InProcessQueue hook này chạy trên event loop của API
+    loop = asyncio.get_running_loop()
+    solver_pool: ProcessPoolExecutor | None = ctx.get("solver_pool")
+    if solver_pool:
+        await loop.run_in_executor(None, partial(solver_pool.shutdown, wait=True, cancel_futures=True))
+        print("✅ Solver process pool closed")
+
+    solve_cache = ctx.get("solve_cache")
+    if solve_cache:
+        print(f"📊 Solve cache: {solve_cache.hits} hits / {solve_cache.misses} misses")
+
+    solution_manager = ctx.get("solution_manager")
+    if solution_manager:
+        await loop.run_in_executor(None, solution_manager.shutdown)
+
     # Dispose engine connections
     await engine.dispose()
     print("✅ Database connections closed")
 
 
-async def optimize_booking(ctx: dict, booking_id: str):
+async def optimize_booking(
+    ctx: dict, booking_id: str, timeout_seconds: int = 30, profile: dict | None = None
+):
     """
     Job chính: Tối ưu hóa phân bổ Staff + Resource cho một booking.
 
     Args:
         ctx: ARQ context chứa session_factory từ startup
         booking_id: UUID của booking cần optimize
+        timeout_seconds: Giới hạn cứng thời gian giải
+        profile: SolverProfile (dạng dict) - None = suy ra từ kích thước model
     """
     print(f"⚙️ Starting optimization for booking: {booking_id}")
 
@@ -57,10 +276,14 @@ async def optimize_booking(ctx: dict, booking_id: str):
 
     try:
         async with session_factory() as session:
-            # Import models
-            from app.modules.bookings.models import Booking, BookingItem
             from app.modules.bookings import service as booking_service
-            from sqlmodel import select
+            from app.modules.bookings.optimizer.input_builder import build_booking_input
+            from app.modules.bookings.optimizer.memo import (
+                SOLVED_STATUSES,
+                problem_fingerprint,
+                read_solved_fingerprint,
+                store_solved_fingerprint,
+            )
 
             # 1. Load booking với items (đã eager loaded)
             booking = await booking_service.get_booking_by_id(session, UUID(booking_id))
@@ -74,56 +297,514 @@ async def optimize_booking(ctx: dict, booking_id: str):
 
             print(f"📦 Found {len(booking.items)} items in booking")
 
-            # 2. Đơn giản hóa: Cập nhật optimization status mà không chạy solver
-            # WHY: Test flow trước, sau đó mới tích hợp solver
-            from datetime import datetime, timezone
+            # 2. Dựng input (picklable) và giải trong process pool
+            skills = await ctx["skill_cache"].get(session, ctx.get("redis"))
+            input_data = await build_booking_input(session, booking, skills=skills)
+            solver_profile = SolverProfile.model_validate(profile or {})
+
+            # WHY: Job trùng (trigger lại, retry) với input y như lần giải thành công trước -> bỏ qua
+            fingerprint = problem_fingerprint(input_data, timeout_seconds, solver_profile, ignore_assignments=True)
+            already_scheduled = booking.optimization_status in SOLVED_STATUSES and all(
+                item.scheduled_start for item in booking.items
+            )
+            if already_scheduled and await read_solved_fingerprint(ctx.get("redis"), booking.id) == fingerprint:
+                print(f"⏭️ Booking {booking_id} unchanged since last solve, skipping")
+                return {"success": True, "status": "UNCHANGED", "message": "Input không đổi so với lần giải trước"}
+
+            async def publish(intermediate: OptimizationResult):
+                # WHY: Khách nhận xác nhận ngay từ nghiệm đầu tiên; lỗi lưu nghiệm tạm không làm hỏng job
+                try:
+                    await booking_service.update_booking_optimization_result(
+                        session, booking.id, intermediate.status, intermediate.message, intermediate.assigned_items
+                    )
+                    print(f"📤 Published intermediate solution for booking {booking_id}")
+                except Exception as e:
+                    await session.rollback()
+                    print(f"⚠️ Failed to publish intermediate solution: {e}")
+
+            result = await run_solver(ctx, input_data, timeout_seconds, solver_profile, publish)
+
+            # 3. Lưu kết quả và telemetry của solver
+            await booking_service.update_booking_optimization_result(
+                session,
+                booking.id,
+                result.status,
+                result.message,
+                result.assigned_items if result.success else [],
+            )
+            await record_solver_run(session, result, input_data, booking_id=booking.id)
+            if result.success:
+                await store_solved_fingerprint(
+                    ctx.get("redis"), booking.id, fingerprint, settings.OPTIMIZER_SOLVE_CACHE_TTL_SECONDS
+                )
+
+            print(f"✅ Optimization completed for booking: {booking_id} ({result.status}, {result.engine})")
+
+            return {
+                "success": result.success,
+                "status": result.status,
+                "engine": result.engine,
+                "message": result.message,
+                "solve_time_ms": result.solve_time_ms,
+            }
+
+    except Exception as e:
+        print(f"❌ Error during optimization: {e}")
+        return {"success": False, "error": str(e)}
+
 
-            booking.optimization_status = "FEASIBLE"
-            booking.optimization_message = "Đã xử lý thành công (simplified test)"
-            booking.optimized_at = datetime.now(timezone.utc)
-            booking.status = "CONFIRMED"
+async def optimize_day(ctx: dict, target_date: str, profile: dict | None = None):
+    """
+    Job tối ưu chung: Giải một CP-SAT model cho mọi booking PENDING/CONFIRMED trong ngày.
 
-            session.add(booking)
-            await session.commit()
+    WHY: Các booking dùng chung no-overlap cho staff/resource nên lựa chọn
+    của booking trước có thể được sắp xếp lại, tăng tỉ lệ sử dụng giường/KTV.
 
-            print(f"✅ Optimization completed for booking: {booking_id}")
+    Args:
+        ctx: ARQ context chứa session_factory từ startup
+        target_date: Ngày cần optimize (ISO format YYYY-MM-DD)
+        profile: SolverProfile (dạng dict) - None = suy ra từ kích thước model
+    """
+    print(f"⚙️ Starting day optimization for: {target_date}")
+
+    session_factory = ctx["session_factory"]
+
+    try:
+        async with session_factory() as session:
+            from app.modules.bookings import service as booking_service
+            from app.modules.bookings.optimizer.input_builder import build_day_input
+
+            skills = await ctx["skill_cache"].get(session, ctx.get("redis"))
+            input_data = await build_day_input(session, date.fromisoformat(target_date), skills=skills)
+            if not input_data:
+                print(f"📭 No bookings to optimize on {target_date}")
+                return {"success": True, "status": "EMPTY", "bookings": 0}
+
+            print(f"📦 Solving {len(input_data.bookings)} bookings / {len(input_data.services)} items")
+
+            booking_ids = [b.booking_id for b in input_data.bookings]
+
+            async def publish(intermediate: OptimizationResult):
+                try:
+                    await booking_service.update_day_optimization_result(
+                        session, booking_ids, intermediate.status, intermediate.message, intermediate.assigned_items
+                    )
+                    print(f"📤 Published intermediate solution for {target_date}")
+                except Exception as e:
+                    await session.rollback()
+                    print(f"⚠️ Failed to publish intermediate solution: {e}")
+
+            result = await run_solver(
+                ctx, input_data, profile=SolverProfile.model_validate(profile or {}), publish=publish
+            )
+
+            await booking_service.update_day_optimization_result(
+                session,
+                booking_ids,
+                result.status,
+                result.message,
+                result.assigned_items if result.success else [],
+            )
+            await record_solver_run(session, result, input_data, target_date=date.fromisoformat(target_date))
+
+            print(f"✅ Day optimization completed for {target_date}: {result.status}")
 
             return {
-                "success": True,
-                "status": "FEASIBLE",
-                "message": "Test optimization completed",
+                "success": result.success,
+                "status": result.status,
+                "bookings": len(input_data.bookings),
+                "solve_time_ms": result.solve_time_ms,
             }
 
     except Exception as e:
-        print(f"❌ Error during optimization: {e}")
+        print(f"❌ Error during day optimization: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def optimize_week(ctx: dict, start_date: str, days: int = 7, profile: dict | None = None):
+    """
+    Job cân bằng lại nhiều ngày: rolling horizon + LNS (xem optimizer/rolling.py).
+
+    Args:
+        ctx: ARQ context chứa session_factory từ startup
+        start_date: Ngày đầu tiên (ISO format YYYY-MM-DD)
+        days: Số ngày liên tiếp
+        profile: SolverProfile (dạng dict) cho các cửa sổ rolling
+    """
+    print(f"⚙️ Starting week optimization from {start_date} ({days} days)")
+
+    session_factory = ctx["session_factory"]
+    first_day = date.fromisoformat(start_date)
+
+    try:
+        async with session_factory() as session:
+            from app.modules.bookings import service as booking_service
+            from app.modules.bookings.optimizer.input_builder import build_day_input
+
+            skills = await ctx["skill_cache"].get(session, ctx.get("redis"))
+            day_inputs = []
+            for offset in range(days):
+                day_input = await build_day_input(session, first_day + timedelta(days=offset), skills=skills)
+                if day_input:
+                    day_inputs.append(day_input)
+            if not day_inputs:
+                print(f"📭 No bookings to optimize from {start_date}")
+                return {"success": True, "status": "EMPTY", "bookings": 0}
+
+            booking_ids = [b.booking_id for d in day_inputs for b in d.bookings]
+            print(f"📦 Solving {len(booking_ids)} bookings over {len(day_inputs)} days")
+
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                ctx["solver_pool"],
+                partial(solve_rolling_week, day_inputs, profile=SolverProfile.model_validate(profile or {})),
+            )
+
+            await booking_service.update_day_optimization_result(
+                session,
+                booking_ids,
+                result.status,
+                result.message,
+                result.assigned_items if result.success else [],
+            )
+            await record_solver_run(
+                session, result, merge_day_inputs(day_inputs), target_date=first_day, mode=OptimizationMode.WEEK
+            )
+
+            print(f"✅ Week optimization completed from {start_date}: {result.status}")
+
+            return {
+                "success": result.success,
+                "status": result.status,
+                "bookings": len(booking_ids),
+                "solve_time_ms": result.solve_time_ms,
+            }
+
+    except Exception as e:
+        print(f"❌ Error during week optimization: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def repair_schedule(
+    ctx: dict,
+    target_date: str | None = None,
+    cancelled_booking_id: str | None = None,
+):
+    """
+    Job sửa lịch sau gián đoạn: chỉ xếp lại booking bị ảnh hưởng (xem optimizer/repair.py).
+
+    Args:
+        ctx: ARQ context chứa session_factory từ startup
+        target_date: Ngày cần sửa (ISO format) - mặc định theo booking bị hủy
+        cancelled_booking_id: Booking vừa bị hủy - staff/resource của nó được giải phóng
+
+    WHY: Ca bị hủy không cần tham số riêng - staff không còn trong input nên item của
+    họ tự được nhận ra là "hỏng".
+    """
+    print(f"🩹 Starting schedule repair: date={target_date} cancelled_booking={cancelled_booking_id}")
+
+    session_factory = ctx["session_factory"]
+
+    try:
+        async with session_factory() as session:
+            from app.modules.bookings import service as booking_service
+            from app.modules.bookings.optimizer.input_builder import build_day_input, load_item_resource_usages
+            from app.modules.bookings.optimizer.repair import REPAIR_TIMEOUT_SECONDS, repair_neighbourhood
+
+            freed = []
+            work_date = date.fromisoformat(target_date) if target_date else None
+            if cancelled_booking_id:
+                cancelled = await booking_service.get_booking_by_id(session, UUID(cancelled_booking_id))
+                if cancelled:
+                    work_date = work_date or cancelled.preferred_date.date()
+                    resource_usages = await load_item_resource_usages(session, cancelled.items)
+                    for item in cancelled.items:
+                        if item.scheduled_start is None or item.scheduled_end is None:
+                            continue
+                        if item.assigned_staff_id:
+                            freed.append((item.assigned_staff_id, item.scheduled_start, item.scheduled_end))
+                        freed.extend(resource_usages[item.id])
+            if work_date is None:
+                return {"success": False, "error": "Không xác định được ngày cần sửa"}
+
+            skills = await ctx["skill_cache"].get(session, ctx.get("redis"))
+            input_data = await build_day_input(session, work_date, skills=skills)
+            booking_ids = repair_neighbourhood(input_data, freed) if input_data else set()
+            if not booking_ids:
+                print(f"📭 Nothing to repair on {work_date}")
+                return {"success": True, "status": "EMPTY", "bookings": 0}
+
+            print(f"📦 Repairing {len(booking_ids)}/{len(input_data.bookings)} bookings on {work_date}")
+            result, booking_ids = await solve_neighbourhood(
+                ctx,
+                session,
+                input_data,
+                booking_ids,
+                work_date,
+                REPAIR_TIMEOUT_SECONDS,
+                SolverProfile(priority=SolverPriority.INTERACTIVE),
+                OptimizationMode.REPAIR,
+            )
+
+            print(f"✅ Schedule repair completed for {work_date}: {result.status}")
+
+            return {
+                "success": result.success,
+                "status": result.status,
+                "bookings": len(booking_ids),
+                "solve_time_ms": result.solve_time_ms,
+            }
+
+    except Exception as e:
+        print(f"❌ Error during schedule repair: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def optimize_batch(ctx: dict, target_date: str):
+    """
+    Job gộp (xem optimizer/coalesce.py): xếp một lần mọi booking mới của ngày được tạo
+    trong cửa sổ debounce, các booking đã xếp giữ nguyên lịch.
+
+    Args:
+        ctx: ARQ context chứa session_factory từ startup
+        target_date: Ngày cần optimize (ISO format YYYY-MM-DD)
+
+    WHY: Booking mới là item chưa xếp - repair_neighbourhood nhận ra chúng như item "hỏng".
+    """
+    print(f"⚙️ Starting batched optimization for: {target_date}")
+
+    session_factory = ctx["session_factory"]
+
+    try:
+        async with session_factory() as session:
+            from app.modules.bookings.optimizer.input_builder import build_day_input
+            from app.modules.bookings.optimizer.repair import repair_neighbourhood
+
+            work_date = date.fromisoformat(target_date)
+            skills = await ctx["skill_cache"].get(session, ctx.get("redis"))
+            input_data = await build_day_input(session, work_date, skills=skills)
+            booking_ids = repair_neighbourhood(input_data) if input_data else set()
+            if not booking_ids:
+                print(f"📭 No new bookings to optimize on {target_date}")
+                return {"success": True, "status": "EMPTY", "bookings": 0}
+
+            print(f"📦 Batching {len(booking_ids)}/{len(input_data.bookings)} bookings on {target_date}")
+            result, booking_ids = await solve_neighbourhood(
+                ctx,
+                session,
+                input_data,
+                booking_ids,
+                work_date,
+                settings.OPTIMIZER_BATCH_TIMEOUT_SECONDS,
+                SolverProfile(),
+                OptimizationMode.BATCH,
+            )
+
+            print(f"✅ Batched optimization completed for {target_date}: {result.status}")
+
+            return {
+                "success": result.success,
+                "status": result.status,
+                "bookings": len(booking_ids),
+                "solve_time_ms": result.solve_time_ms,
+            }
+
+    except Exception as e:
+        print(f"❌ Error during batched optimization: {e}")
         return {"success": False, "error": str(e)}
 
 
 # WHY: WorkerSettings class theo chuẩn ARQ
 # ARQ CLI sẽ tìm class này: arq app.worker.WorkerSettings
 class WorkerSettings:
-    """Cấu hình ARQ Worker."""
-
-    functions = [optimize_booking]
+    """Cấu hình ARQ Worker (queue mặc định)."""
+
+    # WHY: optimize_booking không giữ kết quả - job id xác định (coalesce.booking_job_id) chỉ
+    # chặn job trùng đang chờ / đang chạy; sau khi xong, job trùng tự bỏ qua nếu input không đổi
+    functions = [
+        func(optimize_booking, keep_result=0),
+        optimize_day,
+        optimize_week,
+        repair_schedule,
+        optimize_batch,
+    ]
     on_startup = startup
     on_shutdown = shutdown
 
     # WHY: ARQ cần redis_settings là attribute, không phải method
-    redis_settings = get_redis_settings()
+    # Không có Redis -> job chạy in-process trong API (get_job_queue), module vẫn import được
+    redis_settings = get_redis_settings() if settings.UPSTASH_REDIS_URL else None
 
     # Cấu hình worker
+    # WHY: Job chủ yếu await process pool nên max_jobs có thể lớn hơn số process
     max_jobs = 10  # Số job tối đa chạy đồng thời
     job_timeout = 300  # 5 phút timeout cho mỗi job
     keep_result = 3600  # Giữ kết quả 1 giờ
     poll_delay = 0.5  # Poll interval (giây)
+    queue_name = default_queue_name
 
 
-async def enqueue_optimization_job(booking_id: UUID):
+class InteractiveWorkerSettings(WorkerSettings):
+    """
+    Worker của queue interactive (xem optimizer/queues.py): chỉ nhận booking có khách chờ tại quầy.
+
+    WHY: Process pool riêng (OPTIMIZER_POOL_SIZE đặt theo từng process) và ít job đồng thời
+    hơn để mỗi solve có CPU ngay, không phải chờ sau backlog ONLINE.
+    """
+
+    queue_name = settings.OPTIMIZER_INTERACTIVE_QUEUE or WorkerSettings.queue_name
+    max_jobs = 4
+    poll_delay = 0.1
+
+
+_in_process_queue: InProcessQueue | None = None
+
+
+def in_process_queue() -> InProcessQueue:
+    """Queue in-process dùng chung của API (tạo khi cần), cùng job và giới hạn max_jobs với worker ARQ."""
+    global _in_process_queue
+    if _in_process_queue is None:
+        _in_process_queue = InProcessQueue(
+            WorkerSettings.functions,
+            on_startup=startup,
+            on_shutdown=shutdown,
+            # WHY: Queue interactive tắt thì trùng tên queue mặc định - giới hạn của WorkerSettings thắng
+            max_jobs={
+                InteractiveWorkerSettings.queue_name: InteractiveWorkerSettings.max_jobs,
+                WorkerSettings.queue_name: WorkerSettings.max_jobs,
+            },
+        )
+    return _in_process_queue
+
+
+async def close_in_process_queue():
+    """Gọi khi API shutdown: hủy job in-process còn lại, đóng process pool."""
+    global _in_process_queue
+    if _in_process_queue is not None:
+        await _in_process_queue.close()
+        _in_process_queue = None
+
+
+async def get_job_queue(redis: ArqRedis | None = None) -> JobQueue:
+    """
+    Backend chạy job: ARQ (pool `redis` hoặc redis_pool) khi có UPSTASH_REDIS_URL,
+    ngược lại queue in-process (core/job_queue.py).
+
+    WHY: Có cấu hình Redis mà không kết nối được thì vẫn raise - không âm thầm chạy
+    job trong API của deploy nhiều node.
+    """
+    if redis is not None:
+        return redis
+    if settings.UPSTASH_REDIS_URL:
+        return await redis_pool.get()
+    return in_process_queue()
+
+
+async def enqueue_optimization_job(
+    booking_id: UUID,
+    timeout_seconds: int = 30,
+    profile: SolverProfile | None = None,
+    redis: ArqRedis | None = None,
+    version: str | None = None,
+    queue_name: str | None = None,
+):
     """
     Helper function để enqueue job từ FastAPI.
     Được gọi từ booking router sau khi tạo booking.
+
+    WHY: Profile đi qua Redis dưới dạng dict JSON thay vì pickle model Pydantic.
+    `redis`: pool dùng chung của API (get_redis); None -> get_job_queue.
+    `version`: optimization_version(booking) - có version thì job id xác định, job trùng
+    đang chờ / đang chạy không bị enqueue lại (trả về None).
+    `queue_name`: queues.queue_for(booking.source) - None = queue mặc định.
     """
-    redis = await create_pool(get_redis_settings())
-    job = await redis.enqueue_job("optimize_booking", str(booking_id))
-    await redis.close()
+    from app.modules.bookings.optimizer.coalesce import booking_job_id
+
+    job_queue = await get_job_queue(redis)
+    job = await job_queue.enqueue_job(
+        "optimize_booking",
+        str(booking_id),
+        timeout_seconds,
+        profile.model_dump(mode="json") if profile else None,
+        _job_id=booking_job_id(booking_id, version, timeout_seconds, profile) if version else None,
+        _queue_name=queue_name,
+    )
     return job
+
+
+async def enqueue_day_optimization_job(
+    target_date: date, profile: SolverProfile | None = None, redis: ArqRedis | None = None
+):
+    """Enqueue job tối ưu chung cho toàn bộ booking trong một ngày."""
+    job_queue = await get_job_queue(redis)
+    job = await job_queue.enqueue_job(
+        "optimize_day", target_date.isoformat(), profile.model_dump(mode="json") if profile else None
+    )
+    return job
+
+
+async def enqueue_week_optimization_job(
+    start_date: date, days: int = 7, profile: SolverProfile | None = None, redis: ArqRedis | None = None
+):
+    """Enqueue job cân bằng lại nhiều ngày liên tiếp."""
+    job_queue = await get_job_queue(redis)
+    job = await job_queue.enqueue_job(
+        "optimize_week", start_date.isoformat(), days, profile.model_dump(mode="json") if profile else None
+    )
+    return job
+
+
+async def enqueue_repair_job(
+    target_date: date | None = None,
+    cancelled_booking_id: UUID | None = None,
+    redis: ArqRedis | None = None,
+):
+    """Enqueue job sửa lịch sau khi hủy booking hoặc hủy ca của staff."""
+    job_queue = await get_job_queue(redis)
+    job = await job_queue.enqueue_job(
+        "repair_schedule",
+        target_date.isoformat() if target_date else None,
+        str(cancelled_booking_id) if cancelled_booking_id else None,
+    )
+    return job
+
+
+async def enqueue_new_booking_job(booking: Booking, redis: ArqRedis | None = None):
+    """
+    Enqueue optimize cho booking vừa tạo: mặc định mỗi booking một job optimize_booking;
+    OPTIMIZER_COALESCE_WINDOW_SECONDS > 0 -> gộp theo ngày trong cửa sổ debounce.
+
+    Booking có khách chờ tại quầy (WALK_IN/RECEPTIONIST) không chờ cửa sổ: job riêng
+    trên queue interactive với profile INTERACTIVE.
+
+    Trả về None nếu booking đã được gộp vào job đang chờ của cửa sổ hiện tại.
+    """
+    from app.modules.bookings.optimizer.coalesce import (
+        coalesce_window_end,
+        coalesced_job_id,
+        optimization_version,
+    )
+    from app.modules.bookings.optimizer.queues import is_interactive, queue_for
+
+    if is_interactive(booking.source):
+        return await enqueue_optimization_job(
+            booking.id,
+            profile=SolverProfile(priority=SolverPriority.INTERACTIVE),
+            redis=redis,
+            version=optimization_version(booking),
+            queue_name=queue_for(booking.source),
+        )
+
+    window = settings.OPTIMIZER_COALESCE_WINDOW_SECONDS
+    if window <= 0:
+        return await enqueue_optimization_job(booking.id, redis=redis, version=optimization_version(booking))
+
+    target_date = booking.preferred_date.date()
+    run_at = coalesce_window_end(datetime.now(timezone.utc), window)
+    job_queue = await get_job_queue(redis)
+    return await job_queue.enqueue_job(
+        "optimize_batch",
+        target_date.isoformat(),
+        _job_id=coalesced_job_id(target_date, run_at),
+        _defer_until=run_at,
+    )
@@ -0,0 +1 @@
+"""Benchmarks - Đo hiệu năng các thành phần nặng (optimizer, ...)."""
@@ -0,0 +1,181 @@
+"""
+Synthetic Spa Day Generator - Sinh OptimizationInput (mode DAY) giống một ngày thực tế của spa.
+
+Mô hình:
+- Skill được gom theo "chuyên môn" (massage, facial, nail, ...), mỗi chuyên môn có một ResourceGroup
+- Dịch vụ: 30-120 phút, cần 1-2 skill cùng chuyên môn và resource của group tương ứng;
+  một phần dịch vụ chỉ dùng máy một đoạn giữa (start_delay/usage_duration)
+- Combo: chuỗi 1-3 dịch vụ; mỗi booking chọn một combo và khung giờ mong muốn 3-6 tiếng
+- Staff: 1-2 chuyên môn, làm ca sáng / chiều / cả ngày
+- Admission: như lễ tân thật, chỉ nhận booking khi còn xếp được (kiểm tra bằng greedy),
+  nên ngày sinh ra luôn khả thi - `bookings` là số yêu cầu đặt lịch, không phải số được nhận
+
+WHY: Cùng config + seed luôn sinh ra cùng input (kể cả UUID), để so sánh kết quả
+benchmark giữa các commit.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from app.modules.bookings.optimizer.heuristic import GreedyScheduler
+from app.modules.bookings.optimizer.solver import (
+    BookingWindow,
+    OptimizationInput,
+    ResourceAvailability,
+    ResourceRequirement,
+    ServiceData,
+    StaffAvailability,
+)
+from app.modules.bookings.schemas import OptimizationMode
+
+DAY_START = datetime(2026, 1, 6, 8, 0, tzinfo=timezone.utc)
+
+
+@dataclass(slots=True)
+class SpaDayConfig:
+    """Kích thước và seed của một ngày tổng hợp."""
+    staff: int = 20
+    skills: int = 12
+    resource_groups: int = 4
+    resources_per_group: int = 5
+    services: int = 16  # Số dịch vụ trong catalog
+    combos: int = 10
+    bookings: int = 40
+    open_hours: int = 12
+    slot_minutes: int = 5
+    preferred_staff_ratio: float = 0.2  # Tỉ lệ booking có yêu cầu KTV
+    seed: int = 42
+
+
+@dataclass(slots=True)
+class _CatalogService:
+    service_id: UUID
+    duration: int
+    buffer_time: int
+    skill_ids: set[UUID]
+    requirement: ResourceRequirement
+
+
+def deterministic_uuid(rng: random.Random) -> UUID:
+    """UUID deterministic theo seed."""
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def generate_spa_day(config: SpaDayConfig) -> OptimizationInput:
+    """Sinh input mode DAY theo config."""
+    rng = random.Random(config.seed)
+    day_end = DAY_START + timedelta(hours=config.open_hours)
+
+    # Chuyên môn = (skill_ids, group_id): skill chia đều cho các group
+    group_ids = [deterministic_uuid(rng) for _ in range(config.resource_groups)]
+    skill_ids = [deterministic_uuid(rng) for _ in range(config.skills)]
+    specialties = [
+        (skill_ids[idx::config.resource_groups], group_id)
+        for idx, group_id in enumerate(group_ids)
+    ]
+    specialties = [(skills, group_id) for skills, group_id in specialties if skills]
+
+    catalog = []
+    for _ in range(config.services):
+        skills, group_id = rng.choice(specialties)
+        duration = rng.choice([30, 45, 60, 60, 90, 120])
+        requirement = ResourceRequirement(group_id=group_id)
+        # WHY: ~1/4 dịch vụ dùng máy một đoạn giữa liệu trình (VD: HydraFacial)
+        if duration >= 60 and rng.random() < 0.25:
+            requirement.start_delay = rng.choice([10, 15, 20])
+            requirement.usage_duration = rng.choice([20, 30])
+        catalog.append(_CatalogService(
+            service_id=deterministic_uuid(rng),
+            duration=duration,
+            buffer_time=rng.choice([0, 5, 10, 15]),
+            skill_ids=set(rng.sample(skills, min(len(skills), rng.randint(1, 2)))),
+            requirement=requirement,
+        ))
+
+    combos = [rng.sample(catalog, rng.randint(1, min(3, len(catalog)))) for _ in range(config.combos)]
+
+    shifts = [
+        (DAY_START, DAY_START + timedelta(hours=config.open_hours // 2)),
+        (DAY_START + timedelta(hours=config.open_hours // 2), day_end),
+        (DAY_START, day_end),
+    ]
+    staff = []
+    for _ in range(config.staff):
+        chosen = rng.sample(specialties, min(len(specialties), rng.randint(1, 2)))
+        staff.append(StaffAvailability(
+            staff_id=deterministic_uuid(rng),
+            skill_ids={skill_id for skills, _ in chosen for skill_id in skills},
+            available_slots=[rng.choice(shifts)],
+        ))
+
+    resources = [
+        ResourceAvailability(
+            resource_id=deterministic_uuid(rng),
+            group_id=group_id,
+            available_slots=[(DAY_START, day_end)],
+        )
+        for group_id in group_ids
+        for _ in range(config.resources_per_group)
+    ]
+
+    day = OptimizationInput(
+        booking_id=None,
+        services=[],
+        available_staff=staff,
+        available_resources=resources,
+        time_window=(DAY_START, day_end),
+        mode=OptimizationMode.DAY,
+        bookings=[],
+        slot_minutes=config.slot_minutes,
+    )
+    for _ in range(config.bookings):
+        booking_id = deterministic_uuid(rng)
+        combo = rng.choice(combos)
+        total = sum(s.duration + s.buffer_time for s in combo)
+
+        # Khung giờ mong muốn: đủ chứa combo, dài 3-6 tiếng, nằm trong giờ mở cửa
+        length = min(config.open_hours * 60, max(total, rng.randint(3, 6) * 60))
+        offset = rng.randrange(0, config.open_hours * 60 - length + 1, 15)
+        window_start = DAY_START + timedelta(minutes=offset)
+        eligible_staff = [
+            s.staff_id for s in staff if combo[0].skill_ids <= s.skill_ids
+        ]
+        preferred = (
+            rng.choice(eligible_staff)
+            if eligible_staff and rng.random() < config.preferred_staff_ratio else None
+        )
+        booking = BookingWindow(
+            booking_id=booking_id,
+            time_window=(window_start, window_start + timedelta(minutes=length)),
+            preferred_staff_id=preferred,
+        )
+        items = [
+            ServiceData(
+                item_id=deterministic_uuid(rng),
+                service_id=service.service_id,
+                duration=service.duration,
+                buffer_time=service.buffer_time,
+                required_skill_ids=set(service.skill_ids),
+                required_resource_group_ids={service.requirement.group_id},
+                sequence_order=order,
+                booking_id=booking_id,
+                resource_requirements=[ResourceRequirement(
+                    group_id=service.requirement.group_id,
+                    quantity=service.requirement.quantity,
+                    start_delay=service.requirement.start_delay,
+                    usage_duration=service.requirement.usage_duration,
+                )],
+            )
+            for order, service in enumerate(combo, start=1)
+        ]
+
+        # WHY: Greedy xếp booking theo thứ tự nhận nên các booking đã nhận luôn xếp
+        # được như cũ - thất bại nghĩa là booking mới không còn chỗ
+        day.services.extend(items)
+        day.bookings.append(booking)
+        if GreedyScheduler(day).solve() is None:
+            del day.services[-len(items):]
+            day.bookings.pop()
+
+    return day
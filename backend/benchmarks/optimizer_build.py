@@ -0,0 +1,105 @@
+"""
+Benchmark thời gian dựng CP-SAT model của BookingOptimizer.
+
+Chạy với: python -m benchmarks.optimizer_build
+Hoặc: python -m benchmarks.optimizer_build --items 500 --staff 100 --repeat 3
+
+WHY: Chỉ đo bước build (variables + constraints + objective), không gọi solver,
+để phát hiện regression độ phức tạp của model builder.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.modules.bookings.optimizer.solver import (
+    BookingOptimizer,
+    OptimizationInput,
+    ResourceAvailability,
+    ServiceData,
+    StaffAvailability,
+)
+from benchmarks.generator import deterministic_uuid as _uuid
+
+
+def build_input(
+    items: int,
+    staff: int,
+    skills: int = 12,
+    resource_groups: int = 6,
+    resources_per_group: int = 8,
+    seed: int = 42,
+) -> OptimizationInput:
+    """Tạo input tổng hợp: mỗi service cần 1-2 skill và 1 resource group."""
+    rng = random.Random(seed)
+    day_start = datetime(2026, 1, 6, 8, 0, tzinfo=timezone.utc)
+    day_end = day_start + timedelta(hours=12)
+
+    skill_ids = [_uuid(rng) for _ in range(skills)]
+    group_ids = [_uuid(rng) for _ in range(resource_groups)]
+
+    staff_list = [
+        StaffAvailability(
+            staff_id=_uuid(rng),
+            skill_ids=set(rng.sample(skill_ids, rng.randint(2, 5))),
+            available_slots=[(day_start, day_end)],
+        )
+        for _ in range(staff)
+    ]
+    resources = [
+        ResourceAvailability(
+            resource_id=_uuid(rng),
+            group_id=group_id,
+            available_slots=[(day_start, day_end)],
+        )
+        for group_id in group_ids
+        for _ in range(resources_per_group)
+    ]
+    services = [
+        ServiceData(
+            item_id=_uuid(rng),
+            service_id=_uuid(rng),
+            duration=rng.choice([30, 45, 60, 90]),
+            buffer_time=rng.choice([0, 5, 10, 15]),
+            required_skill_ids=set(rng.sample(skill_ids, rng.randint(1, 2))),
+            required_resource_group_ids={rng.choice(group_ids)},
+            sequence_order=idx + 1,
+        )
+        for idx in range(items)
+    ]
+
+    return OptimizationInput(
+        booking_id=_uuid(rng),
+        services=services,
+        available_staff=staff_list,
+        available_resources=resources,
+        time_window=(day_start, day_end),
+        preferred_staff_id=staff_list[0].staff_id if staff_list else None,
+    )
+
+
+def run(items: int, staff: int, repeat: int) -> list[float]:
+    """Đo thời gian build (ms) qua nhiều lần lặp."""
+    input_data = build_input(items, staff)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        BookingOptimizer(input_data).build()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BookingOptimizer model build")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--staff", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    timings = run(args.items, args.staff, args.repeat)
+    print(f"📐 Build {args.items} items × {args.staff} staff ({args.repeat} lần)")
+    print(f"   min={min(timings):.1f} ms  max={max(timings):.1f} ms  avg={sum(timings) / len(timings):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
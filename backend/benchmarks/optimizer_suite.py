@@ -0,0 +1,134 @@
+"""
+Benchmark suite cho BookingOptimizer - đo build + solve trên các ngày tổng hợp nhiều kích thước.
+
+Chạy với: python -m benchmarks.optimizer_suite
+Hoặc: python -m benchmarks.optimizer_suite --sizes small medium --seeds 1 2 3 --timeout 10
+So sánh: python -m benchmarks.optimizer_suite --compare benchmarks/results/<baseline>.json
+
+Kết quả ghi ra JSON (mặc định benchmarks/results/<timestamp>_<commit>.json) để so sánh giữa các commit.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+from dataclasses import asdict, replace
+from datetime import datetime, timezone
+from pathlib import Path
+
+from ortools import __version__ as ortools_version
+
+from app.modules.bookings.optimizer.solver import BookingOptimizer
+from benchmarks.generator import SpaDayConfig, generate_spa_day
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+SIZES: dict[str, SpaDayConfig] = {
+    "small": SpaDayConfig(staff=6, skills=6, resource_groups=3, resources_per_group=2, bookings=10),
+    "medium": SpaDayConfig(staff=20, skills=12, resource_groups=4, resources_per_group=5, bookings=40),
+    "large": SpaDayConfig(staff=60, skills=20, resource_groups=6, resources_per_group=10, bookings=160),
+}
+
+
+def _git_commit() -> str | None:
+    """Commit hiện tại (None nếu không chạy trong git repo)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(size: str, config: SpaDayConfig, timeout: int) -> dict:
+    """Đo một (size, seed): build model riêng, rồi solve trên optimizer mới."""
+    input_data = generate_spa_day(config)
+
+    started = time.perf_counter()
+    BookingOptimizer(input_data, timeout).build()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    result = BookingOptimizer(input_data, timeout).solve()
+    solve_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "size": size,
+        "seed": config.seed,
+        "items": len(input_data.services),
+        "bookings": len(input_data.bookings),
+        "staff": len(input_data.available_staff),
+        "resources": len(input_data.available_resources),
+        "build_ms": round(build_ms, 2),
+        "solve_ms": round(solve_ms, 2),
+        "status": result.status,
+        "stats": result.stats.model_dump() if result.stats else None,
+    }
+
+
+def run_suite(sizes: list[str], seeds: list[int], timeout: int) -> dict:
+    """Chạy mọi (size, seed) và gom kèm metadata môi trường."""
+    cases = []
+    for size in sizes:
+        for seed in seeds:
+            case = run_case(size, replace(SIZES[size], seed=seed), timeout)
+            print(
+                f"   {size:<7} seed={seed:<4} items={case['items']:<4} "
+                f"build={case['build_ms']:>8.1f} ms  solve={case['solve_ms']:>9.1f} ms  {case['status']}"
+            )
+            cases.append(case)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "ortools": ortools_version,
+        "machine": platform.machine(),
+        "timeout_seconds": timeout,
+        "configs": {size: asdict(SIZES[size]) for size in sizes},
+        "cases": cases,
+    }
+
+
+def compare(baseline: dict, current: dict):
+    """In tỉ lệ build/solve hiện tại so với baseline theo từng (size, seed)."""
+    base_cases = {(c["size"], c["seed"]): c for c in baseline["cases"]}
+    print(f"📊 So với {baseline.get('commit') or 'baseline'} ({baseline['created_at']})")
+    for case in current["cases"]:
+        base = base_cases.get((case["size"], case["seed"]))
+        if not base:
+            continue
+        build_ratio = case["build_ms"] / base["build_ms"] if base["build_ms"] else float("inf")
+        solve_ratio = case["solve_ms"] / base["solve_ms"] if base["solve_ms"] else float("inf")
+        print(
+            f"   {case['size']:<7} seed={case['seed']:<4} build ×{build_ratio:.2f}  solve ×{solve_ratio:.2f}  "
+            f"{base['status']} -> {case['status']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite BookingOptimizer (build + solve)")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[1, 2, 3])
+    parser.add_argument("--timeout", type=int, default=10, help="Giới hạn thời gian solve (giây)")
+    parser.add_argument("--output", type=Path, help="File JSON kết quả")
+    parser.add_argument("--compare", type=Path, help="File JSON baseline để so sánh")
+    args = parser.parse_args()
+
+    print(f"🏁 Optimizer suite: sizes={args.sizes} seeds={args.seeds} timeout={args.timeout}s")
+    report = run_suite(args.sizes, args.seeds, args.timeout)
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"{stamp}_{report['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"💾 Saved {output}")
+
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Replay snapshot CpModel - giải lại lần giải chậm từ production với tham số khác và so sánh thời gian.
+
+Chạy với: python -m benchmarks.replay snapshots/<file>.snapshot.gz
+Hoặc: python -m benchmarks.replay snapshots/*.snapshot.gz --workers 1 4 8 --gaps 0 0.01 --timeout 30
+Dựng lại model bằng code hiện tại (thay vì model đã lưu): thêm --rebuild
+
+Snapshot được ghi khi bật OPTIMIZER_SNAPSHOT_DIR (xem app/modules/bookings/optimizer/snapshot.py).
+"""
+import argparse
+import itertools
+from pathlib import Path
+
+from ortools.sat.python import cp_model
+
+from app.modules.bookings.optimizer.params import SearchParameters
+from app.modules.bookings.optimizer.snapshot import ModelSnapshot, load_snapshot
+from app.modules.bookings.optimizer.solver import BookingOptimizer
+
+
+def replay(snapshot: ModelSnapshot, search: SearchParameters, rebuild: bool = False) -> dict:
+    """Giải model của snapshot với `search`, trả về status/thời gian/objective."""
+    if rebuild:
+        optimizer = BookingOptimizer(snapshot.input, int(search.max_time_seconds))
+        optimizer.build()
+        model = optimizer.model
+    else:
+        model = snapshot.load_model()
+
+    solver = cp_model.CpSolver()
+    search.apply(solver)
+    status = solver.Solve(model)
+    has_solution = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+    return {
+        "status": solver.StatusName(status),
+        "solve_ms": solver.WallTime() * 1000,
+        "objective": solver.ObjectiveValue() if has_solution and model.HasObjective() else None,
+        "bound": solver.BestObjectiveBound() if has_solution and model.HasObjective() else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay snapshot CpModel với các tham số khác nhau")
+    parser.add_argument("snapshots", nargs="+", type=Path)
+    parser.add_argument("--workers", nargs="+", type=int, help="num_workers (mặc định: như lúc ghi)")
+    parser.add_argument("--gaps", nargs="+", type=float, help="relative_gap_limit (mặc định: như lúc ghi)")
+    parser.add_argument("--timeout", type=float, help="Giới hạn thời gian (giây, mặc định: như lúc ghi)")
+    parser.add_argument("--rebuild", action="store_true", help="Dựng lại model từ input bằng code hiện tại")
+    args = parser.parse_args()
+
+    for path in args.snapshots:
+        snapshot = load_snapshot(path)
+        recorded = snapshot.search
+        print(
+            f"🎬 {path.name}: {len(snapshot.input.services)} items, recorded {snapshot.status} "
+            f"in {snapshot.solve_time_ms or 0:.1f} ms (workers={recorded.num_workers}, "
+            f"gap={recorded.relative_gap_limit}, time={recorded.max_time_seconds}s, "
+            f"objective={snapshot.objective_value})"
+        )
+
+        for workers, gap in itertools.product(
+            args.workers or [recorded.num_workers], args.gaps or [recorded.relative_gap_limit]
+        ):
+            search = SearchParameters(
+                num_workers=workers,
+                max_time_seconds=args.timeout or recorded.max_time_seconds,
+                relative_gap_limit=gap,
+            )
+            result = replay(snapshot, search, args.rebuild)
+            ratio = (
+                f"×{result['solve_ms'] / snapshot.solve_time_ms:.2f}" if snapshot.solve_time_ms else "n/a"
+            )
+            print(
+                f"   workers={workers:<3} gap={gap:<6} {result['status']:<10} "
+                f"{result['solve_ms']:>9.1f} ms ({ratio})  objective={result['objective']} bound={result['bound']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,7 @@ from app.modules.staff.models import StaffProfile, UserProfile
 from app.modules.staff.link_models import StaffSkillLink
 from app.modules.scheduling.models import Shift, StaffSchedule
 from app.modules.settings.models import OperatingHour, ExceptionDate
+from app.modules.system.models import SolverRun
 
 from app.core.config import settings
 
@@ -0,0 +1,53 @@
+"""add_solver_runs
+
+Revision ID: b7e4c2d9a1f0
+Revises: 1acb654f06a1
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c2d9a1f0'
+down_revision: Union[str, Sequence[str], None] = '1acb654f06a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Telemetry của optimizer - không FK để giữ lịch sử khi booking bị xóa
+    op.create_table(
+        'solver_runs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('booking_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('target_date', sa.Date, nullable=True),
+        sa.Column('mode', sa.String(20), nullable=False),
+        sa.Column('engine', sa.String(20), nullable=True),
+        sa.Column('status', sa.String(50), nullable=False),
+        sa.Column('num_items', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('solve_time_ms', sa.Float, nullable=True),
+        sa.Column('presolve_time_ms', sa.Float, nullable=True),
+        sa.Column('num_conflicts', sa.BigInteger, nullable=False, server_default='0'),
+        sa.Column('num_branches', sa.BigInteger, nullable=False, server_default='0'),
+        sa.Column('objective_value', sa.Float, nullable=True),
+        sa.Column('best_objective_bound', sa.Float, nullable=True),
+        sa.Column('relative_gap', sa.Float, nullable=True),
+        sa.Column('num_variables', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('num_constraints', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_solver_runs_booking_id', 'solver_runs', ['booking_id'])
+    op.create_index('ix_solver_runs_created_at', 'solver_runs', ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_solver_runs_created_at', table_name='solver_runs')
+    op.drop_index('ix_solver_runs_booking_id', table_name='solver_runs')
+    op.drop_table('solver_runs')
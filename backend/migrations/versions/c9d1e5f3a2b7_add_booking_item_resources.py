@@ -0,0 +1,43 @@
+"""add_booking_item_resources
+
+Revision ID: c9d1e5f3a2b7
+Revises: b7e4c2d9a1f0
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d1e5f3a2b7'
+down_revision: Union[str, Sequence[str], None] = 'b7e4c2d9a1f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Mọi resource của item kèm khoảng sử dụng (quantity > 1, nhiều group, sub-interval)
+    op.create_table(
+        'booking_item_resources',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('booking_item_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('resource_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('usage_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('usage_end', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['booking_item_id'], ['booking_items.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['resource_id'], ['resources.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_booking_item_resources_booking_item_id', 'booking_item_resources', ['booking_item_id'])
+    op.create_index('ix_booking_item_resources_resource_id', 'booking_item_resources', ['resource_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_item_resources_resource_id', table_name='booking_item_resources')
+    op.drop_index('ix_booking_item_resources_booking_item_id', table_name='booking_item_resources')
+    op.drop_table('booking_item_resources')
@@ -0,0 +1,125 @@
+"""
+Factories dùng chung cho test optimizer - dựng input trong bộ nhớ và seed database.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+from app.modules.bookings.optimizer.solver import (
+    BookingWindow,
+    OptimizationInput,
+    ResourceAvailability,
+    ServiceData,
+    StaffAvailability,
+)
+from app.modules.bookings.schemas import OptimizationMode
+from app.modules.resources.models import ResourceGroup
+from app.modules.scheduling.models import ScheduleStatus, Shift, StaffSchedule
+from app.modules.services.link_models import ServiceRequiredSkill
+from app.modules.services.models import Service, ServiceResourceRequirement
+from app.modules.staff.link_models import StaffSkillLink
+
+DAY_START = datetime(2026, 1, 6, 8, 0, tzinfo=timezone.utc)
+DAY_END = DAY_START + timedelta(hours=4)
+
+Window = tuple[datetime, datetime]
+
+
+def make_service(
+    skill_ids: set, group_ids: set | None = None, order: int = 1, duration: int = 60, **fields
+) -> ServiceData:
+    """Item một dịch vụ (buffer 0); `fields`: booking_id, current_*, resource_requirements..."""
+    return ServiceData(
+        item_id=uuid4(),
+        service_id=uuid4(),
+        duration=duration,
+        buffer_time=0,
+        required_skill_ids=skill_ids,
+        required_resource_group_ids=group_ids or set(),
+        sequence_order=order,
+        **fields,
+    )
+
+
+def make_staff(skill_ids: set, slots: list[Window] | None = None, staff_id: UUID | None = None) -> StaffAvailability:
+    return StaffAvailability(
+        staff_id=staff_id or uuid4(), skill_ids=skill_ids, available_slots=slots or [(DAY_START, DAY_END)]
+    )
+
+
+def make_resource(group_id: UUID, slots: list[Window] | None = None) -> ResourceAvailability:
+    return ResourceAvailability(
+        resource_id=uuid4(), group_id=group_id, available_slots=slots or [(DAY_START, DAY_END)]
+    )
+
+
+def make_input(services, staff, resources=(), window: Window = (DAY_START, DAY_END), **fields) -> OptimizationInput:
+    """Input mode BOOKING; `fields`: preferred_staff_id, slot_minutes..."""
+    return OptimizationInput(
+        booking_id=uuid4(),
+        services=services,
+        available_staff=staff,
+        available_resources=list(resources),
+        time_window=window,
+        **fields,
+    )
+
+
+def make_day_input(
+    services, staff, resources=(), booking_window: Window | None = None, window: Window = (DAY_START, DAY_END)
+) -> OptimizationInput:
+    """
+    Input mode DAY; item chưa có booking_id thành một booking riêng.
+    `booking_window`: khung giờ mong muốn của mọi booking (mặc định = horizon `window`).
+    """
+    for service in services:
+        if service.booking_id is None:
+            service.booking_id = uuid4()
+    booking_ids = dict.fromkeys(s.booking_id for s in services)
+    return OptimizationInput(
+        booking_id=None,
+        services=services,
+        available_staff=staff,
+        available_resources=list(resources),
+        time_window=window,
+        mode=OptimizationMode.DAY,
+        bookings=[BookingWindow(booking_id=bid, time_window=booking_window or window) for bid in booking_ids],
+    )
+
+
+@dataclass
+class SeededService:
+    """Service đã lưu kèm ca sáng và một staff có đủ kỹ năng của service."""
+    service: Service
+    shift: Shift
+    skill_id: UUID
+    staff_id: UUID
+
+
+async def seed_service(
+    session,
+    work_date: date,
+    duration: int = 60,
+    buffer_time: int = 0,
+    group: ResourceGroup | None = None,
+    **requirement,
+) -> SeededService:
+    """
+    Seed Service (cần một kỹ năng, + `group` nếu có) và một staff làm ca 8h-12h ngày `work_date`.
+    `requirement`: quantity / start_delay / usage_duration của ServiceResourceRequirement.
+    """
+    skill_id, staff_id = uuid4(), uuid4()
+    service = Service(name="Massage", duration=duration, buffer_time=buffer_time, price=Decimal("100"))
+    shift = Shift(name="Ca sáng", start_time=time(8, 0), end_time=time(12, 0))
+    session.add_all([service, shift])
+    await session.flush()
+
+    session.add_all([
+        ServiceRequiredSkill(service_id=service.id, skill_id=skill_id),
+        StaffSkillLink(staff_id=staff_id, skill_id=skill_id),
+        StaffSchedule(staff_id=staff_id, shift_id=shift.id, work_date=work_date, status=ScheduleStatus.PUBLISHED),
+    ])
+    if group is not None:
+        session.add(ServiceResourceRequirement(service_id=service.id, group_id=group.id, **requirement))
+    return SeededService(service=service, shift=shift, skill_id=skill_id, staff_id=staff_id)
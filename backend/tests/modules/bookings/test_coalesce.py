@@ -0,0 +1,91 @@
+"""
+Tests cho Job Coalescing / Queues - Job id xác định và định tuyến queue theo nguồn booking.
+"""
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+from arq.constants import default_queue_name
+
+from app import worker
+from app.modules.bookings.models import Booking, BookingSource
+from app.modules.bookings.optimizer import queues
+from app.modules.bookings.optimizer.coalesce import (
+    booking_job_id,
+    coalesce_window_end,
+    coalesced_job_id,
+    optimization_version,
+)
+from app.modules.bookings.schemas import OptimizationRequest, SolverProfile
+
+NOW = datetime(2026, 1, 6, 8, 0, 0, 500000, tzinfo=timezone.utc)
+
+
+def test_requests_in_same_window_share_job_id_and_run_at_window_end():
+    day = date(2026, 1, 10)
+    first = coalesce_window_end(NOW, 2)
+    second = coalesce_window_end(NOW + timedelta(seconds=1), 2)
+
+    assert first == second == datetime(2026, 1, 6, 8, 0, 2, tzinfo=timezone.utc)
+    assert coalesced_job_id(day, first) == coalesced_job_id(day, second)
+    # Ngày khác -> job khác
+    assert coalesced_job_id(day, first) != coalesced_job_id(day + timedelta(days=1), first)
+
+    # Đến đúng lúc job chạy -> cửa sổ kế tiếp, không bị gộp vào job đã chạy
+    later = coalesce_window_end(first, 2)
+    assert later == first + timedelta(seconds=2)
+    assert coalesced_job_id(day, later) != coalesced_job_id(day, first)
+
+
+def test_booking_job_id_is_stable_per_version_and_solver_params():
+    booking_id = uuid4()
+    job_id = booking_job_id(booking_id, "v1", 30)
+    assert booking_job_id(booking_id, "v1", 30) == job_id
+    assert booking_job_id(booking_id, "v2", 30) != job_id
+    assert booking_job_id(booking_id, "v1", 10) != job_id
+    assert booking_job_id(booking_id, "v1", 30, SolverProfile(lexicographic=True)) != job_id
+    assert booking_job_id(uuid4(), "v1", 30) != job_id
+
+
+class RecordingQueue:
+    """Queue giả: ghi lại job id của mỗi lần enqueue."""
+
+    def __init__(self):
+        self.job_ids = []
+
+    async def enqueue_job(self, function, *args, _job_id=None, **kwargs):
+        self.job_ids.append(_job_id)
+        return object()
+
+
+async def test_create_and_trigger_paths_share_booking_job_id(monkeypatch):
+    monkeypatch.setattr(worker.settings, "OPTIMIZER_COALESCE_WINDOW_SECONDS", 0)
+    booking = Booking(
+        source=BookingSource.ONLINE,
+        preferred_date=NOW,
+        preferred_time_start=NOW,
+        preferred_time_end=NOW + timedelta(hours=2),
+        updated_at=NOW,
+    )
+    queue = RecordingQueue()
+
+    # create_booking (profile None) và trigger_optimization (profile mặc định của request)
+    await worker.enqueue_new_booking_job(booking, redis=queue)
+    request = OptimizationRequest(booking_id=booking.id)
+    await worker.enqueue_optimization_job(
+        booking.id, request.timeout_seconds, request.profile, redis=queue, version=optimization_version(booking)
+    )
+
+    assert queue.job_ids[0] is not None
+    assert queue.job_ids[0] == queue.job_ids[1]
+
+
+def test_walk_in_and_receptionist_bookings_use_interactive_queue(monkeypatch):
+    monkeypatch.setattr(queues.settings, "OPTIMIZER_INTERACTIVE_QUEUE", "arq:queue:interactive")
+    assert queues.queue_for(BookingSource.WALK_IN) == "arq:queue:interactive"
+    assert queues.queue_for(BookingSource.RECEPTIONIST) == "arq:queue:interactive"
+    assert queues.queue_for(BookingSource.ONLINE) == default_queue_name
+    assert queues.queue_for(BookingSource.PHONE) == default_queue_name
+
+    # Tắt queue interactive -> mọi booking về queue mặc định
+    monkeypatch.setattr(queues.settings, "OPTIMIZER_INTERACTIVE_QUEUE", "")
+    assert queues.queue_for(BookingSource.WALK_IN) == default_queue_name
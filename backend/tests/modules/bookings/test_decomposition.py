@@ -0,0 +1,48 @@
+"""
+Tests cho Decomposition - Tách bài toán thành các thành phần độc lập.
+"""
+from uuid import uuid4
+
+from app.modules.bookings.optimizer.decomposition import decompose
+from app.modules.bookings.optimizer.engine import solve_optimization
+from tests.modules.bookings.factories import make_day_input, make_resource, make_service, make_staff
+
+
+def test_decompose_splits_disjoint_skill_and_resource_clusters():
+    """Facial và Massage không chung staff/resource -> 2 thành phần; combo cùng booking không bị tách."""
+    facial, massage = uuid4(), uuid4()
+    facial_bed, massage_bed = uuid4(), uuid4()
+    staff = [make_staff({facial}), make_staff({massage})]
+    resources = [make_resource(facial_bed), make_resource(massage_bed)]
+    b1, b2, b3 = uuid4(), uuid4(), uuid4()
+    services = [
+        make_service({facial}, {facial_bed}, booking_id=b1),
+        make_service({massage}, {massage_bed}, booking_id=b2),
+        make_service({facial}, {facial_bed}, booking_id=b3),
+    ]
+
+    components = decompose(make_day_input(services, staff, resources))
+
+    assert len(components) == 2
+    facial_part = next(c for c in components if len(c.services) == 2)
+    assert [s.staff_id for s in facial_part.available_staff] == [staff[0].staff_id]
+    assert {b.booking_id for b in facial_part.bookings} == {b1, b3}
+
+    # Combo 1 booking gồm cả facial + massage -> nối 2 cụm lại
+    services.append(make_service({massage}, {massage_bed}, 2, booking_id=b1))
+    assert len(decompose(make_day_input(services, staff, resources))) == 1
+
+
+def test_solve_optimization_merges_component_results():
+    """Kết quả các thành phần được gộp thành một OptimizationResult."""
+    facial, massage = uuid4(), uuid4()
+    facial_bed, massage_bed = uuid4(), uuid4()
+    staff = [make_staff({facial}), make_staff({massage})]
+    resources = [make_resource(facial_bed), make_resource(massage_bed)]
+    # WHY: Không gán booking_id -> mỗi item một booking riêng
+    services = [make_service({facial}, {facial_bed}), make_service({massage}, {massage_bed})]
+
+    result = solve_optimization(make_day_input(services, staff, resources), timeout_seconds=5)
+
+    assert result.success is True
+    assert {a["item_id"] for a in result.assigned_items} == {str(s.item_id) for s in services}
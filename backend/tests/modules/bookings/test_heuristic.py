@@ -0,0 +1,77 @@
+"""
+Tests cho Greedy Scheduler và engine dispatch (greedy -> CP-SAT fallback).
+"""
+from datetime import timedelta
+from uuid import uuid4
+
+from app.modules.bookings.optimizer.engine import solve_optimization
+from app.modules.bookings.optimizer.heuristic import GreedyScheduler
+from app.modules.bookings.schemas import OptimizerEngine
+from tests.modules.bookings.factories import DAY_END, DAY_START, make_input, make_resource, make_service, make_staff
+
+
+def test_greedy_places_combo_in_sequence_earliest_fit():
+    """Combo 2 dịch vụ: item sau bắt đầu ngay khi item trước kết thúc, resource đúng group."""
+    skill, group = uuid4(), uuid4()
+    bed = make_resource(group)
+    services = [make_service({skill}, {group}, 1), make_service({skill}, set(), 2)]
+
+    result = GreedyScheduler(make_input(services, [make_staff({skill})], [bed])).solve()
+
+    first, second = result.assigned_items
+    assert result.engine == OptimizerEngine.GREEDY
+    assert first["scheduled_start"] == DAY_START
+    assert first["resource_id"] == str(bed.resource_id)
+    assert second["scheduled_start"] == first["scheduled_end"]
+    assert second["resource_id"] is None
+
+
+def test_greedy_prefers_requested_staff_and_skips_unavailable_time():
+    """Staff ưu tiên bận buổi đầu -> vẫn chọn staff ưu tiên nếu xếp được sớm nhất."""
+    skill = uuid4()
+    late = make_staff({skill}, [(DAY_START + timedelta(hours=1), DAY_END)])
+    other = make_staff({skill}, [(DAY_START + timedelta(hours=1), DAY_END)])
+
+    result = GreedyScheduler(make_input([make_service({skill}, set())], [other, late], preferred_staff_id=late.staff_id)).solve()
+
+    assert result.assigned_items[0]["staff_id"] == str(late.staff_id)
+    assert result.assigned_items[0]["scheduled_start"] == DAY_START + timedelta(hours=1)
+
+
+def test_greedy_returns_none_when_window_too_short():
+    """Không xếp được trong khung giờ -> None để fallback CP-SAT."""
+    skill = uuid4()
+    window = (DAY_START, DAY_START + timedelta(hours=3))
+    services = [make_service({skill}, set(), order) for order in (1, 2, 3, 4)]
+
+    assert GreedyScheduler(make_input(services, [make_staff({skill}, [window])], window=window)).solve() is None
+
+
+def test_engine_uses_greedy_for_small_and_cp_sat_for_large_bookings():
+    """Booking nhỏ -> GREEDY; vượt ngưỡng -> CP_SAT."""
+    skill = uuid4()
+    staff = [make_staff({skill}), make_staff({skill})]
+
+    small = solve_optimization(make_input([make_service({skill}, set())], staff, []))
+    large = solve_optimization(make_input([make_service({skill}, set(), o) for o in (1, 2, 3)], staff, []))
+
+    assert small.engine == OptimizerEngine.GREEDY
+    assert large.engine == OptimizerEngine.CP_SAT
+    assert large.success is True
+
+
+def test_engine_keeps_confirmed_item_in_place_instead_of_greedy():
+    """Item đã xác nhận lúc 10h với KTV B: không đi greedy (sẽ dời về 8h với A), CP-SAT giữ nguyên."""
+    skill = uuid4()
+    staff_a, staff_b = make_staff({skill}), make_staff({skill})
+    service = make_service({skill}, set())
+    service.current_staff_id, service.current_start, service.is_confirmed = (
+        staff_b.staff_id, DAY_START + timedelta(hours=2), True,
+    )
+
+    result = solve_optimization(make_input([service], [staff_a, staff_b], []))
+
+    (assignment,) = result.assigned_items
+    assert result.engine == OptimizerEngine.CP_SAT
+    assert assignment["staff_id"] == str(staff_b.staff_id)
+    assert assignment["scheduled_start"] == DAY_START + timedelta(hours=2)
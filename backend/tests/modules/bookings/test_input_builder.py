@@ -0,0 +1,151 @@
+"""
+Tests cho Input Builder - Dựng OptimizationInput mode DAY từ database.
+"""
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+from app.modules.bookings import service as booking_service
+from app.modules.bookings.models import Booking, BookingItem, BookingStatus
+from app.modules.bookings.optimizer.engine import solve_optimization
+from app.modules.bookings.optimizer.input_builder import build_booking_input, build_day_input
+from app.modules.bookings.optimizer.skill_cache import SkillCatalogCache
+from app.modules.bookings.schemas import OptimizationMode
+from app.modules.resources.models import Resource, ResourceGroup, ResourceType
+from app.modules.scheduling.models import ScheduleStatus, StaffSchedule
+from app.modules.services.link_models import ServiceRequiredSkill
+from app.modules.staff.link_models import StaffSkillLink
+from tests.conftest import AsyncSessionLocal
+from tests.modules.bookings.factories import seed_service
+
+TARGET_DATE = date(2026, 1, 6)
+
+
+def _at(hour: int) -> datetime:
+    return datetime(2026, 1, 6, hour, 0, tzinfo=timezone.utc)
+
+
+async def test_build_day_input_loads_bookings_staff_and_resources():
+    """Chỉ lấy booking PENDING/CONFIRMED trong ngày; staff từ ca chưa hủy; resource ACTIVE."""
+    cancelled_staff_id = uuid4()
+
+    async with AsyncSessionLocal() as session:
+        group = ResourceGroup(name="Giường Massage", type=ResourceType.BED)
+        session.add(group)
+        seeded = await seed_service(session, TARGET_DATE, buffer_time=10, group=group, start_delay=10, usage_duration=30)
+        service = seeded.service
+
+        bed = Resource(group_id=group.id, name="Giường 1")
+        session.add_all([
+            bed,
+            StaffSchedule(staff_id=cancelled_staff_id, shift_id=seeded.shift.id, work_date=TARGET_DATE,
+                          status=ScheduleStatus.CANCELLED),
+        ])
+
+        bookings = {}
+        for status in (BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CANCELLED):
+            booking = Booking(
+                preferred_date=_at(0), preferred_time_start=_at(8), preferred_time_end=_at(12), status=status
+            )
+            session.add(booking)
+            await session.flush()
+            session.add(BookingItem(booking_id=booking.id, service_id=service.id))
+            bookings[status] = booking
+        await session.commit()
+
+    async with AsyncSessionLocal() as session:
+        input_data = await build_day_input(session, TARGET_DATE)
+
+    assert input_data.mode == OptimizationMode.DAY
+    assert {b.booking_id for b in input_data.bookings} == {
+        bookings[BookingStatus.PENDING].id, bookings[BookingStatus.CONFIRMED].id
+    }
+    assert len(input_data.services) == 2
+    assert all(s.required_skill_ids == {seeded.skill_id} for s in input_data.services)
+    assert all(s.duration + s.buffer_time == 70 for s in input_data.services)
+    assert all(s.resource_usage(s.resource_requirements[0]) == (10, 30) for s in input_data.services)
+    assert [s.staff_id for s in input_data.available_staff] == [seeded.staff_id]
+    assert [r.resource_id for r in input_data.available_resources] == [bed.id]
+
+
+async def test_quantity_two_requirement_round_trips_with_usage_windows():
+    """Requirement quantity=2 có sub-interval: lưu đủ 2 resource, booking sau chỉ bị chặn đúng khoảng dùng."""
+    async with AsyncSessionLocal() as session:
+        group = ResourceGroup(name="Phòng đôi", type=ResourceType.ROOM)
+        session.add(group)
+        seeded = await seed_service(session, TARGET_DATE, group=group, quantity=2, start_delay=10, usage_duration=30)
+        service = seeded.service
+        rooms = [Resource(group_id=group.id, name=f"Phòng {i}") for i in range(3)]
+        session.add_all(rooms)
+        first, second = (
+            Booking(preferred_date=_at(0), preferred_time_start=_at(8), preferred_time_end=_at(12))
+            for _ in range(2)
+        )
+        session.add_all([first, second])
+        await session.flush()
+        session.add_all([BookingItem(booking_id=b.id, service_id=service.id) for b in (first, second)])
+        await session.commit()
+
+    async with AsyncSessionLocal() as session:
+        booking = await booking_service.get_booking_by_id(session, first.id)
+        result = solve_optimization(await build_booking_input(session, booking), timeout_seconds=5)
+        assert result.status in ("OPTIMAL", "FEASIBLE")
+        await booking_service.update_booking_optimization_result(
+            session, first.id, result.status, result.message, result.assigned_items
+        )
+
+    # WHY: SQLite không giữ timezone - so sánh giờ naive
+    start = result.assigned_items[0]["scheduled_start"].replace(tzinfo=None)
+    used = {UUID(rid) for rid in result.assigned_items[0]["resource_ids"]}
+    usage = (start + timedelta(minutes=10), start + timedelta(minutes=40))
+    assert len(used) == 2
+
+    async with AsyncSessionLocal() as session:
+        booking = await booking_service.get_booking_by_id(session, second.id)
+        input_data = await build_booking_input(session, booking)
+        day_input = await build_day_input(session, TARGET_DATE)
+
+    # WHY: Cả 2 phòng bị chặn đúng đoạn 10-40 phút, phòng còn lại trống cả ca
+    day_start, day_end = _at(8).replace(tzinfo=None), _at(12).replace(tzinfo=None)
+    for resource in input_data.available_resources:
+        slots = [(a.replace(tzinfo=None), b.replace(tzinfo=None)) for a, b in resource.available_slots]
+        if resource.resource_id in used:
+            assert slots == [(day_start, usage[0]), (usage[1], day_end)]
+        else:
+            assert slots == [(day_start, day_end)]
+
+    saved = next(s for s in day_input.services if s.booking_id == first.id)
+    assert sorted(saved.current_resource_usages) == sorted((rid, *usage) for rid in used)
+
+
+async def test_build_day_input_returns_none_without_bookings():
+    """Ngày không có booking -> None."""
+    async with AsyncSessionLocal() as session:
+        assert await build_day_input(session, TARGET_DATE) is None
+
+
+async def test_skill_catalog_cache_reloads_when_version_changes():
+    """Worker dùng lại catalog kỹ năng; version trên Redis đổi -> nạp lại từ database."""
+    skill_id, staff_id, service_id = uuid4(), uuid4(), uuid4()
+
+    class FakeRedis:
+        version = b"1"
+
+        async def get(self, key):
+            return self.version
+
+    redis, cache = FakeRedis(), SkillCatalogCache()
+    async with AsyncSessionLocal() as session:
+        session.add(StaffSkillLink(staff_id=staff_id, skill_id=skill_id))
+        await session.commit()
+        first = await cache.get(session, redis)
+
+        session.add(ServiceRequiredSkill(service_id=service_id, skill_id=skill_id))
+        await session.commit()
+        assert await cache.get(session, redis) is first
+
+        redis.version = b"2"
+        reloaded = await cache.get(session, redis)
+
+    assert reloaded is not first
+    assert reloaded.skills_of_staff(staff_id) == {skill_id}
+    assert reloaded.skills_of_service(service_id) == {skill_id}
@@ -0,0 +1,442 @@
+"""
+Tests cho Booking Optimizer - CP-SAT model builder và solver.
+"""
+from datetime import timedelta
+from uuid import uuid4
+
+from app.modules.bookings.optimizer.params import derive_search_parameters
+from app.modules.bookings.optimizer.solver import BookingOptimizer, ResourceRequirement
+from app.modules.bookings.schemas import SolverPriority, SolverProfile
+from tests.modules.bookings.factories import (
+    DAY_END,
+    DAY_START,
+    make_day_input,
+    make_input,
+    make_resource,
+    make_service,
+    make_staff,
+)
+
+
+def test_solve_assigns_only_skilled_staff():
+    """Service chỉ được giao cho staff có đủ TẤT CẢ skill yêu cầu."""
+    massage, facial = uuid4(), uuid4()
+    bed_group = uuid4()
+    skilled = make_staff({massage, facial})
+    unskilled = make_staff({facial})
+    services = [make_service({massage}, {bed_group}, 1), make_service({massage, facial}, {bed_group}, 2)]
+
+    result = BookingOptimizer(make_input(services, [unskilled, skilled], [make_resource(bed_group)])).solve()
+
+    assert result.success is True
+    assert {a["staff_id"] for a in result.assigned_items} == {str(skilled.staff_id)}
+    # Sequence: item 2 bắt đầu sau khi item 1 kết thúc
+    first, second = result.assigned_items
+    assert second["scheduled_start"] >= first["scheduled_end"]
+
+
+def test_solve_infeasible_without_skilled_staff():
+    """Không có staff đủ kỹ năng -> INFEASIBLE ngay, không build model."""
+    optimizer = BookingOptimizer(make_input([make_service({uuid4()}, set())], [make_staff({uuid4()})], []))
+
+    result = optimizer.solve()
+
+    assert result.success is False
+    assert result.status == "INFEASIBLE"
+    assert optimizer.task_starts == {}
+
+
+def test_build_indexes_intervals_per_staff_and_resource():
+    """Optional intervals được gom theo staff/resource, chỉ cho cặp eligible."""
+    skill, group = uuid4(), uuid4()
+    staff = [make_staff({skill}), make_staff(set())]
+    resources = [make_resource(group), make_resource(uuid4())]
+    services = [make_service({skill}, {group}, order) for order in (1, 2, 3)]
+
+    optimizer = BookingOptimizer(make_input(services, staff, resources))
+    optimizer.build()
+
+    assert len(optimizer.staff_intervals[staff[0].staff_id]) == 3
+    assert staff[1].staff_id not in optimizer.staff_intervals
+    assert len(optimizer.resource_intervals[resources[0].resource_id]) == 3
+    assert resources[1].resource_id not in optimizer.resource_intervals
+    assert all(len(optimizer.item_staff_vars[s.item_id]) == 1 for s in services)
+
+
+def test_day_mode_shares_staff_across_bookings():
+    """Mode DAY: 2 booking dùng chung 1 staff không bị chồng giờ, mỗi booking nằm trong khung của nó."""
+    skill = uuid4()
+    staff = make_staff({skill})
+    window_b = (DAY_START + timedelta(hours=1), DAY_END)
+
+    input_data = make_day_input([make_service({skill}, set()), make_service({skill}, set())], [staff])
+    input_data.bookings[1].time_window = window_b
+    booking_a, booking_b = (b.booking_id for b in input_data.bookings)
+    result = BookingOptimizer(input_data).solve()
+
+    assert result.success is True
+    by_booking = {a["booking_id"]: a for a in result.assigned_items}
+    a, b = by_booking[str(booking_a)], by_booking[str(booking_b)]
+    assert a["scheduled_end"] <= b["scheduled_start"] or b["scheduled_end"] <= a["scheduled_start"]
+    assert b["scheduled_start"] >= window_b[0]
+
+
+def test_staff_outside_available_slots_is_not_used():
+    """Staff chỉ được assign trong slot khả dụng của mình."""
+    skill = uuid4()
+    morning_only = make_staff({skill}, [(DAY_START, DAY_START + timedelta(minutes=30))])
+    full_day = make_staff({skill})
+
+    result = BookingOptimizer(make_input([make_service({skill}, set())], [morning_only, full_day], [])).solve()
+
+    assert result.success is True
+    assert result.assigned_items[0]["staff_id"] == str(full_day.staff_id)
+
+
+def test_reoptimize_keeps_confirmed_items_in_place():
+    """Re-optimize với hint + δ: item đã confirm giữ nguyên staff và giờ khi vẫn khả thi."""
+    skill = uuid4()
+    staff = [make_staff({skill}), make_staff({skill})]
+    confirmed = make_service({skill}, set())
+    confirmed.current_staff_id = staff[1].staff_id
+    confirmed.current_start = DAY_START + timedelta(hours=2)
+    confirmed.is_confirmed = True
+
+    result = BookingOptimizer(make_input([confirmed], staff, [])).solve()
+
+    assert result.success is True
+    assignment = result.assigned_items[0]
+    assert assignment["staff_id"] == str(staff[1].staff_id)
+    assert assignment["scheduled_start"] == confirmed.current_start
+
+
+def test_solve_optimization_runs_in_process_pool():
+    """Input picklable: giải được trong process con (spawn) như ARQ worker."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    from app.modules.bookings.optimizer.engine import solve_optimization
+
+    skill = uuid4()
+    input_data = make_input([make_service({skill}, set())], [make_staff({skill})], [])
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        result = pool.submit(solve_optimization, input_data, 5).result(timeout=60)
+
+    assert result.success is True
+    assert result.assigned_items[0]["item_id"] == str(input_data.services[0].item_id)
+
+
+def test_slot_granularity_aligns_starts_and_keeps_real_end():
+    """slot_minutes=15: start rơi vào bội số 15 phút, end = start + duration thực."""
+    skill = uuid4()
+    staff = make_staff({skill})
+    busy_until = DAY_START + timedelta(minutes=20)
+    staff.available_slots = [(busy_until, DAY_END)]
+    input_data = make_input([make_service({skill}, set(), duration=50)], [staff], [])
+    input_data.slot_minutes = 15
+
+    result = BookingOptimizer(input_data).solve()
+
+    assert result.success is True
+    assignment = result.assigned_items[0]
+    assert assignment["scheduled_start"] == DAY_START + timedelta(minutes=30)
+    assert assignment["scheduled_end"] == DAY_START + timedelta(minutes=80)
+
+
+def test_interchangeable_beds_are_used_in_canonical_order():
+    """3 giường cùng group, cùng lịch: item đầu tiên luôn dùng giường đầu tiên, không ai dùng chung giờ."""
+    skill, group = uuid4(), uuid4()
+    beds = [make_resource(group) for _ in range(3)]
+    window = (DAY_START, DAY_START + timedelta(hours=1))
+    services = [make_service({skill}, {group}) for _ in range(3)]
+
+    input_data = make_day_input(services, [make_staff({skill}) for _ in range(3)], beds, window)
+    result = BookingOptimizer(input_data).solve()
+
+    assert result.status == "OPTIMAL"
+    by_item = {a["item_id"]: a for a in result.assigned_items}
+    assert by_item[str(services[0].item_id)]["resource_id"] == str(beds[0].resource_id)
+    assert len({a["resource_id"] for a in result.assigned_items}) == 3
+    assert len({a["staff_id"] for a in result.assigned_items}) == 3
+
+
+def test_resource_sub_interval_frees_machine_early():
+    """Máy chỉ dùng 20 phút (từ phút 15) -> 2 liệu trình 60 phút chạy gối đầu trong 90 phút."""
+    skill, group = uuid4(), uuid4()
+    services = [make_service({skill}, set()) for _ in range(2)]
+    for service in services:
+        service.resource_requirements = [ResourceRequirement(group_id=group, start_delay=15, usage_duration=20)]
+        service.required_resource_group_ids = {group}
+    machine = make_resource(group)
+
+    input_data = make_day_input(
+        services, [make_staff({skill}), make_staff({skill})], [machine], (DAY_START, DAY_START + timedelta(minutes=90))
+    )
+    result = BookingOptimizer(input_data).solve()
+
+    assert result.success is True
+    assert all(a["resource_id"] == str(machine.resource_id) for a in result.assigned_items)
+
+
+def test_resource_quantity_requires_distinct_resources():
+    """quantity=2: mỗi item giữ 2 resource cùng lúc; 3 giường không đủ cho 2 item song song."""
+    skill, group = uuid4(), uuid4()
+    window = (DAY_START, DAY_START + timedelta(hours=1))
+
+    def services():
+        result = [make_service({skill}, {group}) for _ in range(2)]
+        for service in result:
+            service.resource_requirements = [ResourceRequirement(group_id=group, quantity=2)]
+        return result
+
+    staff = [make_staff({skill}), make_staff({skill})]
+    three_beds = [make_resource(group) for _ in range(3)]
+    result = BookingOptimizer(make_day_input(services(), staff, three_beds, window)).solve()
+    assert result.status == "INFEASIBLE"
+
+    four_beds = three_beds + [make_resource(group)]
+    result = BookingOptimizer(make_day_input(services(), staff, four_beds, window)).solve()
+    assert result.success is True
+    used = [set(a["resource_ids"]) for a in result.assigned_items]
+    assert all(len(ids) == 2 for ids in used)
+    assert not used[0] & used[1]
+
+
+def test_solve_reports_solver_stats():
+    """Kết quả CP-SAT kèm thống kê search và kích thước model."""
+    skill = uuid4()
+    result = BookingOptimizer(make_input([make_service({skill}, set())], [make_staff({skill})], [])).solve()
+
+    assert result.stats is not None
+    assert result.stats.num_variables > 0
+    assert result.stats.num_constraints > 0
+    assert result.stats.presolve_time_ms is not None
+    assert result.stats.relative_gap == 0
+
+
+def test_precheck_rejects_window_shorter_than_combo():
+    """Khung giờ ngắn hơn tổng thời lượng combo -> INFEASIBLE kèm lý do, không build model."""
+    skill = uuid4()
+    services = [make_service({skill}, set(), 1), make_service({skill}, set(), 2)]
+    input_data = make_day_input(services, [make_staff({skill})], [], (DAY_START, DAY_START + timedelta(minutes=90)))
+    for service in services:
+        service.booking_id = input_data.bookings[0].booking_id
+    input_data.bookings = input_data.bookings[:1]
+    optimizer = BookingOptimizer(input_data)
+
+    result = optimizer.solve()
+
+    assert result.status == "INFEASIBLE"
+    assert "ngắn hơn tổng thời lượng combo" in result.message
+    assert optimizer.task_starts == {}
+
+
+def test_precheck_rejects_window_that_only_fits_in_minutes():
+    """slot=15, khung 127-187 phút cho dịch vụ 60 phút: đủ theo phút, làm tròn slot còn 45 -> INFEASIBLE."""
+    skill = uuid4()
+    window = (DAY_START + timedelta(minutes=127), DAY_START + timedelta(minutes=187))
+    input_data = make_day_input([make_service({skill}, set())], [make_staff({skill})], [], window)
+    input_data.slot_minutes = 15
+
+    result = BookingOptimizer(input_data).solve()
+
+    assert result.status == "INFEASIBLE"
+    assert "slot 15 phút" in result.message
+
+
+def test_precheck_rejects_skill_and_resource_overload():
+    """Tổng phút cần skill / resource vượt quá phút khả dụng -> INFEASIBLE ngay."""
+    skill, bed_group = uuid4(), uuid4()
+    window = (DAY_START, DAY_END)
+    five_hours = [make_service({skill}, set(), duration=60) for _ in range(5)]
+    result = BookingOptimizer(make_day_input(five_hours, [make_staff({skill})], [], window)).solve()
+    assert result.status == "INFEASIBLE"
+    assert f"Kỹ năng {skill}" in result.message
+
+    double = make_service({skill}, {bed_group})
+    double.resource_requirements = [ResourceRequirement(group_id=bed_group, quantity=2)]
+    result = BookingOptimizer(make_day_input([double], [make_staff({skill})], [make_resource(bed_group)], window)).solve()
+    assert result.status == "INFEASIBLE"
+    assert f"nhóm {bed_group}" in result.message
+
+
+def test_infeasible_model_explains_conflicting_bookings():
+    """Qua pre-check nhưng vô nghiệm -> message nêu các booking gây xung đột (assumption core)."""
+    skill = uuid4()
+    services = [make_service({skill}, set()) for _ in range(2)]
+    # Hai booking cùng muốn 08:00-09:00, chỉ có 1 staff
+    input_data = make_day_input(services, [make_staff({skill})], [], (DAY_START, DAY_START + timedelta(hours=1)))
+
+    result = BookingOptimizer(input_data, timeout_seconds=5).solve()
+
+    assert result.status == "INFEASIBLE"
+    assert "Xung đột giữa" in result.message
+    assert all(str(s.booking_id) in result.message for s in services)
+
+
+def test_search_parameters_scale_with_model_size_and_priority():
+    """Model nhỏ: 1 worker, chứng minh tối ưu; model lớn dừng theo gap; priority đổi time budget."""
+    small = derive_search_parameters(3, None, timeout_seconds=30)
+    assert small.num_workers == 1
+    assert small.relative_gap_limit == 0
+    assert small.max_time_seconds < 5
+
+    large = derive_search_parameters(300, None, timeout_seconds=300)
+    assert large.relative_gap_limit > 0
+    assert large.max_time_seconds > small.max_time_seconds
+
+    interactive = derive_search_parameters(300, SolverProfile(priority=SolverPriority.INTERACTIVE), 300)
+    background = derive_search_parameters(300, SolverProfile(priority=SolverPriority.BACKGROUND), 300)
+    assert interactive.max_time_seconds < large.max_time_seconds < background.max_time_seconds
+    assert interactive.relative_gap_limit > background.relative_gap_limit
+
+
+def test_search_parameters_profile_overrides_and_timeout_cap():
+    """Trường đặt trong profile thắng giá trị suy ra; timeout của request là giới hạn cứng."""
+    profile = SolverProfile(num_workers=2, max_time_seconds=120, relative_gap_limit=0.1)
+
+    params = derive_search_parameters(3, profile, timeout_seconds=10)
+
+    assert params.num_workers == 2
+    assert params.relative_gap_limit == 0.1
+    assert params.max_time_seconds == 10
+
+
+def test_solve_streams_improving_solutions():
+    """on_solution nhận nghiệm khả thi đầu tiên (và các nghiệm tốt hơn) trước kết quả cuối."""
+    skill, bed_group = uuid4(), uuid4()
+    services = [make_service({skill}, {bed_group}) for _ in range(4)]
+    input_data = make_day_input(
+        services, [make_staff({skill}), make_staff({skill})], [make_resource(bed_group), make_resource(bed_group)], (DAY_START, DAY_END)
+    )
+    published = []
+
+    result = BookingOptimizer(input_data, timeout_seconds=5).solve(on_solution=published.append)
+
+    assert result.success is True
+    assert published
+    assert all(p.status == "FEASIBLE" and len(p.assigned_items) == 4 for p in published)
+    assert {a["item_id"] for a in published[0].assigned_items} == {str(s.item_id) for s in services}
+
+
+def test_snapshot_captures_model_and_input_for_replay(tmp_path, monkeypatch):
+    """capture_snapshot: lưu CpModel + input; model load lại giải ra cùng objective."""
+    from ortools.sat.python import cp_model
+
+    from app.core.config import settings
+    from app.modules.bookings.optimizer.snapshot import load_snapshot
+
+    monkeypatch.setattr(settings, "OPTIMIZER_SNAPSHOT_DIR", str(tmp_path))
+    skill, bed_group = uuid4(), uuid4()
+    services = [make_service({skill}, {bed_group}) for _ in range(3)]
+    input_data = make_day_input(services, [make_staff({skill})], [make_resource(bed_group)], (DAY_START, DAY_END))
+
+    result = BookingOptimizer(input_data, profile=SolverProfile(capture_snapshot=True)).solve()
+
+    (path,) = tmp_path.iterdir()
+    snapshot = load_snapshot(path)
+    assert snapshot.status == result.status
+    assert [s.item_id for s in snapshot.input.services] == [s.item_id for s in services]
+
+    solver = cp_model.CpSolver()
+    assert solver.Solve(snapshot.load_model()) == cp_model.OPTIMAL
+    assert solver.ObjectiveValue() == result.stats.objective_value
+
+
+def test_eligibility_index_matches_all_required_skills():
+    """Ma trận eligibility: staff phải có đủ mọi skill; skill không ai có -> không ai eligible."""
+    from app.modules.bookings.optimizer.solver import EligibilityIndex
+
+    massage, facial, unknown = uuid4(), uuid4(), uuid4()
+    both, only_massage = make_staff({massage, facial}), make_staff({massage})
+    combo, single, orphan = make_service({massage, facial}, set()), make_service({massage}, set()), make_service({unknown}, set())
+    index = EligibilityIndex([both, only_massage], [], [combo, single, orphan])
+
+    assert index.staff_for(combo) == [both.staff_id]
+    assert index.staff_for(single) == [both.staff_id, only_massage.staff_id]
+    assert index.staff_for(orphan) == []
+    assert index.staff_with_skill(facial) == {both.staff_id}
+
+
+def test_problem_fingerprint_ignores_entity_order():
+    """Cùng bài toán, khác thứ tự load -> cùng fingerprint; đổi dữ liệu -> khác."""
+    from app.modules.bookings.optimizer.memo import problem_fingerprint
+
+    skill = uuid4()
+    services, staff = [make_service({skill}, set(), 1), make_service({skill}, set(), 2)], [make_staff({skill}), make_staff({skill})]
+    original = make_input(services, staff, [])
+    reordered = make_input(services[::-1], staff[::-1], [])
+    reordered.booking_id = original.booking_id
+
+    fingerprint = problem_fingerprint(original, 30)
+    assert problem_fingerprint(reordered, 30) == fingerprint
+    assert problem_fingerprint(original, 10) != fingerprint
+    staff[0].available_slots = [(DAY_START, DAY_START + timedelta(hours=1))]
+    assert problem_fingerprint(original, 30) != fingerprint
+
+
+def test_problem_fingerprint_can_ignore_saved_assignments():
+    """Input trước và sau khi giải (đã có staff/giờ, CONFIRMED) cùng fingerprint khi bỏ qua lịch đã lưu."""
+    from app.modules.bookings.optimizer.memo import problem_fingerprint
+
+    skill = uuid4()
+    staff = make_staff({skill})
+    input_data = make_input([make_service({skill}, set())], [staff], [])
+    before = problem_fingerprint(input_data, 30, ignore_assignments=True)
+
+    service = input_data.services[0]
+    service.current_staff_id, service.current_start, service.is_confirmed = staff.staff_id, DAY_START, True
+    assert problem_fingerprint(input_data, 30, ignore_assignments=True) == before
+    assert problem_fingerprint(input_data, 30) != problem_fingerprint(input_data, 30, ignore_assignments=True)
+    service.duration += 15
+    assert problem_fingerprint(input_data, 30, ignore_assignments=True) != before
+
+
+async def test_solve_cache_returns_copy_and_evicts_least_recent():
+    """Hit trả về bản sao (engine CACHE, datetime giữ nguyên kiểu); vượt max_entries -> bỏ key cũ nhất."""
+    from app.modules.bookings.optimizer.memo import SolveCache
+    from app.modules.bookings.schemas import OptimizerEngine
+
+    skill = uuid4()
+    input_data = make_input([make_service({skill}, set())], [make_staff({skill})], [])
+    result = BookingOptimizer(input_data).solve()
+    cache = SolveCache(max_entries=2)
+
+    key = await cache.key_for(input_data, 30)
+    assert await cache.get(key) is None
+    await cache.put(key, result)
+
+    cached = await cache.get(key)
+    assert cached.engine == OptimizerEngine.CACHE
+    assert cached.assigned_items == result.assigned_items
+    cached.assigned_items.clear()
+    assert (await cache.get(key)).assigned_items == result.assigned_items
+
+    await cache.put("other", result)
+    await cache.put("newest", result)
+    assert await cache.get(key) is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_lexicographic_solve_fixes_makespan_before_preferences():
+    """Hai booking cùng muốn KTV A: tầng makespan chốt 60 phút (chạy song song), tầng sau giữ một item cho A."""
+    skill = uuid4()
+    staff_a, staff_b = make_staff({skill}), make_staff({skill})
+    input_data = make_day_input([make_service({skill}, set()) for _ in range(2)], [staff_a, staff_b], [], (DAY_START, DAY_END))
+    for booking in input_data.bookings:
+        booking.preferred_staff_id = staff_a.staff_id
+
+    optimizer = BookingOptimizer(input_data, profile=SolverProfile(lexicographic=True))
+    optimizer.build()
+    original = str(optimizer.model.Proto())
+    result = optimizer.solve()
+
+    assert result.status == "OPTIMAL"
+    assert "feasibility -> makespan -> preference" in result.message
+    assert max(a["scheduled_end"] for a in result.assigned_items) == DAY_START + timedelta(minutes=60)
+    assert sorted(a["staff_id"] for a in result.assigned_items) == sorted([str(staff_a.staff_id), str(staff_b.staff_id)])
+
+    # Cận trên / hint của các tầng không lọt vào model gốc (snapshot, lần solve sau)
+    assert str(optimizer.model.Proto()) == original
+    assert optimizer.solve().assigned_items == result.assigned_items
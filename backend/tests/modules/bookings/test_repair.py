@@ -0,0 +1,51 @@
+"""
+Tests cho Disruption Repair - Chỉ xếp lại booking bị ảnh hưởng bởi hủy booking / hủy ca.
+"""
+from datetime import timedelta
+from uuid import uuid4
+
+from app.modules.bookings.optimizer.repair import repair_input, repair_neighbourhood
+from app.modules.bookings.optimizer.solver import BookingOptimizer, ServiceData
+from tests.modules.bookings.factories import DAY_END, DAY_START, make_day_input, make_service, make_staff
+
+
+def _item(skill, staff_id, hour: int) -> ServiceData:
+    """Item đã xác nhận (booking riêng), đang giữ `staff_id` từ DAY_START + `hour`."""
+    return make_service(
+        {skill}, current_staff_id=staff_id, current_start=DAY_START + timedelta(hours=hour), is_confirmed=True
+    )
+
+
+def test_cancelled_shift_replans_only_items_of_absent_staff():
+    """Ca của A bị hủy -> chỉ booking của A được xếp lại, sang B vào giờ B còn trống."""
+    skill, staff_a, staff_b = uuid4(), uuid4(), uuid4()
+    orphan = _item(skill, staff_a, 0)
+    kept = [_item(skill, staff_b, 0), _item(skill, staff_b, 1)]
+    # WHY: A không còn trong available_staff - input builder đã bỏ ca CANCELLED
+    day = make_day_input([orphan, *kept], [make_staff({skill}, staff_id=staff_b)])
+
+    booking_ids = repair_neighbourhood(day)
+    assert booking_ids == {orphan.booking_id}
+
+    neighbourhood = repair_input(day, booking_ids)
+    assert [s.item_id for s in neighbourhood.services] == [orphan.item_id]
+    assert neighbourhood.available_staff[0].available_slots == [(DAY_START + timedelta(hours=2), DAY_END)]
+
+    result = BookingOptimizer(neighbourhood).solve()
+    (assignment,) = result.assigned_items
+    assert assignment["staff_id"] == str(staff_b)
+    assert assignment["scheduled_start"] >= DAY_START + timedelta(hours=2)
+
+
+def test_cancelled_booking_relaxes_nearest_items_after_the_gap():
+    """Booking 8h của A bị hủy -> item sau đó của A được nới (dời lên sớm), staff khác giữ nguyên."""
+    skill, staff_a, staff_b = uuid4(), uuid4(), uuid4()
+    later, latest, other = _item(skill, staff_a, 1), _item(skill, staff_a, 2), _item(skill, staff_b, 1)
+    day = make_day_input(
+        [later, latest, other],
+        [make_staff({skill}, staff_id=sid) for sid in (staff_a, staff_b)],
+    )
+    freed = [(staff_a, DAY_START, DAY_START + timedelta(hours=1))]
+
+    assert repair_neighbourhood(day, freed) == {later.booking_id, latest.booking_id}
+    assert repair_neighbourhood(day, freed, max_freed_items=1) == {later.booking_id}
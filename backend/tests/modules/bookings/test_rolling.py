@@ -0,0 +1,53 @@
+"""
+Tests cho Rolling Horizon + LNS - Tối ưu nhiều ngày.
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.modules.bookings.optimizer.rolling import RollingHorizonConfig, WeekOptimizer, merge_day_inputs
+from app.modules.bookings.optimizer.solver import OptimizationInput
+from tests.modules.bookings.factories import make_day_input, make_service, make_staff
+
+MONDAY = datetime(2026, 1, 5, 8, 0, tzinfo=timezone.utc)
+
+
+def _day(day_offset: int, skill, staff_ids: list, bookings: int) -> OptimizationInput:
+    """Ngày thứ `day_offset` của tuần: khung 8h-12h, `bookings` booking một dịch vụ."""
+    window = (MONDAY + timedelta(days=day_offset), MONDAY + timedelta(days=day_offset, hours=4))
+    return make_day_input(
+        [make_service({skill}) for _ in range(bookings)],
+        [make_staff({skill}, [window], staff_id=sid) for sid in staff_ids],
+        window=window,
+    )
+
+
+def test_merge_day_inputs_combines_staff_slots_across_days():
+    """Cùng staff ở nhiều ngày -> một StaffAvailability với slot của mọi ngày."""
+    skill, staff_id = uuid4(), uuid4()
+    monday, tuesday = _day(0, skill, [staff_id], 1), _day(1, skill, [staff_id], 2)
+
+    merged = merge_day_inputs([monday, tuesday])
+
+    assert len(merged.services) == 3
+    assert len(merged.bookings) == 3
+    (staff,) = merged.available_staff
+    assert staff.available_slots == monday.available_staff[0].available_slots + tuesday.available_staff[0].available_slots
+    assert merged.time_window == (monday.time_window[0], tuesday.time_window[1])
+
+
+def test_week_optimizer_balances_staff_load_across_days():
+    """Thứ 2 chỉ A đi làm (2 booking) -> thứ 3 dồn việc cho B để cân bằng tải cả tuần."""
+    skill, staff_a, staff_b = uuid4(), uuid4(), uuid4()
+    days = [_day(0, skill, [staff_a], 2), _day(1, skill, [staff_a, staff_b], 2)]
+
+    optimizer = WeekOptimizer(days, RollingHorizonConfig(time_budget_seconds=20, lns_iterations=5))
+    result = optimizer.solve()
+
+    assert result.success is True
+    assert len(result.assigned_items) == 4
+    assert optimizer.staff_loads(optimizer.assignments) == {staff_a: 120, staff_b: 120}
+    tuesday_staff = {
+        a["staff_id"] for a in result.assigned_items
+        if a["item_id"] in {str(s.item_id) for s in days[1].services}
+    }
+    assert tuesday_staff == {str(staff_b)}
@@ -0,0 +1,100 @@
+"""
+Tests cho In-process Job Queue - Backend chạy job khi không có Redis.
+"""
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from app import worker
+from app.core.job_queue import InProcessQueue
+from app.modules.bookings.models import Booking, BookingItem
+from app.modules.bookings.optimizer.skill_cache import SkillCatalogCache
+from tests.conftest import AsyncSessionLocal
+from tests.modules.bookings.factories import seed_service
+
+
+async def test_in_process_queue_runs_jobs_and_skips_duplicate_job_ids():
+    calls, lifecycle = [], []
+
+    async def startup(ctx):
+        lifecycle.append("startup")
+        ctx["session_factory"] = "factory"
+
+    async def shutdown(ctx):
+        lifecycle.append("shutdown")
+
+    async def optimize_day(ctx, target_date):
+        calls.append((ctx["session_factory"], ctx["job_id"], target_date))
+
+    queue = InProcessQueue([optimize_day], on_startup=startup, on_shutdown=shutdown)
+    run_at = datetime.now(timezone.utc) + timedelta(milliseconds=50)
+
+    job = await queue.enqueue_job("optimize_day", "2026-01-06", _job_id="day:1", _defer_until=run_at)
+    assert job.job_id == "day:1"
+    # Job cùng id đang chờ -> bỏ qua như ARQ
+    assert await queue.enqueue_job("optimize_day", "2026-01-06", _job_id="day:1") is None
+    assert calls == [] and queue.pending == 1
+
+    await asyncio.sleep(0.2)
+    assert calls == [("factory", "day:1", "2026-01-06")]
+    assert (queue.completed, queue.pending) == (1, 0)
+    # Job đã xong -> id được dùng lại
+    assert await queue.enqueue_job("optimize_day", "2026-01-07", _job_id="day:1") is not None
+
+    await queue.close()
+    assert lifecycle == ["startup", "shutdown"]
+
+
+async def test_in_process_queue_limits_concurrency_per_queue():
+    running, peak = 0, 0
+    release = asyncio.Event()
+
+    async def optimize_booking(ctx, booking_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await release.wait()
+        running -= 1
+
+    queue = InProcessQueue([optimize_booking], max_jobs={"arq:queue": 1, "interactive": 1})
+    for booking_id in ("a", "b"):
+        await queue.enqueue_job("optimize_booking", booking_id)
+    await queue.enqueue_job("optimize_booking", "walk-in", _queue_name="interactive")
+    await asyncio.sleep(0.05)
+
+    # Một job ở queue mặc định + job interactive không phải chờ backlog
+    assert peak == 2
+    release.set()
+    await asyncio.sleep(0.05)
+    assert (queue.completed, queue.pending) == (3, 0)
+    await queue.close()
+
+
+async def test_in_process_optimize_booking_skips_unchanged_resolve():
+    """Không có Redis: fingerprint lần giải trước nhớ trong process -> job lặp lại được bỏ qua."""
+    at = lambda hour: datetime(2026, 1, 6, hour, 0, tzinfo=timezone.utc)  # noqa: E731
+
+    async with AsyncSessionLocal() as session:
+        seeded = await seed_service(session, date(2026, 1, 6))
+        booking = Booking(preferred_date=at(0), preferred_time_start=at(8), preferred_time_end=at(12))
+        session.add(booking)
+        await session.flush()
+        session.add(BookingItem(booking_id=booking.id, service_id=seeded.service.id))
+        await session.commit()
+
+    results = []
+
+    async def startup(ctx):
+        ctx.update(session_factory=AsyncSessionLocal, skill_cache=SkillCatalogCache(), solver_pool=None)
+
+    async def optimize_booking(ctx, booking_id):
+        results.append(await worker.optimize_booking(ctx, booking_id, timeout_seconds=5))
+
+    queue = InProcessQueue([optimize_booking], on_startup=startup)
+    for _ in range(2):
+        await queue.enqueue_job("optimize_booking", str(booking.id))
+        while queue.pending:
+            await asyncio.sleep(0.01)
+    await queue.close()
+
+    assert results[0]["success"] and results[0]["status"] in ("OPTIMAL", "FEASIBLE")
+    assert results[1]["status"] == "UNCHANGED"
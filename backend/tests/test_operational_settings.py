@@ -1,9 +1,12 @@
-from datetime import time
+from datetime import date, datetime, time, timezone
 
 import pytest
 from pydantic import ValidationError
 
+from app.modules.settings.models import ExceptionDate, OperatingHour
 from app.modules.settings.schemas import ExceptionDateBase, OperatingHourBase
+from app.modules.settings.service import settings_service
+from tests.conftest import AsyncSessionLocal
 
 
 def test_operating_hour_validation():
@@ -68,3 +71,36 @@ def test_exception_date_validation():
     obj = ExceptionDateBase(**closed_data)
     assert obj.is_closed is True
     assert obj.open_time is None
+
+
+async def test_open_intervals_apply_overnight_24h_and_exceptions():
+    """
+    Kịch bản (2026-01-06 là Thứ Ba, day_of_week=2):
+    - Thứ Hai 22:00-02:00 (qua đêm) -> Thứ Ba có phần 00:00-02:00
+    - Thứ Ba 00:00-00:00 -> mở 24h
+    - ExceptionDate đóng cửa -> không có khoảng nào (trừ phần tràn từ hôm trước)
+    """
+    tue = date(2026, 1, 6)
+    async with AsyncSessionLocal() as session:
+        session.add_all([
+            OperatingHour(day_of_week=1, open_time=time(22, 0), close_time=time(2, 0)),
+            OperatingHour(day_of_week=2, open_time=time(9, 0), close_time=time(18, 0)),
+        ])
+        await session.commit()
+
+        intervals = await settings_service.get_open_intervals(session, tue)
+        assert intervals == [
+            (datetime(2026, 1, 6, 0, 0, tzinfo=timezone.utc), datetime(2026, 1, 6, 2, 0, tzinfo=timezone.utc)),
+            (datetime(2026, 1, 6, 9, 0, tzinfo=timezone.utc), datetime(2026, 1, 6, 18, 0, tzinfo=timezone.utc)),
+        ]
+
+        session.add(ExceptionDate(date=tue, is_closed=False, open_time=time(0, 0), close_time=time(0, 0)))
+        await session.commit()
+        intervals = await settings_service.get_open_intervals(session, tue)
+        assert intervals == [
+            (datetime(2026, 1, 6, 0, 0, tzinfo=timezone.utc), datetime(2026, 1, 7, 0, 0, tzinfo=timezone.utc)),
+        ]
+
+        session.add(ExceptionDate(date=date(2026, 1, 7), is_closed=True))
+        await session.commit()
+        assert await settings_service.get_open_intervals(session, date(2026, 1, 7)) == []
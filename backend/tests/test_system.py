@@ -0,0 +1,89 @@
+"""
+Tests cho System module - telemetry của optimizer.
+"""
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app.modules.bookings.schemas import OptimizationMode, OptimizationResult, OptimizerEngine, SolverStats
+from app.modules.system.service import _percentile, system_service
+from tests.conftest import AsyncSessionLocal
+
+
+def test_percentile_interpolates_linearly():
+    assert _percentile([], 50) is None
+    assert _percentile([10.0], 99) == 10.0
+    assert _percentile([0.0, 10.0, 20.0, 30.0, 40.0], 50) == 20.0
+    assert _percentile([0.0, 10.0], 90) == 9.0
+
+
+@pytest.mark.anyio
+async def test_solver_stats_summary_and_histogram(client: AsyncClient):
+    async with AsyncSessionLocal() as session:
+        for solve_time in (5, 20, 80, 400, 2000):
+            result = OptimizationResult(
+                success=True,
+                status="OPTIMAL",
+                solve_time_ms=solve_time,
+                engine=OptimizerEngine.CP_SAT,
+                stats=SolverStats(num_conflicts=solve_time * 10, num_branches=solve_time, relative_gap=0.0),
+            )
+            await system_service.record_solver_run(
+                session, result, OptimizationMode.BOOKING, num_items=2, booking_id=uuid4()
+            )
+        greedy = OptimizationResult(success=True, status="FEASIBLE", solve_time_ms=1, engine=OptimizerEngine.GREEDY)
+        await system_service.record_solver_run(session, greedy, OptimizationMode.BOOKING, num_items=1)
+
+    response = await client.get("/api/v1/system/solver-stats", params={"engine": "CP_SAT"})
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["total_runs"] == 5
+    assert summary["status_counts"] == {"OPTIMAL": 5}
+    assert summary["metrics"]["solve_time_ms"]["p50"] == 80
+    assert summary["metrics"]["solve_time_ms"]["max"] == 2000
+    assert summary["metrics"]["num_conflicts"]["count"] == 5
+
+    response = await client.get(
+        "/api/v1/system/solver-stats/histogram", params={"edges": [0, 10, 100, 1000]}
+    )
+    assert response.status_code == 200
+    assert [b["count"] for b in response.json()["buckets"]] == [2, 2, 1, 1]
+
+    response = await client.get("/api/v1/system/solver-stats/slowest", params={"limit": 2})
+    assert [run["solve_time_ms"] for run in response.json()] == [2000, 400]
+
+
+@pytest.mark.anyio
+async def test_redis_pool_backs_off_after_failed_connect(monkeypatch):
+    from app.core import redis as redis_module
+
+    # WHY: Port 1 luôn từ chối kết nối - không cần Redis thật
+    monkeypatch.setattr(redis_module.settings, "UPSTASH_REDIS_URL", "redis://127.0.0.1:1")
+    pool = redis_module.RedisPool()
+
+    with pytest.raises(Exception):
+        await pool.get()
+    # Trong khoảng backoff: không thử kết nối lại
+    with pytest.raises(ConnectionError):
+        await pool.get()
+    assert await pool.health_check() is False
+
+    stats = pool.stats()
+    assert stats["connected"] is False
+    assert stats["failures"] == 1
+    assert stats["last_error"]
+
+
+@pytest.mark.anyio
+async def test_get_redis_without_url_is_not_a_failure(monkeypatch, caplog):
+    from app.core import redis as redis_module
+
+    # WHY: Không cấu hình Redis là chế độ in-process - không phải lỗi kết nối
+    monkeypatch.setattr(redis_module.settings, "UPSTASH_REDIS_URL", "")
+    pool = redis_module.RedisPool()
+    monkeypatch.setattr(redis_module, "redis_pool", pool)
+
+    assert await redis_module.get_redis() is None
+    assert pool.stats()["failures"] == 0
+    assert "Redis unavailable" not in caplog.text